@@ -2,11 +2,18 @@
 API Routes for Phishing Detection
 """
 
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Query, Depends
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Query, Depends, Header
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 from loguru import logger
+from concurrent.futures import ThreadPoolExecutor
 import asyncio
+import bisect
+import secrets
+import sys
+from cachetools import TTLCache
 
 from api.schemas import (
     URLScanRequest,
@@ -14,6 +21,7 @@ from api.schemas import (
     WebpageScanRequest,
     FeedbackRequest,
     URLScanResponse,
+    URLScanResponseLite,
     QuickScanResponse,
     BatchScanResponse,
     WebpageScanResponse,
@@ -23,37 +31,77 @@ from api.schemas import (
     ErrorResponse,
     StatsResponse,
     RiskLevelEnum,
-    StatusEnum,
-    ModelPredictionResponse,
-    TrustEvaluationResponse,
-    URLFeaturesResponse,
-    TrustLevelEnum,
 )
-from services.ensemble_predictor import get_ensemble_predictor, EnsemblePrediction
+from services.ensemble_predictor import get_ensemble_predictor, peek_ensemble_predictor, EnsemblePredictor
 from services.domain_trust import domain_trust_evaluator
 from services.feature_extractor import url_feature_extractor
+from services.scan_batcher import scan_batcher
 from config.settings import settings
+from utils.json_utils import DefaultJSONResponse, json_dumps
 
 
-# Create router
-router = APIRouter()
+# Create router (orjson-backed responses when available)
+router = APIRouter(default_response_class=DefaultJSONResponse)
+
+# Thread pool for running blocking model inference off the event loop
+_executor = ThreadPoolExecutor(
+    max_workers=settings.BATCH_WORKERS,
+    thread_name_prefix="batch-scan",
+)
+
+# Quick-scan risk bands: probability < threshold[i] maps to level[i]
+_RISK_THRESHOLDS = (0.1, 0.3, 0.6, 0.85)
+_RISK_LEVELS = (
+    RiskLevelEnum.VERY_LOW,
+    RiskLevelEnum.LOW,
+    RiskLevelEnum.MEDIUM,
+    RiskLevelEnum.HIGH,
+    RiskLevelEnum.CRITICAL,
+)
+
+# Quick-scan results by URL: (is_phishing, probability)
+_quick_cache: TTLCache = TTLCache(
+    maxsize=settings.QUICK_SCAN_CACHE_SIZE,
+    ttl=settings.QUICK_SCAN_CACHE_TTL,
+)
+_quick_locks: Dict[str, asyncio.Lock] = {}
+
+# Predictor cached after its first successful load (load state never reverts)
+_loaded_predictor: Optional[EnsemblePredictor] = None
 
 
 # =============================================================================
 # Dependency to get predictor
 # =============================================================================
 
-def get_predictor():
+async def get_predictor() -> EnsemblePredictor:
     """Dependency to get ensemble predictor"""
-    predictor = get_ensemble_predictor()
+    global _loaded_predictor
+    
+    if _loaded_predictor is not None:
+        return _loaded_predictor
+    
+    # First use may load models; keep that off the event loop
+    predictor = await run_in_threadpool(get_ensemble_predictor)
     if not predictor.is_loaded():
         raise HTTPException(
             status_code=503,
             detail="Models not loaded. Please wait for initialization."
         )
+    
+    _loaded_predictor = predictor
     return predictor
 
 
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Dependency guarding admin routes with the ADMIN_TOKEN setting"""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled")
+    
+    if x_admin_token is None or not secrets.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
 # =============================================================================
 # URL Scanning Endpoints
 # =============================================================================
@@ -74,60 +122,15 @@ async def scan_url(
     - Risk assessment and recommendations
     """
     try:
-        # Get prediction
-        prediction = predictor.predict(request.url)
-        
-        # Build response
-        response_data = {
-            'url': prediction.url,
-            'is_phishing': prediction.is_phishing,
-            'phishing_probability': prediction.phishing_probability,
-            'confidence': prediction.confidence,
-            'risk_level': RiskLevelEnum(prediction.risk_level),
-            'status': StatusEnum(prediction.status),
-            'scan_timestamp': datetime.utcnow(),
-            'threshold_used': prediction.threshold,
-            'recommendation': _get_recommendation(prediction),
-        }
+        # Get prediction (coalesced with concurrent scans)
+        prediction = await scan_batcher.process(request.url)
         
-        # Add details if requested
-        if request.include_details:
-            response_data['model_predictions'] = [
-                ModelPredictionResponse(**mp) for mp in prediction.model_predictions
-            ]
-            
-            response_data['trust_evaluation'] = TrustEvaluationResponse(
-                trust_score=prediction.domain_trust_score,
-                trust_level=TrustLevelEnum(prediction.domain_trust_level),
-                is_whitelisted=prediction.is_whitelisted,
-                whitelist_reason=prediction.whitelist_reason,
-                is_government=prediction.url_features.get('is_government', False),
-                is_educational=prediction.url_features.get('is_educational', False),
-                reasons=[],
-                suspicious_patterns=[],
-            )
-            
-            response_data['url_features'] = URLFeaturesResponse(
-                length=prediction.url_features['length'],
-                entropy=prediction.url_features['entropy'],
-                digits=prediction.url_features['digits'],
-                letters=prediction.url_features['letters'],
-                special_chars=prediction.url_features['special_chars'],
-                has_ip=prediction.url_features['has_ip'],
-                has_punycode=prediction.url_features['has_punycode'],
-                has_encoded=prediction.url_features['has_encoded'],
-                num_subdomains=prediction.url_features['num_subdomains'],
-                domain=prediction.url_features['domain'],
-                full_domain=prediction.url_features['full_domain'],
-                has_https=prediction.url_features['has_https'],
-            )
-            
-            response_data['rule_flags'] = prediction.rule_flags
-        
-        return URLScanResponse(**response_data)
+        # Validate the response straight from the prediction's attributes
+        result_model = URLScanResponse if request.include_details else URLScanResponseLite
+        return result_model.model_validate(prediction)
         
     except Exception as e:
-        logger.error(f"Scan error: {e}")
+        logger.error("Scan error: {}", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -141,19 +144,10 @@ async def quick_scan(
     Optimized for speed - returns only essential information.
     """
     try:
-        is_phishing, probability = predictor.get_quick_prediction(url)
+        is_phishing, probability = await _get_quick_result(url)
         
         # Determine risk level
-        if probability < 0.1:
-            risk_level = RiskLevelEnum.VERY_LOW
-        elif probability < 0.3:
-            risk_level = RiskLevelEnum.LOW
-        elif probability < 0.6:
-            risk_level = RiskLevelEnum.MEDIUM
-        elif probability < 0.85:
-            risk_level = RiskLevelEnum.HIGH
-        else:
-            risk_level = RiskLevelEnum.CRITICAL
+        risk_level = _RISK_LEVELS[bisect.bisect_right(_RISK_THRESHOLDS, probability)]
         
         return QuickScanResponse(
             url=url,
@@ -163,10 +157,30 @@ async def quick_scan(
         )
         
     except Exception as e:
-        logger.error(f"Quick scan error: {e}")
+        logger.error("Quick scan error: {}", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def _get_quick_result(url: str) -> Tuple[bool, float]:
+    """Cached quick-scan result; concurrent misses for a URL share one scan"""
+    cached = _quick_cache.get(url)
+    if cached is not None:
+        return cached
+    
+    lock = _quick_locks.setdefault(url, asyncio.Lock())
+    try:
+        async with lock:
+            cached = _quick_cache.get(url)
+            if cached is None:
+                prediction = await scan_batcher.process(url)
+                cached = (prediction.is_phishing, prediction.phishing_probability)
+                _quick_cache[url] = cached
+            return cached
+    finally:
+        if not lock.locked() and _quick_locks.get(url) is lock:
+            del _quick_locks[url]
+
+
 @router.post("/scan/batch", response_model=BatchScanResponse)
 async def batch_scan(
     request: BatchScanRequest,
@@ -177,57 +191,71 @@ async def batch_scan(
     Maximum 100 URLs per request.
     """
     try:
-        results = []
-        phishing_count = 0
-        safe_count = 0
-        suspicious_count = 0
-        
-        for url in request.urls:
-            prediction = predictor.predict(url)
-            
-            # Count categories
-            if prediction.is_phishing:
-                phishing_count += 1
-            elif prediction.status == 'suspicious':
-                suspicious_count += 1
-            else:
-                safe_count += 1
-            
-            # Build response
-            result = URLScanResponse(
-                url=prediction.url,
-                is_phishing=prediction.is_phishing,
-                phishing_probability=prediction.phishing_probability,
-                confidence=prediction.confidence,
-                risk_level=RiskLevelEnum(prediction.risk_level),
-                status=StatusEnum(prediction.status),
-                scan_timestamp=datetime.utcnow(),
-                threshold_used=prediction.threshold,
-                recommendation=_get_recommendation(prediction),
-            )
-            
-            if request.include_details:
-                result.model_predictions = [
-                    ModelPredictionResponse(**mp) for mp in prediction.model_predictions
-                ]
-                result.rule_flags = prediction.rule_flags
-            
-            results.append(result)
+        # Run one batched prediction off the event loop
+        loop = asyncio.get_running_loop()
+        predictions = await loop.run_in_executor(
+            _executor, predictor.predict_batch, request.urls
+        )
         
-        return BatchScanResponse(
-            total_urls=len(request.urls),
-            phishing_count=phishing_count,
-            safe_count=safe_count,
-            suspicious_count=suspicious_count,
-            results=results,
-            scan_timestamp=datetime.utcnow(),
+        # Count categories
+        phishing_count = sum(1 for p in predictions if p.is_phishing)
+        suspicious_count = sum(
+            1 for p in predictions if not p.is_phishing and p.status == 'suspicious'
         )
+        safe_count = len(predictions) - phishing_count - suspicious_count
+        scan_timestamp = predictions[0].scan_timestamp
+        
+        # Lean result model when details are off
+        result_model = URLScanResponse if request.include_details else URLScanResponseLite
+        results = [result_model.model_validate(prediction) for prediction in predictions]
+        
+        return BatchScanResponse.model_validate({
+            'total_urls': len(request.urls),
+            'phishing_count': phishing_count,
+            'safe_count': safe_count,
+            'suspicious_count': suspicious_count,
+            'results': results,
+            'scan_timestamp': scan_timestamp,
+        })
         
     except Exception as e:
-        logger.error(f"Batch scan error: {e}")
+        logger.error("Batch scan error: {}", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/scan/batch/stream")
+async def batch_scan_stream(
+    request: BatchScanRequest,
+    predictor = Depends(get_predictor),
+):
+    """
+    Scan multiple URLs and stream results as newline-delimited JSON.
+    Each line is one URL result, emitted as soon as its scan completes.
+    """
+    loop = asyncio.get_running_loop()
+    result_model = URLScanResponse if request.include_details else URLScanResponseLite
+    
+    async def scan_one(url: str) -> bytes:
+        try:
+            prediction = await loop.run_in_executor(_executor, predictor.predict, url)
+        except Exception as e:
+            logger.error("Streamed scan error for {}: {}", url, e)
+            return json_dumps({'url': url, 'error': str(e)}) + b"\n"
+        
+        return result_model.model_validate(prediction).model_dump_json().encode() + b"\n"
+    
+    async def generate():
+        tasks = [asyncio.ensure_future(scan_one(url)) for url in request.urls]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
 # =============================================================================
 # Domain Analysis Endpoints
 # =============================================================================
@@ -265,7 +293,7 @@ async def analyze_domain_trust(
         }
         
     except Exception as e:
-        logger.error(f"Domain trust analysis error: {e}")
+        logger.error("Domain trust analysis error: {}", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -282,7 +310,7 @@ async def extract_url_features(
         return features.to_dict()
         
     except Exception as e:
-        logger.error(f"Feature extraction error: {e}")
+        logger.error("Feature extraction error: {}", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -302,8 +330,10 @@ async def submit_feedback(
     try:
         # In production, this would save to database
         logger.info(
-            f"Feedback received for {request.url}: "
-            f"correct={request.is_correct}, actual={request.actual_label}"
+            "Feedback received for {}: correct={}, actual={}",
+            request.url,
+            request.is_correct,
+            request.actual_label,
         )
         
         # TODO: Save feedback to database in background
@@ -316,7 +346,7 @@ async def submit_feedback(
         )
         
     except Exception as e:
-        logger.error(f"Feedback submission error: {e}")
+        logger.error("Feedback submission error: {}", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -331,23 +361,25 @@ async def health_check():
     Returns system status and model availability.
     """
     try:
-        predictor = get_ensemble_predictor()
-        
-        models_status = {
-            'electra': predictor._electra is not None and predictor._electra.is_loaded() if predictor._electra else False,
-            'biformer': predictor._biformer is not None and predictor._biformer.is_loaded() if predictor._biformer else False,
-            'lgbm': predictor._lgbm is not None and predictor._lgbm.is_loaded() if predictor._lgbm else False,
-        }
+        # Status reads never load (or wait on a load of) the models
+        predictor = peek_ensemble_predictor()
+        if predictor is None:
+            return HealthResponse(
+                status="degraded",
+                version=settings.APP_VERSION,
+                models_loaded={'electra': False, 'biformer': False, 'lgbm': False},
+                timestamp=datetime.utcnow(),
+            )
         
         return HealthResponse(
             status="healthy" if predictor.is_loaded() else "degraded",
             version=settings.APP_VERSION,
-            models_loaded=models_status,
+            models_loaded=predictor.models_loaded_dict(),
             timestamp=datetime.utcnow(),
         )
         
     except Exception as e:
-        logger.error(f"Health check error: {e}")
+        logger.error("Health check error: {}", e)
         return HealthResponse(
             status="unhealthy",
             version=settings.APP_VERSION,
@@ -356,54 +388,74 @@ async def health_check():
         )
 
 
+@router.post("/cache/clear", dependencies=[Depends(require_admin)])
+async def clear_caches():
+    """
+    Drop every in-process result cache: quick-scan, trust, feature, the
+    per-model prediction caches and the memory layer over the DB scan cache.
+    Use after updating trust lists, feature logic or models without a restart.
+    Requires the X-Admin-Token header to match ADMIN_TOKEN.
+    """
+    _quick_cache.clear()
+    domain_trust_evaluator.cache_clear()
+    url_feature_extractor.cache_clear()
+    
+    # Models are never loaded just to be cleared
+    predictor = peek_ensemble_predictor()
+    if predictor is not None:
+        predictor.cache_clear()
+    
+    # The scan cache only exists if something imported the database module
+    database_models = sys.modules.get("database.models")
+    if database_models is not None:
+        database_models.scan_memory_cache_clear()
+    
+    logger.info("In-process scan caches cleared")
+    return {"success": True, "timestamp": datetime.utcnow()}
+
+
 @router.get("/models/status", response_model=ModelStatusResponse)
 async def model_status():
     """
     Get detailed status of all models.
     """
     try:
-        predictor = get_ensemble_predictor()
+        predictor = peek_ensemble_predictor()
+        if predictor is None:
+            # Not created yet: report the configured weights, normalized as the ensemble does
+            total_weight = settings.ELECTRA_WEIGHT + settings.BIFORMER_WEIGHT + settings.LGBM_WEIGHT
+            models_status = {'electra': False, 'biformer': False, 'lgbm': False}
+            weights = {
+                'electra': settings.ELECTRA_WEIGHT / total_weight,
+                'biformer': settings.BIFORMER_WEIGHT / total_weight,
+                'lgbm': settings.LGBM_WEIGHT / total_weight,
+            }
+            ensemble_ready = False
+        else:
+            models_status = predictor.models_loaded_dict()
+            weights = {
+                'electra': predictor.electra_weight,
+                'biformer': predictor.biformer_weight,
+                'lgbm': predictor.lgbm_weight,
+            }
+            ensemble_ready = predictor.is_loaded()
         
         return ModelStatusResponse(
             electra={
-                'loaded': predictor._electra is not None and predictor._electra.is_loaded() if predictor._electra else False,
-                'weight': predictor.electra_weight,
+                'loaded': models_status['electra'],
+                'weight': weights['electra'],
             },
             biformer={
-                'loaded': predictor._biformer is not None and predictor._biformer.is_loaded() if predictor._biformer else False,
-                'weight': predictor.biformer_weight,
+                'loaded': models_status['biformer'],
+                'weight': weights['biformer'],
             },
             lgbm={
-                'loaded': predictor._lgbm is not None and predictor._lgbm.is_loaded() if predictor._lgbm else False,
-                'weight': predictor.lgbm_weight,
+                'loaded': models_status['lgbm'],
+                'weight': weights['lgbm'],
             },
-            ensemble_ready=predictor.is_loaded(),
+            ensemble_ready=ensemble_ready,
         )
         
     except Exception as e:
-        logger.error(f"Model status error: {e}")
+        logger.error("Model status error: {}", e)
         raise HTTPException(status_code=500, detail=str(e))
-
-
-# =============================================================================
-# Helper Functions
-# =============================================================================
-
-def _get_recommendation(prediction: EnsemblePrediction) -> str:
-    """Generate user-friendly recommendation based on prediction"""
-    if prediction.is_whitelisted:
-        return "This is a trusted website. Safe to proceed."
-    
-    if prediction.is_phishing:
-        if prediction.risk_level == 'critical':
-            return "⚠️ HIGH RISK: This URL is very likely a phishing attempt. Do NOT enter any personal information."
-        else:
-            return "⚠️ WARNING: This URL shows signs of phishing. Proceed with extreme caution."
-    
-    if prediction.status == 'suspicious':
-        return "This URL has some suspicious characteristics. Verify the site before entering sensitive information."
-    
-    if prediction.risk_level == 'very_low':
-        return "This URL appears safe. Normal caution advised."
-    
-    return "This URL appears legitimate. Standard security practices recommended."
@@ -2,8 +2,8 @@
 Pydantic schemas for API requests and responses
 """
 
-from typing import Dict, List, Optional, Any
-from pydantic import BaseModel, Field, HttpUrl, field_validator
+from typing import Dict, List, Optional, Any, Union
+from pydantic import AliasChoices, BaseModel, ConfigDict, Field, HttpUrl, field_validator
 from datetime import datetime
 from enum import Enum
 
@@ -142,6 +142,8 @@ class TrustEvaluationResponse(BaseModel):
 
 class URLScanResponse(BaseModel):
     """Response for URL scan"""
+    model_config = ConfigDict(from_attributes=True)
+    
     url: str
     is_phishing: bool
     phishing_probability: float = Field(..., ge=0, le=1)
@@ -157,7 +159,26 @@ class URLScanResponse(BaseModel):
     
     # Metadata
     scan_timestamp: datetime = Field(default_factory=datetime.utcnow)
-    threshold_used: float
+    threshold_used: float = Field(
+        ..., validation_alias=AliasChoices('threshold_used', 'threshold')
+    )
+    recommendation: str
+
+
+class URLScanResponseLite(BaseModel):
+    """Response for URL scan without detailed information"""
+    model_config = ConfigDict(from_attributes=True)
+    
+    url: str
+    is_phishing: bool
+    phishing_probability: float = Field(..., ge=0, le=1)
+    confidence: float = Field(..., ge=0, le=1)
+    risk_level: RiskLevelEnum
+    status: StatusEnum
+    scan_timestamp: datetime = Field(default_factory=datetime.utcnow)
+    threshold_used: float = Field(
+        ..., validation_alias=AliasChoices('threshold_used', 'threshold')
+    )
     recommendation: str
 
 
@@ -175,7 +196,7 @@ class BatchScanResponse(BaseModel):
     phishing_count: int
     safe_count: int
     suspicious_count: int
-    results: List[URLScanResponse]
+    results: List[Union[URLScanResponse, URLScanResponseLite]]
     scan_timestamp: datetime = Field(default_factory=datetime.utcnow)
 
 
@@ -3,14 +3,21 @@ Constants for Phishing Detection Backend
 Includes trusted domains, keywords, and static configurations
 """
 
-from typing import Dict, List, Set, Tuple
+import re
+from typing import Dict, FrozenSet, List, Tuple
+
+# Prefer RE2 (linear-time DFA matching) when installed
+try:
+    import re2 as _regex
+except ImportError:
+    _regex = re
 
 # =============================================================================
 # HIGH TRUST DOMAINS (Tech Giants, Major Banks, Government)
 # These domains have the highest trust score
 # =============================================================================
 
-HIGH_TRUST_DOMAINS: Set[str] = {
+HIGH_TRUST_DOMAINS: FrozenSet[str] = frozenset({
     # Tech Giants
     "google.com", "google.co.uk", "google.de", "google.fr", "google.es",
     "google.it", "google.ca", "google.com.au", "google.co.jp", "google.com.br",
@@ -58,13 +65,13 @@ HIGH_TRUST_DOMAINS: Set[str] = {
     "wikipedia.org", "wikimedia.org", "britannica.com",
     "coursera.org", "edx.org", "udemy.com", "khanacademy.org",
     "mit.edu", "stanford.edu", "harvard.edu", "berkeley.edu", "oxford.ac.uk",
-}
+})
 
 # =============================================================================
 # MEDIUM TRUST DOMAINS (Popular but smaller sites)
 # =============================================================================
 
-MEDIUM_TRUST_DOMAINS: Set[str] = {
+MEDIUM_TRUST_DOMAINS: FrozenSet[str] = frozenset({
     # Tech & Development
     "stackoverflow.com", "stackexchange.com", "reddit.com", "quora.com",
     "medium.com", "dev.to", "hackernews.com", "producthunt.com",
@@ -92,27 +99,27 @@ MEDIUM_TRUST_DOMAINS: Set[str] = {
     "baidu.com", "weibo.com", "qq.com", "163.com", "sohu.com",
     "naver.com", "daum.net", "yahoo.co.jp",
     "yandex.ru", "mail.ru", "vk.com",
-}
+})
 
 # =============================================================================
 # GOVERNMENT DOMAINS (High Trust)
 # =============================================================================
 
-GOVERNMENT_TLD_PATTERNS: Set[str] = {
+GOVERNMENT_TLD_PATTERNS: FrozenSet[str] = frozenset({
     ".gov", ".gov.uk", ".gov.au", ".gov.ca", ".gov.in",
     ".gov.br", ".gov.cn", ".gov.jp", ".gov.de", ".gov.fr",
     ".mil", ".edu",
     ".sa.gov", ".mc.gov",  # Saudi Arabia government domains
-}
+})
 
 # Specific government domains
-GOVERNMENT_DOMAINS: Set[str] = {
+GOVERNMENT_DOMAINS: FrozenSet[str] = frozenset({
     "usa.gov", "whitehouse.gov", "irs.gov", "ssa.gov",
     "gov.uk", "nhs.uk", "dwp.gov.uk",
     "service-public.fr", "gouvernement.fr",
     "bund.de", "bundesregierung.de",
     "gob.mx", "sat.gob.mx",
-}
+})
 
 # =============================================================================
 # TRUSTED KEYWORDS
@@ -146,11 +153,11 @@ SUSPICIOUS_KEYWORDS: List[str] = [
 # PHISHING INDICATORS
 # =============================================================================
 
-PHISHING_TLD_PATTERNS: Set[str] = {
+PHISHING_TLD_PATTERNS: FrozenSet[str] = frozenset({
     ".tk", ".ml", ".ga", ".cf", ".gq",  # Free domains often used for phishing
     ".xyz", ".top", ".work", ".click", ".link",
     ".loan", ".men", ".party", ".racing", ".review",
-}
+})
 
 PHISHING_SUBSTRINGS: List[str] = [
     "login-", "-login", "signin-", "-signin",
@@ -160,6 +167,12 @@ PHISHING_SUBSTRINGS: List[str] = [
     "help-", "-help", "service-", "-service",
 ]
 
+# Single alternation over all phishing substrings (one scan per string)
+PHISHING_SUBSTRING_RE = _regex.compile("|".join(re.escape(s) for s in PHISHING_SUBSTRINGS))
+
+# Dash-separated octets in a domain label (e.g. "192-168-0-1")
+IP_LIKE_DOMAIN_RE = _regex.compile(r"\d{1,3}-\d{1,3}-\d{1,3}")
+
 # =============================================================================
 # URL FEATURE THRESHOLDS
 # =============================================================================
@@ -181,14 +194,14 @@ URL_THRESHOLDS: Dict[str, float] = {
 # In production, this would be loaded from a file
 # =============================================================================
 
-TOP_1K_DOMAINS_SAMPLE: Set[str] = {
+TOP_1K_DOMAINS_SAMPLE: FrozenSet[str] = frozenset({
     # This is a sample - in production, load from tranco-list.eu
     "google.com", "youtube.com", "facebook.com", "twitter.com",
     "instagram.com", "linkedin.com", "wikipedia.org", "amazon.com",
     "apple.com", "microsoft.com", "netflix.com", "reddit.com",
     "yahoo.com", "tiktok.com", "live.com", "office.com",
     "zoom.us", "bing.com", "microsoftonline.com", "github.com",
-}
+})
 
 # Trust levels mapping
 TRUST_LEVELS: Dict[str, Tuple[float, str]] = {
@@ -7,6 +7,7 @@ import os
 from pathlib import Path
 from typing import Optional, List
 from functools import lru_cache
+from dataclasses import make_dataclass
 
 from pydantic_settings import BaseSettings
 
@@ -24,6 +25,8 @@ class Settings(BaseSettings):
     HOST: str = "0.0.0.0"
     PORT: int = 8000
     WORKERS: int = 4
+    USE_GUNICORN: bool = False  # Serve multi-worker runs via gunicorn --preload (Unix only)
+    PRELOAD_MODELS: bool = False  # Load models when the app module is imported (before workers fork)
     
     # Base Paths - auto-configured relative to project root
     BASE_DIR: Path = Path(__file__).resolve().parent.parent.parent
@@ -38,10 +41,25 @@ class Settings(BaseSettings):
     # Model Settings
     MAX_URL_LENGTH: int = 512
     BATCH_SIZE: int = 32
+    BATCH_WORKERS: int = 4  # Thread pool size for concurrent batch scans
+    ENSEMBLE_WORKERS: int = 3  # Shared threads running the models concurrently (per process)
+    SCAN_BATCH_MAX_SIZE: int = 32  # Max URLs coalesced from concurrent /scan calls
+    SCAN_BATCH_MAX_WAIT: float = 0.01  # Max seconds a /scan call waits for its batch
     MODEL_DEVICE: str = "cuda"  # Options: "cuda", "cpu", "auto"
+    TORCH_NUM_THREADS: int = 0  # Intra-op threads per worker process (0 = CPU count / WORKERS)
+    USE_FP16: bool = True  # Half-precision transformer inference on CUDA (ignored on CPU)
+    TORCH_COMPILE: bool = False  # torch.compile transformer models at load time
+    TORCH_COMPILE_MODE: str = "reduce-overhead"  # torch.compile mode when enabled
+    LGBM_NUM_THREADS: int = 1  # OpenMP threads per LightGBM predict call
+    MODEL_PREDICT_CACHE_SIZE: int = 4096  # Per-model LRU of predictions by URL (0 disables)
+    ELECTRA_QUANTIZE_CPU: bool = False  # int8 dynamic quantization of ELECTRA on CPU (PyTorch or ONNX)
+    ELECTRA_ONNX_CPU: bool = False  # Serve ELECTRA through ONNX Runtime on CPU (needs onnxruntime)
+    ELECTRA_ONNX_PATH: str = "electra_url_model/model.onnx"  # Exported on first use (file name keyed on the weights)
+    BIFORMER_TORCHSCRIPT: bool = False  # Script + freeze Biformer (used when TORCH_COMPILE is off)
+    BIFORMER_CUDA_GRAPH: bool = False  # Replay a captured CUDA graph for single-URL Biformer calls
     
     # Threshold Settings (from tuned_thresholds.json)
-    PHISHING_THRESHOLD: float = 0.0863  # Precision-targeted threshold
+    PHISHING_THRESHOLD: float = 0.0863  # Precision-targeted threshold (revalidate: tuned on double-sigmoid LightGBM scores)
     HIGH_CONFIDENCE_THRESHOLD: float = 0.95
     LOW_CONFIDENCE_THRESHOLD: float = 0.05
     
@@ -55,10 +73,28 @@ class Settings(BaseSettings):
     TRUST_SCORE_MEDIUM: float = 0.5
     TRUST_SCORE_LOW: float = 0.2
     TRUST_SCORE_UNKNOWN: float = 0.0
+    TRUST_EVAL_CACHE_SIZE: int = 65536  # Cached trust evaluations by host (0 disables)
+    TLD_EXTRACT_CACHE_SIZE: int = 32768  # Cached tldextract results by URL host
+    FEATURE_CACHE_SIZE: int = 65536  # Cached URL feature extractions by URL (0 disables)
     
     # Domain Intelligence
     MIN_DOMAIN_AGE_DAYS: int = 30  # Domains younger than this are suspicious
     SAFE_DOMAIN_AGE_DAYS: int = 365  # Domains older than this get trust bonus
+    DNS_TIMEOUT: float = 2.0  # seconds allowed per DNS query (A/MX/TXT run concurrently)
+    DNS_MAX_CONCURRENCY: int = 100  # Domains resolved at once per process
+    EXTERNAL_CACHE_SIZE: int = 10000  # Entries per WHOIS/DNS/Safe Browsing result cache (0 disables)
+    WHOIS_CACHE_TTL: int = 86400  # seconds
+    WHOIS_STORE_PATH: str = "whois_cache.db"  # SQLite file of WHOIS results shared by workers ("" disables)
+    WHOIS_STORE_TTL: int = 2592000  # seconds (30 days); ages are recomputed on read
+    WHOIS_NEGATIVE_TTL: int = 3600  # seconds a failed WHOIS lookup is remembered
+    WHOIS_MAX_WORKERS: int = 32  # Threads running blocking WHOIS lookups (caps concurrent queries)
+    DNS_CACHE_MIN_TTL: int = 60  # seconds; record TTLs are clamped to [min, max]
+    DNS_CACHE_MAX_TTL: int = 3600  # seconds
+    SAFE_BROWSING_CACHE_TTL: int = 600  # seconds
+    SAFE_BROWSING_SKIP_WHITELISTED: bool = True  # Answer whitelisted domains locally, without an API call
+    SAFE_BROWSING_BATCH_MAX_SIZE: int = 200  # Max URLs coalesced into one Safe Browsing request
+    SAFE_BROWSING_BATCH_MAX_WAIT: float = 0.02  # Max seconds a URL check waits for its batch
+    SAFE_BROWSING_MAX_CONCURRENCY: int = 8  # Safe Browsing requests in flight at once per process
     
     # External APIs (Optional)
     GOOGLE_SAFE_BROWSING_API_KEY: Optional[str] = None
@@ -66,10 +102,19 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str = "sqlite+aiosqlite:///./phishing_detection.db"
+    DB_POOL_SIZE: int = 10  # Connections kept open per worker process
+    DB_MAX_OVERFLOW: int = 10  # Extra connections allowed under burst load
+    DB_POOL_RECYCLE: int = 1800  # seconds before a pooled connection is replaced
     
     # Redis Cache (Optional)
     REDIS_URL: Optional[str] = None
     CACHE_TTL: int = 3600  # 1 hour default cache
+    SCAN_MEMORY_CACHE_SIZE: int = 10000  # In-process entries in front of the DB scan cache
+    QUICK_SCAN_CACHE_SIZE: int = 10000  # In-process /scan/quick result cache entries
+    QUICK_SCAN_CACHE_TTL: int = 300  # seconds
+    
+    # Admin Endpoints
+    ADMIN_TOKEN: Optional[str] = None  # X-Admin-Token value for admin routes (unset disables them)
     
     # Rate Limiting
     RATE_LIMIT_REQUESTS: int = 100
@@ -85,15 +130,28 @@ class Settings(BaseSettings):
     CORS_ALLOW_METHODS: List[str] = ["*"]
     CORS_ALLOW_HEADERS: List[str] = ["*"]
     
+    # Response Compression
+    GZIP_MINIMUM_SIZE: int = 1024  # Bytes; smaller responses are sent uncompressed
+    GZIP_COMPRESS_LEVEL: int = 5
+    
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
         case_sensitive = True
     
+    @property
+    def torch_num_threads(self) -> int:
+        """Intra-op threads per worker process (TORCH_NUM_THREADS, else CPU count / WORKERS)"""
+        return self.TORCH_NUM_THREADS or max(1, (os.cpu_count() or 1) // max(1, self.WORKERS))
+    
     @property
     def electra_model_full_path(self) -> Path:
         return self.BASE_DIR / self.ELECTRA_MODEL_PATH
     
+    @property
+    def electra_onnx_full_path(self) -> Path:
+        return self.BASE_DIR / self.ELECTRA_ONNX_PATH
+    
     @property
     def biformer_model_full_path(self) -> Path:
         return self.BASE_DIR / self.BIFORMER_MODEL_PATH
@@ -107,11 +165,30 @@ class Settings(BaseSettings):
         return self.BASE_DIR / self.CHAR2ID_PATH
 
 
+# Immutable, slotted mirror of Settings (same field names and path properties)
+FrozenSettings = make_dataclass(
+    "FrozenSettings",
+    [(name, field.annotation) for name, field in Settings.model_fields.items()],
+    namespace={
+        name: value for name, value in vars(Settings).items() if isinstance(value, property)
+    },
+    frozen=True,
+    slots=True,
+)
+
+
 @lru_cache()
 def get_settings() -> Settings:
     """Get cached settings instance"""
     return Settings()
 
 
+@lru_cache()
+def get_frozen_settings() -> FrozenSettings:
+    """Get a frozen snapshot of the parsed settings for hot-path reads"""
+    parsed = get_settings()
+    return FrozenSettings(**{name: getattr(parsed, name) for name in Settings.model_fields})
+
+
 # Export settings instance
-settings = get_settings()
+settings = get_frozen_settings()
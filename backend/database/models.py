@@ -4,21 +4,22 @@ SQLAlchemy models for caching, logging, and feedback
 """
 
 from datetime import datetime
-from typing import Optional
+from typing import Any, AsyncIterator, Optional
 from sqlalchemy import (
-    Column, Integer, String, Float, Boolean, DateTime, 
-    Text, JSON, ForeignKey, Index, create_engine
+    Integer, String, Float, Boolean, DateTime,
+    Text, JSON, ForeignKey, Index, event, func,
 )
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 
 from config.settings import settings
+from utils.json_utils import json_dumps_str, json_loads
 
 
 # Base class for models
-Base = declarative_base()
+class Base(DeclarativeBase):
+    # Fetch server-generated timestamps in the INSERT itself (RETURNING where supported)
+    __mapper_args__ = {"eager_defaults": True}
 
 
 # =============================================================================
@@ -30,38 +31,38 @@ class URLScan(Base):
     
     __tablename__ = "url_scans"
     
-    id = Column(Integer, primary_key=True, autoincrement=True)
-    url = Column(String(2048), nullable=False, index=True)
-    url_hash = Column(String(64), nullable=False, unique=True, index=True)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    url: Mapped[str] = mapped_column(String(2048), nullable=False)  # Lookups go through url_hash
+    url_hash: Mapped[str] = mapped_column(String(64), nullable=False, unique=True, index=True)
     
     # Prediction results
-    is_phishing = Column(Boolean, nullable=False)
-    phishing_probability = Column(Float, nullable=False)
-    confidence = Column(Float, nullable=False)
-    risk_level = Column(String(20), nullable=False)
-    status = Column(String(20), nullable=False)
+    is_phishing: Mapped[bool] = mapped_column(Boolean, nullable=False)
+    phishing_probability: Mapped[float] = mapped_column(Float, nullable=False)
+    confidence: Mapped[float] = mapped_column(Float, nullable=False)
+    risk_level: Mapped[str] = mapped_column(String(20), nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False)
     
     # Individual model scores
-    electra_probability = Column(Float, nullable=True)
-    biformer_probability = Column(Float, nullable=True)
-    lgbm_probability = Column(Float, nullable=True)
+    electra_probability: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    biformer_probability: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    lgbm_probability: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
     
     # Domain trust
-    domain = Column(String(255), nullable=True, index=True)
-    domain_trust_score = Column(Float, nullable=True)
-    domain_trust_level = Column(String(20), nullable=True)
-    is_whitelisted = Column(Boolean, default=False)
+    domain: Mapped[Optional[str]] = mapped_column(String(255), nullable=True, index=True)
+    domain_trust_score: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    domain_trust_level: Mapped[Optional[str]] = mapped_column(String(20), nullable=True)
+    is_whitelisted: Mapped[Optional[bool]] = mapped_column(Boolean, default=False)
     
     # Metadata
-    threshold_used = Column(Float, nullable=False)
-    rule_flags = Column(JSON, nullable=True)
+    threshold_used: Mapped[float] = mapped_column(Float, nullable=False)
+    rule_flags: Mapped[Any] = mapped_column(JSON, nullable=True)
     
     # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow, index=True)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, server_default=func.now(), index=True)
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime, server_default=func.now(), onupdate=func.now())
     
     # Cache control
-    cache_expires_at = Column(DateTime, nullable=True)
+    cache_expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     
     def __repr__(self):
         return f"<URLScan(url={self.url[:50]}, is_phishing={self.is_phishing})>"
@@ -72,31 +73,31 @@ class URLFeatureCache(Base):
     
     __tablename__ = "url_feature_cache"
     
-    id = Column(Integer, primary_key=True, autoincrement=True)
-    url_hash = Column(String(64), nullable=False, unique=True, index=True)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    url_hash: Mapped[str] = mapped_column(String(64), nullable=False, unique=True, index=True)
     
     # Features
-    length = Column(Integer)
-    entropy = Column(Float)
-    digits = Column(Integer)
-    letters = Column(Integer)
-    special_chars = Column(Integer)
-    has_ip = Column(Boolean)
-    has_punycode = Column(Boolean)
-    has_encoded = Column(Boolean)
-    num_subdomains = Column(Integer)
-    path_length = Column(Integer)
-    has_https = Column(Boolean)
+    length: Mapped[Optional[int]] = mapped_column(Integer)
+    entropy: Mapped[Optional[float]] = mapped_column(Float)
+    digits: Mapped[Optional[int]] = mapped_column(Integer)
+    letters: Mapped[Optional[int]] = mapped_column(Integer)
+    special_chars: Mapped[Optional[int]] = mapped_column(Integer)
+    has_ip: Mapped[Optional[bool]] = mapped_column(Boolean)
+    has_punycode: Mapped[Optional[bool]] = mapped_column(Boolean)
+    has_encoded: Mapped[Optional[bool]] = mapped_column(Boolean)
+    num_subdomains: Mapped[Optional[int]] = mapped_column(Integer)
+    path_length: Mapped[Optional[int]] = mapped_column(Integer)
+    has_https: Mapped[Optional[bool]] = mapped_column(Boolean)
     
     # Domain info
-    domain = Column(String(255))
-    full_domain = Column(String(255))
+    domain: Mapped[Optional[str]] = mapped_column(String(255))
+    full_domain: Mapped[Optional[str]] = mapped_column(String(255))
     
     # Full features JSON
-    features_json = Column(JSON, nullable=True)
+    features_json: Mapped[Any] = mapped_column(JSON, nullable=True)
     
     # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, server_default=func.now())
     
     def __repr__(self):
         return f"<URLFeatureCache(url_hash={self.url_hash[:20]})>"
@@ -107,30 +108,30 @@ class DomainTrustCache(Base):
     
     __tablename__ = "domain_trust_cache"
     
-    id = Column(Integer, primary_key=True, autoincrement=True)
-    domain = Column(String(255), nullable=False, unique=True, index=True)
-    full_domain = Column(String(255), nullable=False)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    domain: Mapped[str] = mapped_column(String(255), nullable=False, unique=True, index=True)
+    full_domain: Mapped[str] = mapped_column(String(255), nullable=False)
     
     # Trust evaluation
-    trust_score = Column(Float, nullable=False)
-    trust_level = Column(String(20), nullable=False)
-    confidence = Column(Float, nullable=False)
-    is_whitelisted = Column(Boolean, default=False)
-    whitelist_reason = Column(String(255), nullable=True)
+    trust_score: Mapped[float] = mapped_column(Float, nullable=False)
+    trust_level: Mapped[str] = mapped_column(String(20), nullable=False)
+    confidence: Mapped[float] = mapped_column(Float, nullable=False)
+    is_whitelisted: Mapped[Optional[bool]] = mapped_column(Boolean, default=False)
+    whitelist_reason: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     
     # Flags
-    is_government = Column(Boolean, default=False)
-    is_educational = Column(Boolean, default=False)
+    is_government: Mapped[Optional[bool]] = mapped_column(Boolean, default=False)
+    is_educational: Mapped[Optional[bool]] = mapped_column(Boolean, default=False)
     
     # Details
-    reasons = Column(JSON, nullable=True)
-    keyword_matches = Column(JSON, nullable=True)
-    suspicious_patterns = Column(JSON, nullable=True)
+    reasons: Mapped[Any] = mapped_column(JSON, nullable=True, deferred=True)
+    keyword_matches: Mapped[Any] = mapped_column(JSON, nullable=True)
+    suspicious_patterns: Mapped[Any] = mapped_column(JSON, nullable=True)
     
     # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    expires_at = Column(DateTime, nullable=True)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, server_default=func.now())
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime, server_default=func.now(), onupdate=func.now())
+    expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     
     def __repr__(self):
         return f"<DomainTrustCache(domain={self.domain}, trust_level={self.trust_level})>"
@@ -141,28 +142,28 @@ class UserFeedback(Base):
     
     __tablename__ = "user_feedback"
     
-    id = Column(Integer, primary_key=True, autoincrement=True)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     
     # Reference to scan
-    url = Column(String(2048), nullable=False)
-    url_hash = Column(String(64), nullable=False, index=True)
-    scan_id = Column(Integer, ForeignKey('url_scans.id'), nullable=True)
+    url: Mapped[str] = mapped_column(String(2048), nullable=False)
+    url_hash: Mapped[str] = mapped_column(String(64), nullable=False, index=True)
+    scan_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey('url_scans.id'), nullable=True)
     
     # Feedback
-    prediction_was_correct = Column(Boolean, nullable=False)
-    actual_label = Column(Integer, nullable=True)  # 0=legitimate, 1=phishing
-    user_comment = Column(Text, nullable=True)
+    prediction_was_correct: Mapped[bool] = mapped_column(Boolean, nullable=False)
+    actual_label: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)  # 0=legitimate, 1=phishing
+    user_comment: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     
     # Original prediction
-    predicted_label = Column(Integer, nullable=True)
-    predicted_probability = Column(Float, nullable=True)
+    predicted_label: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    predicted_probability: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
     
     # Metadata
-    user_agent = Column(String(512), nullable=True)
-    ip_address = Column(String(45), nullable=True)
+    user_agent: Mapped[Optional[str]] = mapped_column(String(512), nullable=True)
+    ip_address: Mapped[Optional[str]] = mapped_column(String(45), nullable=True)
     
     # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, server_default=func.now(), index=True)
     
     def __repr__(self):
         return f"<UserFeedback(url={self.url[:30]}, correct={self.prediction_was_correct})>"
@@ -173,24 +174,24 @@ class ScanLog(Base):
     
     __tablename__ = "scan_logs"
     
-    id = Column(Integer, primary_key=True, autoincrement=True)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     
     # Request info
-    url = Column(String(2048), nullable=False)
-    endpoint = Column(String(100), nullable=False)
-    request_type = Column(String(20), nullable=False)  # single, batch, quick
+    url: Mapped[str] = mapped_column(String(2048), nullable=False)
+    endpoint: Mapped[str] = mapped_column(String(100), nullable=False)
+    request_type: Mapped[str] = mapped_column(String(20), nullable=False)  # single, batch, quick
     
     # Response info
-    is_phishing = Column(Boolean, nullable=False)
-    probability = Column(Float, nullable=False)
-    response_time_ms = Column(Float, nullable=False)
+    is_phishing: Mapped[bool] = mapped_column(Boolean, nullable=False)
+    probability: Mapped[float] = mapped_column(Float, nullable=False)
+    response_time_ms: Mapped[float] = mapped_column(Float, nullable=False)
     
     # Request metadata
-    user_agent = Column(String(512), nullable=True)
-    ip_address = Column(String(45), nullable=True)
+    user_agent: Mapped[Optional[str]] = mapped_column(String(512), nullable=True)
+    ip_address: Mapped[Optional[str]] = mapped_column(String(45), nullable=True)
     
     # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, server_default=func.now(), index=True)
     
     def __repr__(self):
         return f"<ScanLog(url={self.url[:30]}, is_phishing={self.is_phishing})>"
@@ -201,23 +202,23 @@ class TrustedDomainList(Base):
     
     __tablename__ = "trusted_domain_lists"
     
-    id = Column(Integer, primary_key=True, autoincrement=True)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     
-    domain = Column(String(255), nullable=False, unique=True, index=True)
-    trust_level = Column(String(20), nullable=False)  # high, medium, low
-    category = Column(String(50), nullable=True)  # bank, tech, government, etc.
+    domain: Mapped[str] = mapped_column(String(255), nullable=False, unique=True, index=True)
+    trust_level: Mapped[str] = mapped_column(String(20), nullable=False)  # high, medium, low
+    category: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)  # bank, tech, government, etc.
     
     # Source
-    source = Column(String(100), nullable=True)  # manual, imported, api
-    added_by = Column(String(100), nullable=True)
+    source: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)  # manual, imported, api
+    added_by: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
     
     # Status
-    is_active = Column(Boolean, default=True)
-    verified = Column(Boolean, default=False)
+    is_active: Mapped[Optional[bool]] = mapped_column(Boolean, default=True)
+    verified: Mapped[Optional[bool]] = mapped_column(Boolean, default=False)
     
     # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, server_default=func.now())
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime, server_default=func.now(), onupdate=func.now())
     
     def __repr__(self):
         return f"<TrustedDomainList(domain={self.domain}, trust_level={self.trust_level})>"
@@ -229,14 +230,34 @@ class TrustedDomainList(Base):
 
 # Additional indexes for common queries
 Index('ix_url_scans_created_domain', URLScan.created_at, URLScan.domain)
+Index('ix_url_scans_hash_expires', URLScan.url_hash, URLScan.cache_expires_at)
 Index('ix_scan_logs_created_phishing', ScanLog.created_at, ScanLog.is_phishing)
-Index('ix_feedback_created', UserFeedback.created_at)
 
 
 # =============================================================================
 # Database Connection
 # =============================================================================
 
+# Per-connection SQLite tuning: WAL journal, fewer fsyncs, larger page cache
+_SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-65536",
+)
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Apply SQLite pragmas to each new DBAPI connection"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in _SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
 class Database:
     """Database connection manager"""
     
@@ -246,16 +267,34 @@ class Database:
         self.async_session_factory = None
     
     async def connect(self):
-        """Create database connection"""
+        """Create database connection (once per process, after any worker fork)"""
+        if self.engine is not None:
+            return
+        
+        engine_kwargs = {}
+        if ":memory:" not in self.database_url:
+            # Explicit pool sizing; in-memory SQLite uses a static single-connection pool
+            engine_kwargs.update(
+                pool_size=settings.DB_POOL_SIZE,
+                max_overflow=settings.DB_MAX_OVERFLOW,
+                pool_pre_ping=True,
+                pool_recycle=settings.DB_POOL_RECYCLE,
+            )
+        
         self.engine = create_async_engine(
             self.database_url,
             echo=settings.DEBUG,
             future=True,
+            json_serializer=json_dumps_str,
+            json_deserializer=json_loads,
+            **engine_kwargs,
         )
         
-        self.async_session_factory = sessionmaker(
+        if self.engine.dialect.name == "sqlite":
+            event.listen(self.engine.sync_engine, "connect", _set_sqlite_pragmas)
+        
+        self.async_session_factory = async_sessionmaker(
             self.engine,
-            class_=AsyncSession,
             expire_on_commit=False,
         )
         
@@ -267,9 +306,11 @@ class Database:
         """Close database connection"""
         if self.engine:
             await self.engine.dispose()
+            self.engine = None
+            self.async_session_factory = None
     
-    async def get_session(self) -> AsyncSession:
-        """Get a new database session"""
+    async def get_session(self) -> AsyncIterator[AsyncSession]:
+        """Yield a new database session (usable directly as a FastAPI dependency)"""
         async with self.async_session_factory() as session:
             yield session
 
@@ -282,19 +323,33 @@ database = Database()
 # Helper Functions
 # =============================================================================
 
+import asyncio
 import hashlib
+from datetime import timedelta
+from functools import lru_cache
+from typing import Dict, List
+
+from cachetools import TTLCache
 
+_sha256 = hashlib.sha256
+
+# In-process layer over the DB scan cache, keyed by url_hash
+_scan_memory_cache: TTLCache = TTLCache(
+    maxsize=settings.SCAN_MEMORY_CACHE_SIZE,
+    ttl=settings.CACHE_TTL,
+)
+_scan_fetch_locks: Dict[str, asyncio.Lock] = {}
 
+
+@lru_cache(maxsize=16384)
 def get_url_hash(url: str) -> str:
     """Generate consistent hash for URL"""
-    return hashlib.sha256(url.encode()).hexdigest()
+    return _sha256(url.encode()).hexdigest()
 
 
-async def cache_scan_result(session: AsyncSession, prediction, url: str):
-    """Cache a scan result to database"""
-    url_hash = get_url_hash(url)
-    
-    scan = URLScan(
+def _build_url_scan(prediction, url: str, url_hash: str, cache_expires_at: datetime) -> URLScan:
+    """Build a URLScan row from an ensemble prediction"""
+    return URLScan(
         url=url,
         url_hash=url_hash,
         is_phishing=prediction.is_phishing,
@@ -311,24 +366,107 @@ async def cache_scan_result(session: AsyncSession, prediction, url: str):
         is_whitelisted=prediction.is_whitelisted,
         threshold_used=prediction.threshold,
         rule_flags=prediction.rule_flags,
+        cache_expires_at=cache_expires_at,
     )
+
+
+async def cache_scan_result(
+    session: AsyncSession,
+    prediction,
+    url: str,
+    url_hash: Optional[str] = None,
+):
+    """Cache a scan result to database (pass url_hash to reuse a computed hash)"""
+    if url_hash is None:
+        url_hash = get_url_hash(url)
+    
+    expires_at = datetime.utcnow() + timedelta(seconds=settings.CACHE_TTL)
+    scan = _build_url_scan(prediction, url, url_hash, expires_at)
     
     session.add(scan)
     await session.commit()
     
+    _scan_memory_cache[url_hash] = scan
+    
     return scan
 
 
-async def get_cached_scan(session: AsyncSession, url: str) -> Optional[URLScan]:
+async def cache_scan_results(
+    session: AsyncSession,
+    predictions: List,
+    urls: List[str],
+) -> List[URLScan]:
+    """Cache many scan results in a single transaction"""
+    expires_at = datetime.utcnow() + timedelta(seconds=settings.CACHE_TTL)
+    url_hashes = [get_url_hash(url) for url in urls]
+    scans = [
+        _build_url_scan(prediction, url, url_hash, expires_at)
+        for prediction, url, url_hash in zip(predictions, urls, url_hashes)
+    ]
+    
+    session.add_all(scans)
+    await session.commit()
+    
+    for url_hash, scan in zip(url_hashes, scans):
+        _scan_memory_cache[url_hash] = scan
+    
+    return scans
+
+
+async def get_cached_scan(
+    session: AsyncSession,
+    url: str,
+    url_hash: Optional[str] = None,
+) -> Optional[URLScan]:
     """Get cached scan result if exists and not expired"""
     from sqlalchemy import select
     
-    url_hash = get_url_hash(url)
-    
-    result = await session.execute(
-        select(URLScan)
-        .where(URLScan.url_hash == url_hash)
-        .where(URLScan.cache_expires_at > datetime.utcnow())
-    )
+    if url_hash is None:
+        url_hash = get_url_hash(url)
+    
+    scan = _get_memory_cached_scan(url_hash)
+    if scan is not None:
+        return scan
+    
+    # One DB fetch per URL at a time; concurrent callers reuse its result
+    lock = _scan_fetch_locks.setdefault(url_hash, asyncio.Lock())
+    try:
+        async with lock:
+            scan = _get_memory_cached_scan(url_hash)
+            if scan is not None:
+                return scan
+            
+            result = await session.execute(
+                select(URLScan)
+                .where(
+                    URLScan.url_hash == url_hash,
+                    URLScan.cache_expires_at > datetime.utcnow(),
+                )
+                .limit(1)
+            )
+            scan = result.scalars().first()
+            
+            if scan is not None:
+                _scan_memory_cache[url_hash] = scan
+            return scan
+    finally:
+        if not lock.locked() and _scan_fetch_locks.get(url_hash) is lock:
+            del _scan_fetch_locks[url_hash]
+
+
+def _get_memory_cached_scan(url_hash: str) -> Optional[URLScan]:
+    """In-process cached scan for a URL hash, if present and not expired"""
+    scan = _scan_memory_cache.get(url_hash)
+    if scan is None:
+        return None
+    
+    if scan.cache_expires_at is None or scan.cache_expires_at <= datetime.utcnow():
+        _scan_memory_cache.pop(url_hash, None)
+        return None
     
-    return result.scalar_one_or_none()
+    return scan
+
+
+def scan_memory_cache_clear():
+    """Drop the in-process layer over the DB scan cache (DB rows are kept)"""
+    _scan_memory_cache.clear()
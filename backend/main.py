@@ -3,16 +3,17 @@ Main FastAPI Application
 Phishing Detection Backend Server
 """
 
+import gc
 import sys
+import asyncio
 import time
-import os
 from pathlib import Path
 from contextlib import asynccontextmanager
 from datetime import datetime
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
 from loguru import logger
 
 # Add project root to path for imports
@@ -27,7 +28,15 @@ if str(backend_dir) not in sys.path:
 
 from config.settings import settings
 from api.routes import router as api_router
-from services.ensemble_predictor import get_ensemble_predictor
+from services.ensemble_predictor import get_ensemble_predictor, peek_ensemble_predictor
+from utils.json_utils import DefaultJSONResponse
+
+# Try to import Prometheus client (optional metrics export)
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, Counter, generate_latest
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
 
 
 # =============================================================================
@@ -43,12 +52,16 @@ def setup_logging():
         "<level>{message}</level>"
     )
     
+    # Sinks are enqueued so request handlers never block on log I/O
     logger.remove()  # Remove default handler
     logger.add(
         sys.stdout,
         format=log_format,
         level=settings.LOG_LEVEL,
         colorize=True,
+        enqueue=True,
+        backtrace=False,
+        diagnose=False,
     )
     
     # File logging
@@ -62,16 +75,49 @@ def setup_logging():
         rotation="10 MB",
         retention="7 days",
         compression="gz",
+        enqueue=True,
+        backtrace=False,
+        diagnose=False,
     )
 
 
 setup_logging()
 
+# Per-request debug lines are only formatted when a sink would emit them
+_LOG_REQUESTS = logger.level(settings.LOG_LEVEL.upper()).no <= logger.level("DEBUG").no
+
+# Under gunicorn --preload this runs once in the master, and workers inherit
+# the loaded weights through fork copy-on-write
+if settings.PRELOAD_MODELS:
+    get_ensemble_predictor()
+    
+    # Move everything allocated so far into the permanent GC generation so
+    # collections in the workers don't write to (and un-share) those pages
+    gc.freeze()
+
 
 # =============================================================================
 # Application Lifespan
 # =============================================================================
 
+def _configure_torch_threads():
+    """Split CPU cores between worker processes so PyTorch doesn't oversubscribe"""
+    import torch
+    
+    num_threads = settings.torch_num_threads
+    torch.set_num_threads(num_threads)
+    logger.info(f"PyTorch intra-op threads: {num_threads}")
+
+
+async def _warm_up_models(app: FastAPI):
+    """Load models off the event loop so the first request doesn't pay for it"""
+    try:
+        predictor = await asyncio.to_thread(get_ensemble_predictor)
+        app.state.models_loaded = predictor.is_loaded()
+    except Exception as e:
+        logger.error(f"Background model loading failed: {e}")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
@@ -87,11 +133,14 @@ async def lifespan(app: FastAPI):
     
     # Store startup time for stats
     app.state.startup_time = datetime.utcnow()
-    app.state.request_count = 0
+    app.state.startup_monotonic = time.monotonic()
     app.state.models_loaded = False
     
+    _configure_torch_threads()
+    
     # Load models in background (don't block startup)
-    logger.info("Models will be loaded on first request...")
+    logger.info("Loading models in background...")
+    app.state.model_loader = asyncio.create_task(_warm_up_models(app))
     
     logger.info("Server startup complete!")
     
@@ -99,6 +148,20 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down server...")
+    
+    # Stop waiting on a load still in progress (the loader thread finishes on its own)
+    model_loader = app.state.model_loader
+    if not model_loader.done():
+        model_loader.cancel()
+    try:
+        await model_loader
+    except asyncio.CancelledError:
+        pass
+    
+    # External API clients only exist if something imported the module
+    external = sys.modules.get("services.external_services")
+    if external is not None:
+        await external.external_services.aclose()
     logger.info("Cleanup complete. Goodbye!")
 
 
@@ -135,6 +198,7 @@ app = FastAPI(
     redoc_url="/redoc",
     openapi_url="/openapi.json",
     lifespan=lifespan,
+    default_response_class=DefaultJSONResponse,
 )
 
 
@@ -151,26 +215,74 @@ app.add_middleware(
     allow_headers=settings.CORS_ALLOW_HEADERS,
 )
 
+class StreamingAwareGZipMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware that leaves progressive streams uncompressed.
+    
+    Starlette's gzip responder writes streamed chunks into one GzipFile and
+    only flushes it when the response ends, which would hold back every line
+    of an NDJSON stream until the last URL finishes.
+    """
+    
+    def __init__(self, app, uncompressed_paths=(), **kwargs):
+        super().__init__(app, **kwargs)
+        self.uncompressed_paths = frozenset(uncompressed_paths)
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] in self.uncompressed_paths:
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+# Compress larger responses (batch scans benefit most)
+app.add_middleware(
+    StreamingAwareGZipMiddleware,
+    uncompressed_paths=("/api/v1/scan/batch/stream",),
+    minimum_size=settings.GZIP_MINIMUM_SIZE,
+    compresslevel=settings.GZIP_COMPRESS_LEVEL,
+)
+
+
+# Requests served since import (only updated on the event loop thread)
+_request_count = 0
+
+if PROMETHEUS_AVAILABLE:
+    REQUEST_COUNTER = Counter(
+        "http_requests_total",
+        "Total HTTP requests",
+        ["method", "path"],
+    )
+
+
+def _route_path(request: Request) -> str:
+    """Route template for metric labels (bounded, unlike raw request paths)"""
+    route = request.scope.get("route")
+    return getattr(route, "path", "unmatched")
+
 
 # Request timing middleware
 @app.middleware("http")
 async def add_process_time_header(request: Request, call_next):
     """Add processing time to response headers"""
-    start_time = time.time()
+    global _request_count
     
-    # Increment request count
-    if hasattr(app.state, 'request_count'):
-        app.state.request_count += 1
+    start_time = time.perf_counter()
+    _request_count += 1
     
     response = await call_next(request)
     
-    process_time = time.time() - start_time
+    process_time = time.perf_counter() - start_time
     response.headers["X-Process-Time"] = str(process_time)
     
+    if PROMETHEUS_AVAILABLE:
+        REQUEST_COUNTER.labels(request.method, _route_path(request)).inc()
+    
     # Log request
-    logger.debug(
-        f"{request.method} {request.url.path} - {response.status_code} - {process_time:.3f}s"
-    )
+    if _LOG_REQUESTS:
+        logger.debug(
+            f"{request.method} {request.url.path} - {response.status_code} - {process_time:.3f}s"
+        )
     
     return response
 
@@ -184,7 +296,7 @@ async def global_exception_handler(request: Request, exc: Exception):
     """Global exception handler"""
     logger.error(f"Unhandled exception: {exc}", exc_info=True)
     
-    return JSONResponse(
+    return DefaultJSONResponse(
         status_code=500,
         content={
             "error": "Internal server error",
@@ -220,8 +332,9 @@ async def root():
 async def health_check():
     """Quick health check endpoint"""
     try:
-        predictor = get_ensemble_predictor()
-        models_loaded = predictor.is_loaded()
+        # Never load (or wait on a load) from a status probe
+        predictor = peek_ensemble_predictor()
+        models_loaded = predictor is not None and predictor.is_loaded()
         return {
             "status": "healthy" if models_loaded else "degraded",
             "models_loaded": models_loaded,
@@ -244,16 +357,16 @@ async def health_check():
 async def readiness():
     """Readiness probe for orchestrators"""
     try:
-        predictor = get_ensemble_predictor()
-        if predictor.is_loaded():
+        predictor = peek_ensemble_predictor()
+        if predictor is not None and predictor.is_loaded():
             return {"status": "ready"}
         else:
-            return JSONResponse(
+            return DefaultJSONResponse(
                 status_code=503,
                 content={"status": "not ready", "reason": "models loading"}
             )
     except Exception as e:
-        return JSONResponse(
+        return DefaultJSONResponse(
             status_code=503,
             content={"status": "not ready", "reason": str(e)}
         )
@@ -271,19 +384,26 @@ async def liveness():
 async def stats():
     """Service statistics"""
     uptime = 0
-    if hasattr(app.state, 'startup_time'):
-        uptime = (datetime.utcnow() - app.state.startup_time).total_seconds()
-    
-    request_count = getattr(app.state, 'request_count', 0)
+    startup_monotonic = getattr(app.state, 'startup_monotonic', None)
+    if startup_monotonic is not None:
+        uptime = time.monotonic() - startup_monotonic
     
     return {
         "uptime_seconds": uptime,
-        "total_requests": request_count,
+        "total_requests": _request_count,
         "version": settings.APP_VERSION,
         "environment": settings.ENVIRONMENT,
     }
 
 
+if PROMETHEUS_AVAILABLE:
+    # Prometheus scrape endpoint
+    @app.get("/metrics", tags=["Health"], include_in_schema=False)
+    async def metrics():
+        """Prometheus metrics"""
+        return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 # =============================================================================
 # Entry Point
 # =============================================================================
@@ -291,11 +411,18 @@ async def stats():
 if __name__ == "__main__":
     import uvicorn
     
+    try:
+        import uvloop  # noqa: F401
+        loop = "uvloop"
+    except ImportError:
+        loop = "asyncio"
+    
     uvicorn.run(
         "main:app",
         host=settings.HOST,
         port=settings.PORT,
         reload=settings.DEBUG,
         workers=1 if settings.DEBUG else settings.WORKERS,
+        loop=loop,
         log_level=settings.LOG_LEVEL.lower(),
     )
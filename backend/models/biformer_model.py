@@ -4,6 +4,7 @@ Character-level URL model for phishing detection
 """
 
 import json
+import threading
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
@@ -13,6 +14,7 @@ import numpy as np
 from loguru import logger
 
 from config.settings import settings
+from models.prediction_cache import PredictionCache
 
 
 class BiformerURLEncoder(nn.Module):
@@ -108,7 +110,16 @@ class BiformerURLModel:
         
         self.model = None
         self.char2id = None
+        self._lut: Optional[np.ndarray] = None  # Latin-1 byte -> char id
         self._loaded = False
+        self._prediction_cache = PredictionCache(settings.MODEL_PREDICT_CACHE_SIZE)
+        self._pin_inputs = str(self.device).startswith('cuda') and torch.cuda.is_available()
+        
+        # Captured batch-of-1 CUDA graph (replay is serialized across threads)
+        self._graph = None
+        self._graph_input: Optional[torch.Tensor] = None
+        self._graph_output: Optional[torch.Tensor] = None
+        self._graph_lock = threading.Lock()
         
         logger.info(f"BiformerURLModel initialized (device: {self.device})")
     
@@ -124,6 +135,7 @@ class BiformerURLModel:
             logger.info(f"Loading char2id from {self.char2id_path}")
             with open(self.char2id_path, 'r') as f:
                 self.char2id = json.load(f)
+            self._lut = self._build_lut(self.char2id)
             
             vocab_size = len(self.char2id) + 1  # +1 for padding/unknown
             
@@ -153,7 +165,19 @@ class BiformerURLModel:
             self.model = self.model.to(self.device)
             self.model.eval()
             
+            # FP16 only pays off on GPU; CPU half-precision kernels are slow
+            if settings.USE_FP16 and str(self.device).startswith('cuda'):
+                self.model = self.model.half()
+            
+            if settings.TORCH_COMPILE:
+                self._compile_model()
+            elif settings.BIFORMER_TORCHSCRIPT:
+                self._script_model()
+            elif settings.BIFORMER_CUDA_GRAPH and self._pin_inputs:
+                self._capture_cuda_graph()
+            
             self._loaded = True
+            self._warm_up()
             logger.info(f"Biformer model loaded successfully on {self.device}")
             return True
             
@@ -165,6 +189,7 @@ class BiformerURLModel:
             try:
                 with open(self.char2id_path, 'r') as f:
                     self.char2id = json.load(f)
+                self._lut = self._build_lut(self.char2id)
                 
                 self.model = BiformerURLEncoder(
                     vocab_size=len(self.char2id) + 1,
@@ -184,6 +209,63 @@ class BiformerURLModel:
                 self._loaded = False
                 return False
     
+    def _compile_model(self):
+        """Compile the model with torch.compile and warm it up (falls back to eager)"""
+        try:
+            compiled = torch.compile(self.model, mode=settings.TORCH_COMPILE_MODE, dynamic=False)
+            
+            # Inputs are always padded to max_length, so this captures the serving shape
+            dummy = torch.zeros((1, self.max_length), dtype=torch.long, device=self.device)
+            with torch.inference_mode():
+                compiled(dummy)
+            
+            self.model = compiled
+            logger.info(f"Biformer model compiled (mode: {settings.TORCH_COMPILE_MODE})")
+        except Exception as e:
+            logger.warning(f"torch.compile failed for Biformer, using eager model: {e}")
+    
+    def _script_model(self):
+        """Script, freeze and optimize the model with TorchScript (falls back to eager)"""
+        try:
+            scripted = torch.jit.script(self.model)
+            scripted = torch.jit.freeze(scripted)
+            scripted = torch.jit.optimize_for_inference(scripted)
+            
+            # Warm up the fused graph at the padded serving shape
+            dummy = torch.zeros((1, self.max_length), dtype=torch.long, device=self.device)
+            with torch.inference_mode():
+                scripted(dummy)
+            
+            self.model = scripted
+            logger.info("Biformer model scripted and frozen")
+        except Exception as e:
+            logger.warning(f"TorchScript failed for Biformer, using eager model: {e}")
+    
+    def _capture_cuda_graph(self):
+        """Capture a CUDA graph of the batch-of-1 forward for replay in predict()"""
+        try:
+            static_input = torch.zeros((1, self.max_length), dtype=torch.long, device=self.device)
+            
+            # CUDA graphs need a few warm-up iterations on a side stream first
+            stream = torch.cuda.Stream()
+            stream.wait_stream(torch.cuda.current_stream())
+            with torch.cuda.stream(stream), torch.inference_mode():
+                for _ in range(3):
+                    self.model(static_input)
+            torch.cuda.current_stream().wait_stream(stream)
+            
+            graph = torch.cuda.CUDAGraph()
+            with torch.inference_mode(), torch.cuda.graph(graph):
+                static_output = self.model(static_input)
+            
+            self._graph = graph
+            self._graph_input = static_input
+            self._graph_output = static_output
+            logger.info("Biformer batch-of-1 CUDA graph captured")
+        except Exception as e:
+            logger.warning(f"CUDA graph capture failed for Biformer, using eager forward: {e}")
+            self._graph = None
+    
     def _infer_model_config(self, state_dict: Dict, vocab_size: int) -> Dict:
         """Infer model configuration from state dict shapes"""
         config = {
@@ -211,29 +293,85 @@ class BiformerURLModel:
         
         return config
     
+    def _to_device(self, tensor: torch.Tensor) -> torch.Tensor:
+        """Move an input tensor to the model device (pinned, async copy on CUDA)"""
+        if self._pin_inputs:
+            return tensor.pin_memory().to(self.device, non_blocking=True)
+        return tensor.to(self.device)
+    
+    def _warm_up(self):
+        """Run one dummy prediction so first-call setup costs are paid at load time"""
+        try:
+            self._predict_uncached("http://warmup.invalid")
+        except Exception as e:
+            logger.warning(f"Biformer warm-up failed: {e}")
+    
     def is_loaded(self) -> bool:
         """Check if model is loaded"""
         return self._loaded
     
-    def _encode_url(self, url: str) -> torch.Tensor:
-        """Convert URL to tensor of character indices"""
-        url = url.lower()[:self.max_length]
+    def cache_clear(self):
+        """Drop all cached predictions"""
+        self._prediction_cache.clear()
+    
+    @staticmethod
+    def _build_lut(char2id: Dict[str, int]) -> np.ndarray:
+        """Build a 256-entry int16 lookup table from Latin-1 bytes to ids (0 = unknown)"""
+        if max(char2id.values(), default=0) > np.iinfo(np.int16).max:
+            raise ValueError("char2id ids do not fit the int16 lookup table")
         
-        indices = []
-        for char in url:
-            idx = self.char2id.get(char, 0)  # 0 for unknown chars
-            indices.append(idx)
+        lut = np.zeros(256, dtype=np.int16)
+        for char, idx in char2id.items():
+            if len(char) == 1 and ord(char) < 256:
+                lut[ord(char)] = idx
+        return lut
+    
+    @staticmethod
+    def _latin1_bytes(url: str) -> Optional[np.ndarray]:
+        """View a URL as Latin-1 bytes, or None if it has wider characters"""
+        try:
+            return np.frombuffer(url.encode('latin-1'), dtype=np.uint8)
+        except UnicodeEncodeError:
+            return None
+    
+    def _encode_url_ids(self, url: str) -> np.ndarray:
+        """Convert URL to a padded array of character indices"""
+        url = url.lower()[:self.max_length]
+        ids = np.zeros(self.max_length, dtype=np.int64)
         
-        # Pad to max_length
-        while len(indices) < self.max_length:
-            indices.append(0)
+        url_bytes = self._latin1_bytes(url)
+        if url_bytes is not None:
+            # One C-level gather through the LUT instead of a per-char dict lookup
+            ids[:len(url)] = self._lut[url_bytes]
+        else:
+            get_id = self.char2id.get
+            ids[:len(url)] = [get_id(char, 0) for char in url]  # 0 for unknown chars
         
-        return torch.tensor(indices[:self.max_length], dtype=torch.long)
+        return ids
+    
+    def _encode_url(self, url: str) -> torch.Tensor:
+        """Convert URL to tensor of character indices"""
+        return torch.from_numpy(self._encode_url_ids(url))
     
     def _encode_batch(self, urls: List[str]) -> torch.Tensor:
-        """Encode a batch of URLs"""
-        encoded = [self._encode_url(url) for url in urls]
-        return torch.stack(encoded)
+        """Encode a batch of URLs with one LUT gather over the whole byte matrix"""
+        byte_matrix = np.zeros((len(urls), self.max_length), dtype=np.uint8)
+        wide = []
+        
+        for i, url in enumerate(urls):
+            url = url.lower()[:self.max_length]
+            url_bytes = self._latin1_bytes(url)
+            if url_bytes is not None:
+                byte_matrix[i, :len(url)] = url_bytes
+            else:
+                wide.append(i)
+        
+        # Byte 0 doubles as padding and maps to id 0; the embedding needs int64 ids
+        ids = self._lut[byte_matrix].astype(np.int64)
+        for i in wide:
+            ids[i] = self._encode_url_ids(urls[i])
+        
+        return torch.from_numpy(ids)
     
     def predict(self, url: str) -> Dict:
         """
@@ -248,25 +386,7 @@ class BiformerURLModel:
         if not self._loaded:
             raise RuntimeError("Model not loaded. Call load() first.")
         
-        # Encode URL
-        inputs = self._encode_url(url).unsqueeze(0).to(self.device)
-        
-        # Inference
-        with torch.no_grad():
-            logits = self.model(inputs)
-            probabilities = F.softmax(logits, dim=-1)
-        
-        # Extract results
-        probs = probabilities.cpu().numpy()[0]
-        predicted_class = int(np.argmax(probs))
-        
-        return {
-            'url': url,
-            'predicted_class': predicted_class,
-            'phishing_probability': float(probs[1]) if len(probs) > 1 else float(probs[0]),
-            'legitimate_probability': float(probs[0]),
-            'confidence': float(np.max(probs)),
-        }
+        return self._prediction_cache.predict(url, self._predict_uncached)
     
     def predict_batch(self, urls: List[str], batch_size: int = 32) -> List[Dict]:
         """
@@ -282,33 +402,80 @@ class BiformerURLModel:
         if not self._loaded:
             raise RuntimeError("Model not loaded. Call load() first.")
         
+        return self._prediction_cache.predict_batch(
+            urls, lambda missing: self._predict_batch_uncached(missing, batch_size)
+        )
+    
+    def _predict_uncached(self, url: str) -> Dict:
+        """Run inference for one URL, bypassing the prediction cache"""
+        if self._graph is not None:
+            # Replay the captured graph on the static input buffer
+            encoded = self._encode_url(url).unsqueeze(0).pin_memory()
+            with self._graph_lock, torch.inference_mode():
+                self._graph_input.copy_(encoded, non_blocking=True)
+                self._graph.replay()
+                probabilities = F.softmax(self._graph_output.float(), dim=-1)
+                probs = probabilities.cpu().numpy()[0]
+        else:
+            # Encode URL
+            inputs = self._to_device(self._encode_url(url).unsqueeze(0))
+            
+            # Inference
+            with torch.inference_mode():
+                logits = self.model(inputs)
+                probabilities = F.softmax(logits.float(), dim=-1)
+            
+            # Extract results
+            probs = probabilities.cpu().numpy()[0]
+        predicted_class = int(np.argmax(probs))
+        
+        return {
+            'url': url,
+            'predicted_class': predicted_class,
+            'phishing_probability': float(probs[1]) if len(probs) > 1 else float(probs[0]),
+            'legitimate_probability': float(probs[0]),
+            'confidence': float(np.max(probs)),
+        }
+    
+    def _predict_batch_uncached(self, urls: List[str], batch_size: int = 32) -> List[Dict]:
+        """Run inference for a batch of URLs, bypassing the prediction cache"""
         results = []
         
         for i in range(0, len(urls), batch_size):
             batch_urls = urls[i:i + batch_size]
             
             # Encode batch
-            inputs = self._encode_batch(batch_urls).to(self.device)
+            inputs = self._to_device(self._encode_batch(batch_urls))
             
             # Inference
-            with torch.no_grad():
+            with torch.inference_mode():
                 logits = self.model(inputs)
-                probabilities = F.softmax(logits, dim=-1)
+                probabilities = F.softmax(logits.float(), dim=-1)
             
             # Process results
             probs_batch = probabilities.cpu().numpy()
             
-            for j, url in enumerate(batch_urls):
-                probs = probs_batch[j]
-                predicted_class = int(np.argmax(probs))
-                
-                results.append({
+            # Vectorized per-row fields, converted to Python once per column
+            predicted_classes = probs_batch.argmax(axis=1)
+            confidences = probs_batch.max(axis=1)
+            phishing = probs_batch[:, 1] if probs_batch.shape[1] > 1 else probs_batch[:, 0]
+            
+            results.extend(
+                {
                     'url': url,
                     'predicted_class': predicted_class,
-                    'phishing_probability': float(probs[1]) if len(probs) > 1 else float(probs[0]),
-                    'legitimate_probability': float(probs[0]),
-                    'confidence': float(np.max(probs)),
-                })
+                    'phishing_probability': phishing_probability,
+                    'legitimate_probability': legitimate_probability,
+                    'confidence': confidence,
+                }
+                for url, predicted_class, phishing_probability, legitimate_probability, confidence in zip(
+                    batch_urls,
+                    predicted_classes.tolist(),
+                    phishing.tolist(),
+                    probs_batch[:, 0].tolist(),
+                    confidences.tolist(),
+                )
+            )
         
         return results
     
@@ -325,16 +492,22 @@ class BiformerURLModel:
 
 # Model instance (lazy loaded)
 _biformer_model: Optional[BiformerURLModel] = None
+_biformer_model_lock = threading.Lock()
 
 
 def get_biformer_model() -> BiformerURLModel:
     """Get or create the Biformer model instance"""
     global _biformer_model
     
-    if _biformer_model is None:
-        _biformer_model = BiformerURLModel()
+    if _biformer_model is not None and _biformer_model.is_loaded():
+        return _biformer_model
     
-    if not _biformer_model.is_loaded():
-        _biformer_model.load()
+    # Only one thread creates/loads the model; others wait and reuse it
+    with _biformer_model_lock:
+        if _biformer_model is None:
+            _biformer_model = BiformerURLModel()
+        
+        if not _biformer_model.is_loaded():
+            _biformer_model.load()
     
     return _biformer_model
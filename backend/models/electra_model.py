@@ -3,6 +3,9 @@ Electra URL Model Loader
 Loads and runs inference on the fine-tuned ELECTRA model for URL classification
 """
 
+import hashlib
+import os
+import threading
 import torch
 import torch.nn.functional as F
 from typing import List, Dict, Optional, Tuple
@@ -10,6 +13,16 @@ from pathlib import Path
 import numpy as np
 from loguru import logger
 
+# Let the Rust tokenizer parallelize batched encodes (must be set before import)
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "true")
+
+# Try to import ONNX Runtime (optional CPU inference backend)
+try:
+    import onnxruntime as ort
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+
 from transformers import (
     ElectraForSequenceClassification,
     ElectraTokenizer,
@@ -18,6 +31,7 @@ from transformers import (
 )
 
 from config.settings import settings
+from models.prediction_cache import PredictionCache
 
 
 class ElectraURLModel:
@@ -53,6 +67,13 @@ class ElectraURLModel:
         self.model = None
         self.tokenizer = None
         self._loaded = False
+        self._prediction_cache = PredictionCache(settings.MODEL_PREDICT_CACHE_SIZE)
+        self._pin_inputs = str(self.device).startswith('cuda') and torch.cuda.is_available()
+        self._ort_session = None  # ONNX Runtime session when serving via ORT on CPU
+        self._ort_input_names = frozenset()
+        
+        # Pad each batch to its longest URL; coarser buckets bound torch.compile graphs
+        self._pad_multiple = 64 if settings.TORCH_COMPILE else 8
         
         logger.info(f"ElectraURLModel initialized (device: {self.device})")
     
@@ -70,19 +91,32 @@ class ElectraURLModel:
             self.tokenizer = AutoTokenizer.from_pretrained(
                 str(self.model_path),
                 local_files_only=True,
+                use_fast=True,
             )
+            if not self.tokenizer.is_fast:
+                logger.warning("No fast tokenizer available for ELECTRA; batched tokenization will be slow")
             
-            # Load model
-            self.model = AutoModelForSequenceClassification.from_pretrained(
-                str(self.model_path),
-                local_files_only=True,
-            )
+            # Load model with fused SDPA attention (falls back where unsupported)
+            self.model = self._load_model()
             
             # Move to device
             self.model = self.model.to(self.device)
             self.model.eval()
             
+            # FP16 only pays off on GPU; CPU half-precision kernels are slow
+            if settings.USE_FP16 and str(self.device).startswith('cuda'):
+                self.model = self.model.half()
+            
+            if settings.ELECTRA_ONNX_CPU and self.device == 'cpu':
+                self._load_onnx_session()
+            else:
+                if settings.ELECTRA_QUANTIZE_CPU and self.device == 'cpu':
+                    self._quantize_model()
+                if settings.TORCH_COMPILE:
+                    self._compile_model()
+            
             self._loaded = True
+            self._warm_up()
             logger.info(f"ELECTRA model loaded successfully on {self.device}")
             return True
             
@@ -91,10 +125,204 @@ class ElectraURLModel:
             self._loaded = False
             return False
     
+    def _load_model(self):
+        """Load the classifier, preferring PyTorch SDPA attention"""
+        load_kwargs = {'local_files_only': True}
+        if settings.USE_FP16 and str(self.device).startswith('cuda'):
+            load_kwargs['torch_dtype'] = torch.float16
+        
+        try:
+            return AutoModelForSequenceClassification.from_pretrained(
+                str(self.model_path),
+                attn_implementation="sdpa",
+                **load_kwargs,
+            )
+        except (ValueError, ImportError) as e:
+            logger.warning(f"SDPA attention unavailable for ELECTRA, using default: {e}")
+            return AutoModelForSequenceClassification.from_pretrained(
+                str(self.model_path),
+                **load_kwargs,
+            )
+    
+    def _load_onnx_session(self):
+        """Export the model to ONNX once and serve it with ONNX Runtime (falls back to PyTorch)"""
+        if not ONNXRUNTIME_AVAILABLE:
+            logger.warning("ELECTRA_ONNX_CPU is set but onnxruntime is not installed; using PyTorch")
+            return
+        
+        onnx_path = self._onnx_export_path()
+        try:
+            if not onnx_path.exists():
+                logger.info(f"Exporting ELECTRA model to ONNX at {onnx_path}")
+                dummy = self.tokenizer("http://warmup.invalid", return_tensors='pt')
+                onnx_path.parent.mkdir(parents=True, exist_ok=True)
+                self._write_atomically(onnx_path, lambda tmp_path: torch.onnx.export(
+                    self.model,
+                    (dummy['input_ids'], dummy['attention_mask']),
+                    str(tmp_path),
+                    input_names=['input_ids', 'attention_mask'],
+                    output_names=['logits'],
+                    dynamic_axes={
+                        'input_ids': {0: 'batch', 1: 'sequence'},
+                        'attention_mask': {0: 'batch', 1: 'sequence'},
+                        'logits': {0: 'batch'},
+                    },
+                    opset_version=17,
+                ))
+            
+            if settings.ELECTRA_QUANTIZE_CPU:
+                onnx_path = self._quantize_onnx_model(onnx_path)
+            
+            # Same per-worker core split as PyTorch (see main._configure_torch_threads)
+            session_options = ort.SessionOptions()
+            session_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            session_options.intra_op_num_threads = settings.torch_num_threads
+            
+            self._ort_session = ort.InferenceSession(
+                str(onnx_path),
+                sess_options=session_options,
+                providers=['CPUExecutionProvider'],
+            )
+            self._ort_input_names = frozenset(i.name for i in self._ort_session.get_inputs())
+            logger.info(f"ELECTRA model served through ONNX Runtime ({onnx_path.name})")
+        except Exception as e:
+            logger.warning(f"ONNX Runtime setup failed for ELECTRA, using PyTorch: {e}")
+            self._ort_session = None
+    
+    def _onnx_export_path(self) -> Path:
+        """
+        ONNX export path keyed on the checkpoint it is exported from.
+        
+        Returns:
+            ELECTRA_ONNX_PATH with a fingerprint of the weight files' names,
+            sizes and modification times inserted before the suffix
+        """
+        base_path = Path(settings.electra_onnx_full_path)
+        fingerprint = hashlib.sha256()
+        for pattern in ("*.safetensors", "*.bin"):
+            for weights in sorted(Path(self.model_path).glob(pattern)):
+                stat = weights.stat()
+                fingerprint.update(f"{weights.name}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+        return base_path.with_name(f"{base_path.stem}.{fingerprint.hexdigest()[:12]}{base_path.suffix}")
+    
+    @staticmethod
+    def _write_atomically(path: Path, write) -> None:
+        """
+        Write a file through a temporary sibling and move it into place.
+        
+        Concurrent workers or a crash mid-write never leave a partial file
+        at path; the last complete write wins.
+        
+        Args:
+            path: Final file path
+            write: Callable writing the file to the temporary path it is given
+        """
+        tmp_path = path.with_name(f"{path.stem}.{os.getpid()}.tmp{path.suffix}")
+        try:
+            write(tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+    
+    def _quantize_onnx_model(self, onnx_path: Path) -> Path:
+        """
+        Write an int8 dynamically quantized copy of the ONNX export (once).
+        
+        Args:
+            onnx_path: FP32 ONNX model
+            
+        Returns:
+            Path of the int8 model, or onnx_path if quantization fails
+        """
+        int8_path = onnx_path.with_name(f"{onnx_path.stem}.int8{onnx_path.suffix}")
+        if int8_path.exists():
+            return int8_path
+        
+        try:
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+            
+            logger.info(f"Quantizing ELECTRA ONNX model to int8 at {int8_path}")
+            self._write_atomically(int8_path, lambda tmp_path: quantize_dynamic(
+                str(onnx_path), str(tmp_path), weight_type=QuantType.QInt8
+            ))
+            return int8_path
+        except Exception as e:
+            logger.warning(f"ONNX int8 quantization failed for ELECTRA, using FP32: {e}")
+            return onnx_path
+    
+    def _quantize_model(self):
+        """Swap Linear layers for int8 dynamically quantized kernels (CPU only)"""
+        try:
+            self.model = torch.ao.quantization.quantize_dynamic(
+                self.model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+            logger.info("ELECTRA Linear layers quantized to int8")
+        except Exception as e:
+            logger.warning(f"Dynamic quantization failed for ELECTRA, using FP32: {e}")
+    
+    def _compile_model(self):
+        """Compile the model with torch.compile and warm it up (falls back to eager)"""
+        try:
+            # Serving pads to the longest URL, rounded up to _pad_multiple, so batch
+            # and sequence sizes vary; compile them as symbolic dimensions
+            compiled = torch.compile(self.model, mode=settings.TORCH_COMPILE_MODE, dynamic=True)
+            
+            # Dynamo specializes size-1 dimensions: warm the single-URL graph and
+            # the general batched graph so neither compiles on the request path
+            for batch_size, length in ((1, self._pad_multiple), (2, 2 * self._pad_multiple)):
+                inputs = self.tokenizer(
+                    [""] * batch_size,
+                    max_length=min(length, self.max_length),
+                    truncation=True,
+                    padding='max_length',
+                    return_tensors='pt',
+                )
+                inputs = {k: v.to(self.device) for k, v in inputs.items()}
+                with torch.inference_mode():
+                    compiled(**inputs)
+            
+            self.model = compiled
+            logger.info(f"ELECTRA model compiled (mode: {settings.TORCH_COMPILE_MODE})")
+        except Exception as e:
+            logger.warning(f"torch.compile failed for ELECTRA, using eager model: {e}")
+    
+    def _to_device(self, tensor: torch.Tensor) -> torch.Tensor:
+        """Move an input tensor to the model device (pinned, async copy on CUDA)"""
+        if self._pin_inputs:
+            return tensor.pin_memory().to(self.device, non_blocking=True)
+        return tensor.to(self.device)
+    
+    def _predict_probabilities(self, inputs: Dict[str, torch.Tensor]) -> np.ndarray:
+        """Run the classifier on tokenized inputs and return class probabilities"""
+        if self._ort_session is not None:
+            feed = {k: v.numpy() for k, v in inputs.items() if k in self._ort_input_names}
+            logits = torch.from_numpy(self._ort_session.run(['logits'], feed)[0])
+        else:
+            # Move to device
+            inputs = {k: self._to_device(v) for k, v in inputs.items()}
+            
+            # Inference
+            with torch.inference_mode():
+                logits = self.model(**inputs).logits
+        
+        return F.softmax(logits.float(), dim=-1).cpu().numpy()
+    
+    def _warm_up(self):
+        """Run one dummy prediction so first-call setup costs are paid at load time"""
+        try:
+            self._predict_uncached("http://warmup.invalid")
+        except Exception as e:
+            logger.warning(f"ELECTRA warm-up failed: {e}")
+    
     def is_loaded(self) -> bool:
         """Check if model is loaded"""
         return self._loaded
     
+    def cache_clear(self):
+        """Drop all cached predictions"""
+        self._prediction_cache.clear()
+    
     def predict(self, url: str) -> Dict:
         """
         Predict phishing probability for a single URL.
@@ -108,26 +336,40 @@ class ElectraURLModel:
         if not self._loaded:
             raise RuntimeError("Model not loaded. Call load() first.")
         
+        return self._prediction_cache.predict(url, self._predict_uncached)
+    
+    def predict_batch(self, urls: List[str], batch_size: int = 32) -> List[Dict]:
+        """
+        Predict phishing probability for a batch of URLs.
+        
+        Args:
+            urls: List of URLs to classify
+            batch_size: Batch size for inference
+            
+        Returns:
+            List of prediction dictionaries
+        """
+        if not self._loaded:
+            raise RuntimeError("Model not loaded. Call load() first.")
+        
+        return self._prediction_cache.predict_batch(
+            urls, lambda missing: self._predict_batch_uncached(missing, batch_size)
+        )
+    
+    def _predict_uncached(self, url: str) -> Dict:
+        """Run inference for one URL, bypassing the prediction cache"""
         # Tokenize
         inputs = self.tokenizer(
             url,
             max_length=self.max_length,
             truncation=True,
-            padding='max_length',
+            padding='longest',
+            pad_to_multiple_of=self._pad_multiple,
             return_tensors='pt',
         )
         
-        # Move to device
-        inputs = {k: v.to(self.device) for k, v in inputs.items()}
-        
         # Inference
-        with torch.no_grad():
-            outputs = self.model(**inputs)
-            logits = outputs.logits
-            probabilities = F.softmax(logits, dim=-1)
-        
-        # Extract results
-        probs = probabilities.cpu().numpy()[0]
+        probs = self._predict_probabilities(inputs)[0]
         predicted_class = int(np.argmax(probs))
         
         return {
@@ -138,20 +380,8 @@ class ElectraURLModel:
             'confidence': float(np.max(probs)),
         }
     
-    def predict_batch(self, urls: List[str], batch_size: int = 32) -> List[Dict]:
-        """
-        Predict phishing probability for a batch of URLs.
-        
-        Args:
-            urls: List of URLs to classify
-            batch_size: Batch size for inference
-            
-        Returns:
-            List of prediction dictionaries
-        """
-        if not self._loaded:
-            raise RuntimeError("Model not loaded. Call load() first.")
-        
+    def _predict_batch_uncached(self, urls: List[str], batch_size: int = 32) -> List[Dict]:
+        """Run inference for a batch of URLs, bypassing the prediction cache"""
         results = []
         
         for i in range(0, len(urls), batch_size):
@@ -162,33 +392,35 @@ class ElectraURLModel:
                 batch_urls,
                 max_length=self.max_length,
                 truncation=True,
-                padding='max_length',
+                padding='longest',
+                pad_to_multiple_of=self._pad_multiple,
                 return_tensors='pt',
             )
             
-            # Move to device
-            inputs = {k: v.to(self.device) for k, v in inputs.items()}
-            
             # Inference
-            with torch.no_grad():
-                outputs = self.model(**inputs)
-                logits = outputs.logits
-                probabilities = F.softmax(logits, dim=-1)
-            
-            # Process results
-            probs_batch = probabilities.cpu().numpy()
-            
-            for j, url in enumerate(batch_urls):
-                probs = probs_batch[j]
-                predicted_class = int(np.argmax(probs))
-                
-                results.append({
+            probs_batch = self._predict_probabilities(inputs)
+            
+            # Vectorized per-row fields, converted to Python once per column
+            predicted_classes = probs_batch.argmax(axis=1)
+            confidences = probs_batch.max(axis=1)
+            phishing = probs_batch[:, 1] if probs_batch.shape[1] > 1 else probs_batch[:, 0]
+            
+            results.extend(
+                {
                     'url': url,
                     'predicted_class': predicted_class,
-                    'phishing_probability': float(probs[1]) if len(probs) > 1 else float(probs[0]),
-                    'legitimate_probability': float(probs[0]),
-                    'confidence': float(np.max(probs)),
-                })
+                    'phishing_probability': phishing_probability,
+                    'legitimate_probability': legitimate_probability,
+                    'confidence': confidence,
+                }
+                for url, predicted_class, phishing_probability, legitimate_probability, confidence in zip(
+                    batch_urls,
+                    predicted_classes.tolist(),
+                    phishing.tolist(),
+                    probs_batch[:, 0].tolist(),
+                    confidences.tolist(),
+                )
+            )
         
         return results
     
@@ -221,16 +453,22 @@ class ElectraURLModel:
 
 # Model instance (lazy loaded)
 _electra_model: Optional[ElectraURLModel] = None
+_electra_model_lock = threading.Lock()
 
 
 def get_electra_model() -> ElectraURLModel:
     """Get or create the ELECTRA model instance"""
     global _electra_model
     
-    if _electra_model is None:
-        _electra_model = ElectraURLModel()
+    if _electra_model is not None and _electra_model.is_loaded():
+        return _electra_model
     
-    if not _electra_model.is_loaded():
-        _electra_model.load()
+    # Only one thread creates/loads the model; others wait and reuse it
+    with _electra_model_lock:
+        if _electra_model is None:
+            _electra_model = ElectraURLModel()
+        
+        if not _electra_model.is_loaded():
+            _electra_model.load()
     
     return _electra_model
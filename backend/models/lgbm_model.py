@@ -3,6 +3,7 @@ LightGBM Model Loader
 Loads the LightGBM model for URL feature-based classification
 """
 
+import threading
 import numpy as np
 from typing import List, Dict, Optional
 from pathlib import Path
@@ -11,7 +12,8 @@ from loguru import logger
 import lightgbm as lgb
 
 from config.settings import settings
-from services.feature_extractor import url_feature_extractor
+from models.prediction_cache import PredictionCache
+from services.feature_extractor import url_feature_extractor, URLFeatures
 
 
 class LGBMURLModel:
@@ -35,6 +37,15 @@ class LGBMURLModel:
         self.model_path = model_path or settings.lgbm_model_full_path
         self.model = None
         self._loaded = False
+        self._prediction_cache = PredictionCache(settings.MODEL_PREDICT_CACHE_SIZE)
+        
+        # Booster.predict options: raw margins (sigmoid applied once by us),
+        # fixed thread count (predictions run concurrently from executor threads)
+        self._predict_kwargs = {
+            'raw_score': True,
+            'num_threads': settings.LGBM_NUM_THREADS,
+            'predict_disable_shape_check': True,
+        }
         
         logger.info(f"LGBMURLModel initialized")
     
@@ -52,6 +63,7 @@ class LGBMURLModel:
             self.model = lgb.Booster(model_file=str(self.model_path))
             
             self._loaded = True
+            self._warm_up()
             logger.info("LightGBM model loaded successfully")
             return True
             
@@ -60,10 +72,22 @@ class LGBMURLModel:
             self._loaded = False
             return False
     
+    def _warm_up(self):
+        """Run one dummy prediction so first-call setup costs are paid at load time"""
+        try:
+            dummy = np.zeros((1, self.model.num_feature()), dtype=np.float64)
+            self.model.predict(dummy, **self._predict_kwargs)
+        except Exception as e:
+            logger.warning(f"LightGBM warm-up failed: {e}")
+    
     def is_loaded(self) -> bool:
         """Check if model is loaded"""
         return self._loaded
     
+    def cache_clear(self):
+        """Drop all cached predictions"""
+        self._prediction_cache.clear()
+    
     def predict(self, url: str) -> Dict:
         """
         Predict phishing probability for a single URL.
@@ -77,24 +101,7 @@ class LGBMURLModel:
         if not self._loaded:
             raise RuntimeError("Model not loaded. Call load() first.")
         
-        # Extract features
-        features = url_feature_extractor.extract_lgbm_features(url)
-        features_array = np.array([features])
-        
-        # Predict (LightGBM returns raw scores, apply sigmoid for probability)
-        raw_score = self.model.predict(features_array)[0]
-        probability = 1 / (1 + np.exp(-raw_score))  # Sigmoid
-        
-        predicted_class = 1 if probability > 0.5 else 0
-        
-        return {
-            'url': url,
-            'predicted_class': predicted_class,
-            'phishing_probability': float(probability),
-            'legitimate_probability': float(1 - probability),
-            'confidence': float(max(probability, 1 - probability)),
-            'raw_score': float(raw_score),
-        }
+        return self._prediction_cache.predict(url, self._predict_uncached)
     
     def predict_batch(self, urls: List[str]) -> List[Dict]:
         """
@@ -109,27 +116,110 @@ class LGBMURLModel:
         if not self._loaded:
             raise RuntimeError("Model not loaded. Call load() first.")
         
-        # Extract features for all URLs
-        features_list = url_feature_extractor.extract_batch_lgbm_features(urls)
-        features_array = np.array(features_list)
+        return self._prediction_cache.predict_batch(urls, self._predict_batch_uncached)
+    
+    def predict_features(self, url: str, features: URLFeatures) -> Dict:
+        """
+        Predict from features the caller already extracted for the URL.
         
-        # Predict
-        raw_scores = self.model.predict(features_array)
-        probabilities = 1 / (1 + np.exp(-raw_scores))  # Sigmoid
+        Args:
+            url: URL the features belong to (prediction cache key)
+            features: Output of url_feature_extractor.extract_features(url)
+            
+        Returns:
+            Dictionary with prediction results
+        """
+        if not self._loaded:
+            raise RuntimeError("Model not loaded. Call load() first.")
         
-        results = []
-        for i, url in enumerate(urls):
-            prob = probabilities[i]
-            predicted_class = 1 if prob > 0.5 else 0
+        return self._prediction_cache.predict(
+            url, lambda u: self._predict_row(u, url_feature_extractor.lgbm_row(features))
+        )
+    
+    def predict_batch_features(self, urls: List[str], features: List[URLFeatures]) -> List[Dict]:
+        """
+        Batch counterpart of predict_features.
+        
+        Args:
+            urls: URLs to classify
+            features: Extracted features, one per URL
             
-            results.append({
+        Returns:
+            List of prediction dictionaries
+        """
+        if not self._loaded:
+            raise RuntimeError("Model not loaded. Call load() first.")
+        
+        features_by_url = dict(zip(urls, features))
+        
+        def compute(missing: List[str]) -> List[Dict]:
+            rows = np.array(
+                [url_feature_extractor.lgbm_row(features_by_url[url]) for url in missing],
+                dtype=np.float64,
+            )
+            return self._predict_rows(missing, rows)
+        
+        return self._prediction_cache.predict_batch(urls, compute)
+    
+    def _predict_uncached(self, url: str) -> Dict:
+        """Run inference for one URL, bypassing the prediction cache"""
+        return self._predict_row(url, url_feature_extractor.extract_lgbm_features(url))
+    
+    def _predict_row(self, url: str, features: List[float]) -> Dict:
+        """Run inference on one packed feature row"""
+        # Features as a (1, n_features) array
+        features_array = np.asarray(features, dtype=np.float64).reshape(1, -1)
+        
+        # Predict raw margins; the binary objective's sigmoid is applied once here
+        raw_score = self.model.predict(features_array, **self._predict_kwargs)[0]
+        probability = 1 / (1 + np.exp(-raw_score))  # Sigmoid
+        
+        predicted_class = 1 if probability > 0.5 else 0
+        
+        return {
+            'url': url,
+            'predicted_class': predicted_class,
+            'phishing_probability': float(probability),
+            'legitimate_probability': float(1 - probability),
+            'confidence': float(max(probability, 1 - probability)),
+            'raw_score': float(raw_score),
+        }
+    
+    def _predict_batch_uncached(self, urls: List[str]) -> List[Dict]:
+        """Run inference for a batch of URLs, bypassing the prediction cache"""
+        # Extract features for all URLs (character columns vectorized)
+        features_array = url_feature_extractor.extract_batch_lgbm_features_vec(urls)
+        return self._predict_rows(urls, features_array)
+    
+    def _predict_rows(self, urls: List[str], features_array: np.ndarray) -> List[Dict]:
+        """Run inference on a (len(urls), n_features) feature matrix"""
+        # Predict raw margins
+        raw_scores = self.model.predict(features_array, **self._predict_kwargs)
+        probabilities = 1 / (1 + np.exp(-raw_scores))  # Sigmoid
+        
+        # Derive every column vectorized, then cross into Python once per column
+        legitimate = 1 - probabilities
+        predicted_classes = (probabilities > 0.5).astype(np.int8)
+        confidences = np.maximum(probabilities, legitimate)
+        
+        results = [
+            {
                 'url': url,
                 'predicted_class': predicted_class,
-                'phishing_probability': float(prob),
-                'legitimate_probability': float(1 - prob),
-                'confidence': float(max(prob, 1 - prob)),
-                'raw_score': float(raw_scores[i]),
-            })
+                'phishing_probability': prob,
+                'legitimate_probability': legit,
+                'confidence': confidence,
+                'raw_score': raw_score,
+            }
+            for url, predicted_class, prob, legit, confidence, raw_score in zip(
+                urls,
+                predicted_classes.tolist(),
+                probabilities.tolist(),
+                legitimate.tolist(),
+                confidences.tolist(),
+                raw_scores.tolist(),
+            )
+        ]
         
         return results
     
@@ -142,20 +232,39 @@ class LGBMURLModel:
         """Get phishing probabilities for a batch of URLs"""
         results = self.predict_batch(urls)
         return [r['phishing_probability'] for r in results]
+    
+    def get_phishing_probability_from_features(self, url: str, features: URLFeatures) -> float:
+        """Get just the phishing probability from already-extracted features"""
+        return self.predict_features(url, features)['phishing_probability']
+    
+    def get_batch_phishing_probabilities_from_features(
+        self,
+        urls: List[str],
+        features: List[URLFeatures],
+    ) -> List[float]:
+        """Get phishing probabilities for a batch from already-extracted features"""
+        results = self.predict_batch_features(urls, features)
+        return [r['phishing_probability'] for r in results]
 
 
 # Model instance (lazy loaded)
 _lgbm_model: Optional[LGBMURLModel] = None
+_lgbm_model_lock = threading.Lock()
 
 
 def get_lgbm_model() -> LGBMURLModel:
     """Get or create the LightGBM model instance"""
     global _lgbm_model
     
-    if _lgbm_model is None:
-        _lgbm_model = LGBMURLModel()
+    if _lgbm_model is not None and _lgbm_model.is_loaded():
+        return _lgbm_model
     
-    if not _lgbm_model.is_loaded():
-        _lgbm_model.load()
+    # Only one thread creates/loads the model; others wait and reuse it
+    with _lgbm_model_lock:
+        if _lgbm_model is None:
+            _lgbm_model = LGBMURLModel()
+        
+        if not _lgbm_model.is_loaded():
+            _lgbm_model.load()
     
     return _lgbm_model
@@ -0,0 +1,87 @@
+"""
+Prediction Cache
+Thread-safe LRU cache of per-URL model predictions
+"""
+
+import threading
+from typing import Callable, Dict, List, Optional
+
+from cachetools import LRUCache
+
+
+class PredictionCache:
+    """
+    LRU cache of prediction dicts keyed by URL.
+    
+    Models are called from several executor threads, so every cache access
+    is guarded by a lock. Cached dicts are copied on the way out so callers
+    can never mutate a shared entry.
+    """
+    
+    def __init__(self, maxsize: int):
+        """
+        Initialize the cache.
+        
+        Args:
+            maxsize: Maximum number of URLs to keep (0 disables caching)
+        """
+        self._cache: Optional[LRUCache] = LRUCache(maxsize=maxsize) if maxsize > 0 else None
+        self._lock = threading.Lock()
+    
+    def predict(self, url: str, compute: Callable[[str], Dict]) -> Dict:
+        """
+        Return the cached prediction for a URL, computing it on a miss.
+        
+        Args:
+            url: URL to look up
+            compute: Uncached single-URL predictor
+        
+        Returns:
+            Prediction dictionary
+        """
+        if self._cache is None:
+            return compute(url)
+        
+        with self._lock:
+            cached = self._cache.get(url)
+        if cached is not None:
+            return dict(cached)
+        
+        result = compute(url)
+        with self._lock:
+            self._cache[url] = result
+        return dict(result)
+    
+    def predict_batch(self, urls: List[str], compute: Callable[[List[str]], List[Dict]]) -> List[Dict]:
+        """
+        Return predictions for many URLs, running inference only on misses.
+        
+        Args:
+            urls: URLs to look up (order is preserved)
+            compute: Uncached batch predictor
+        
+        Returns:
+            List of prediction dictionaries, one per input URL
+        """
+        if self._cache is None:
+            return compute(urls)
+        
+        with self._lock:
+            found = {url: self._cache.get(url) for url in urls}
+        
+        # Each distinct miss is computed once, even if repeated in the batch
+        missing = [url for url, cached in found.items() if cached is None]
+        if missing:
+            computed = compute(missing)
+            with self._lock:
+                for url, result in zip(missing, computed):
+                    self._cache[url] = result
+                    found[url] = result
+        
+        return [dict(found[url]) for url in urls]
+    
+    def clear(self):
+        """Drop every cached prediction"""
+        if self._cache is not None:
+            with self._lock:
+                self._cache.clear()
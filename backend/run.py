@@ -15,6 +15,44 @@ sys.path.insert(0, str(project_root))
 import uvicorn
 from config.settings import settings
 
+# uvloop/httptools ship with uvicorn[standard]; uvloop is not available on Windows
+try:
+    import uvloop  # noqa: F401
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
+
+try:
+    import httptools  # noqa: F401
+    HTTPTOOLS_AVAILABLE = True
+except ImportError:
+    HTTPTOOLS_AVAILABLE = False
+
+# gunicorn is optional (Unix only) and used for preloaded multi-worker runs
+try:
+    import gunicorn  # noqa: F401
+    GUNICORN_AVAILABLE = True
+except ImportError:
+    GUNICORN_AVAILABLE = False
+
+
+def run_gunicorn(workers: int):
+    """Replace this process with gunicorn running uvicorn workers on a preloaded app"""
+    # Load models in the gunicorn master so forked workers share the pages
+    os.environ.setdefault("PRELOAD_MODELS", "true")
+    
+    argv = [
+        "gunicorn",
+        "backend.main:app",
+        "--worker-class", "uvicorn.workers.UvicornWorker",
+        "--workers", str(workers),
+        "--bind", f"{settings.HOST}:{settings.PORT}",
+        "--chdir", str(project_root),
+        "--log-level", settings.LOG_LEVEL.lower(),
+        "--preload",
+    ]
+    os.execvp(argv[0], argv)
+
 
 def main():
     """Run the FastAPI server"""
@@ -25,17 +63,30 @@ def main():
     print(f"Host: {settings.HOST}")
     print(f"Port: {settings.PORT}")
     print(f"Debug: {settings.DEBUG}")
+    
+    loop = "uvloop" if UVLOOP_AVAILABLE else "asyncio"
+    http = "httptools" if HTTPTOOLS_AVAILABLE else "h11"
+    print(f"Event loop: {loop} / HTTP: {http}")
     print("=" * 60)
     
-    # Use single worker on Windows to avoid socket issues
+    # Use single worker on Windows to avoid socket issues.
+    # Each worker process loads its own copy of the models; on a single GPU
+    # prefer WORKERS=1 (endpoints are async and inference runs in a thread pool).
     workers = 1 if os.name == 'nt' or settings.DEBUG else settings.WORKERS
     
+    if settings.USE_GUNICORN and workers > 1 and GUNICORN_AVAILABLE:
+        print(f"Server: gunicorn --preload ({workers} workers)")
+        run_gunicorn(workers)
+        return
+    
     uvicorn.run(
         "backend.main:app",
         host=settings.HOST,
         port=settings.PORT,
         reload=settings.DEBUG,
         workers=workers,
+        loop=loop,
+        http=http,
         log_level=settings.LOG_LEVEL.lower(),
         access_log=True,
     )
@@ -8,11 +8,13 @@ Evaluates domain trustworthiness using multiple signals:
 - Domain popularity checking
 """
 
-import re
+import bisect
+import threading
 from typing import Dict, List, Optional, Tuple, Set
 from dataclasses import dataclass
 from enum import Enum
-import tldextract
+import numpy as np
+from cachetools import LRUCache
 from loguru import logger
 
 from config.constants import (
@@ -20,14 +22,21 @@ from config.constants import (
     MEDIUM_TRUST_DOMAINS,
     GOVERNMENT_TLD_PATTERNS,
     GOVERNMENT_DOMAINS,
-    HIGH_TRUST_KEYWORDS,
-    MEDIUM_TRUST_KEYWORDS,
-    SUSPICIOUS_KEYWORDS,
     PHISHING_TLD_PATTERNS,
-    PHISHING_SUBSTRINGS,
+    IP_LIKE_DOMAIN_RE,
     TOP_1K_DOMAINS_SAMPLE,
     TRUST_LEVELS,
 )
+from utils.keyword_automaton import (
+    scan_host_keywords,
+    ordered_hits,
+    HIGH_TRUST_RANK,
+    MEDIUM_TRUST_RANK,
+    SUSPICIOUS_RANK,
+    PHISHING_SUBSTRING_RANK,
+)
+from utils.public_suffix import extract_domain_parts, DomainParts
+from config.settings import settings
 
 
 class TrustLevel(Enum):
@@ -40,19 +49,31 @@ class TrustLevel(Enum):
     DANGEROUS = "dangerous"
 
 
-@dataclass
+# Trust bands: score >= threshold[i] (and below the next) maps to level[i + 1]
+_TRUST_LEVEL_THRESHOLDS = (0.15, 0.30, 0.50, 0.70, 0.85)
+_TRUST_LEVEL_BANDS = (
+    TrustLevel.DANGEROUS,
+    TrustLevel.SUSPICIOUS,
+    TrustLevel.LOW,
+    TrustLevel.MEDIUM,
+    TrustLevel.HIGH,
+    TrustLevel.HIGHEST,
+)
+
+
+@dataclass(frozen=True, slots=True)
 class TrustEvaluation:
-    """Result of domain trust evaluation"""
+    """Result of domain trust evaluation (shared between callers; treat as read-only)"""
     domain: str
     full_domain: str
     trust_level: TrustLevel
     trust_score: float
     confidence: float
-    reasons: List[str]
+    reasons: Tuple[str, ...]
     is_government: bool
     is_educational: bool
-    keyword_matches: List[str]
-    suspicious_patterns: List[str]
+    keyword_matches: Tuple[str, ...]
+    suspicious_patterns: Tuple[str, ...]
     recommendation: str
     
     def to_dict(self) -> Dict:
@@ -62,11 +83,11 @@ class TrustEvaluation:
             'trust_level': self.trust_level.value,
             'trust_score': self.trust_score,
             'confidence': self.confidence,
-            'reasons': self.reasons,
+            'reasons': list(self.reasons),
             'is_government': self.is_government,
             'is_educational': self.is_educational,
-            'keyword_matches': self.keyword_matches,
-            'suspicious_patterns': self.suspicious_patterns,
+            'keyword_matches': list(self.keyword_matches),
+            'suspicious_patterns': list(self.suspicious_patterns),
             'recommendation': self.recommendation,
         }
 
@@ -83,7 +104,14 @@ class DomainTrustEvaluator:
     """
     
     # Educational TLDs
-    EDUCATIONAL_TLDS = {'.edu', '.ac.uk', '.edu.au', '.ac.jp', '.edu.cn'}
+    EDUCATIONAL_TLDS = frozenset({'.edu', '.ac.uk', '.edu.au', '.ac.jp', '.edu.cn'})
+    
+    # Government TLD patterns as endswith() tuples (matched in one C call)
+    _GOV_SUFFIX_TUPLE = tuple(sorted(p.lstrip('.') for p in GOVERNMENT_TLD_PATTERNS))
+    _GOV_FULL_TUPLE = tuple(sorted(GOVERNMENT_TLD_PATTERNS))
+    
+    # TLDs that earn a small trust bonus
+    TRUSTED_TLDS = frozenset({'.com', '.org', '.net', '.edu', '.gov'})
     
     # Suspicious TLD penalty map
     TLD_PENALTIES = {
@@ -92,6 +120,15 @@ class DomainTrustEvaluator:
         '.link': 0.15, '.loan': 0.3, '.men': 0.25, '.party': 0.2,
     }
     
+    # Base TLDs tried for regional variants (google.com.br -> google.com)
+    REGIONAL_BASE_TLDS = ('.com', '.org', '.net', '.io')
+    
+    # Trust database entries: (score, confidence, reason prefix)
+    _TOP_ENTRY = (0.95, 0.98, "Top global website")
+    _HIGH_ENTRY = (0.85, 0.95, "High-trust domain")
+    _MEDIUM_ENTRY = (0.60, 0.75, "Medium-trust domain")
+    _UNKNOWN_ENTRY = (0.30, 0.50, "Unknown domain")
+    
     def __init__(self, custom_trusted_domains: Optional[Set[str]] = None):
         """
         Initialize the trust evaluator.
@@ -99,16 +136,29 @@ class DomainTrustEvaluator:
         Args:
             custom_trusted_domains: Optional set of additional trusted domains
         """
-        self.tld_extractor = tldextract.TLDExtract(cache_dir=None)
-        
-        # Build combined trust databases
-        self._high_trust = HIGH_TRUST_DOMAINS.copy()
-        self._medium_trust = MEDIUM_TRUST_DOMAINS.copy()
-        self._government = GOVERNMENT_DOMAINS.copy()
-        self._top_sites = TOP_1K_DOMAINS_SAMPLE.copy()
+        # Build combined trust databases (immutable constants are shared, not copied)
+        self._high_trust = HIGH_TRUST_DOMAINS
+        self._medium_trust = MEDIUM_TRUST_DOMAINS
+        self._government = GOVERNMENT_DOMAINS
+        self._top_sites = TOP_1K_DOMAINS_SAMPLE
         
         if custom_trusted_domains:
-            self._high_trust.update(custom_trusted_domains)
+            self._high_trust = HIGH_TRUST_DOMAINS | frozenset(custom_trusted_domains)
+        
+        # One probe per lookup: top sites override high trust, which overrides medium
+        self._trust_index = self._build_trust_index()
+        self._regional_variants = self._build_regional_variants()
+        
+        # Evaluations by host parts; many URLs share a host
+        cache_size = settings.TRUST_EVAL_CACHE_SIZE
+        self._cache: Optional[LRUCache] = LRUCache(maxsize=cache_size) if cache_size > 0 else None
+        self._cache_lock = threading.Lock()
+        
+        # Memo of per-suffix government/educational/TLD traits
+        self._suffix_traits: Dict[str, Tuple[bool, bool, float, bool]] = {}
+        
+        # Known-safe hosts (bare and www.) are evaluated up front and never evicted
+        self._prebuilt = self._build_prebuilt_results()
         
         logger.info(f"Trust evaluator initialized with {len(self._high_trust)} high-trust domains")
     
@@ -122,29 +172,108 @@ class DomainTrustEvaluator:
         Returns:
             TrustEvaluation with detailed trust analysis
         """
-        # Extract domain components
-        extracted = self.tld_extractor(url)
-        domain = extracted.domain.lower()
-        subdomain = extracted.subdomain.lower()
-        suffix = extracted.suffix.lower()
-        full_domain = extracted.registered_domain.lower() if extracted.registered_domain else f"{domain}.{suffix}"
-        
-        # Initialize evaluation
+        # Extract domain components (lowercased by the PSL trie lookup)
+        parts = extract_domain_parts(url)
+        return self._evaluate_keyed(self._cache_key(url, parts))
+    
+    def evaluate_batch(self, urls: List[str]) -> List[TrustEvaluation]:
+        """
+        Evaluate many URLs, running each distinct host through evaluate() once.
+        
+        Args:
+            urls: URLs or domains to evaluate
+            
+        Returns:
+            TrustEvaluation per URL, in input order
+        """
+        evaluations: Dict[Tuple[DomainParts, bool], TrustEvaluation] = {}
+        results = []
+        for url in urls:
+            parts = extract_domain_parts(url)
+            key = self._cache_key(url, parts)
+            evaluation = evaluations.get(key)
+            if evaluation is None:
+                evaluation = evaluations[key] = self._evaluate_keyed(key)
+            results.append(evaluation)
+        return results
+    
+    def score_batch(self, urls: List[str]) -> np.ndarray:
+        """
+        Trust scores for many URLs (batch form of get_trust_score_for_prediction).
+        
+        Args:
+            urls: URLs or domains to score
+            
+        Returns:
+            float64 array of trust scores, one per URL
+        """
+        evaluations = self.evaluate_batch(urls)
+        return np.fromiter((e.trust_score for e in evaluations), dtype=np.float64, count=len(evaluations))
+    
+    @staticmethod
+    def _cache_key(url: str, parts: DomainParts) -> Tuple[DomainParts, bool]:
+        """Evaluation cache key; only the punycode check looks past the host"""
+        # Lowercasing copies the whole URL, so only do it when "--" is present
+        return parts, '--' in url and 'xn--' in url.lower()
+    
+    def _build_prebuilt_results(self) -> Dict[Tuple[DomainParts, bool], TrustEvaluation]:
+        """Pre-evaluate top-site and high-trust domains with no or a www subdomain"""
+        prebuilt = {}
+        for trusted in self._top_sites | self._high_trust:
+            for host in (trusted, f"www.{trusted}"):
+                key = self._cache_key(host, extract_domain_parts(host))
+                prebuilt[key] = self._evaluate_parts(*key)
+        return prebuilt
+    
+    def cache_clear(self):
+        """Drop all cached trust evaluations (known-safe hosts stay prebuilt)"""
+        if self._cache is not None:
+            with self._cache_lock:
+                self._cache.clear()
+    
+    def _evaluate_keyed(self, key: Tuple[DomainParts, bool]) -> TrustEvaluation:
+        """Cached evaluation of extracted host parts"""
+        prebuilt = self._prebuilt.get(key)
+        if prebuilt is not None:
+            return prebuilt
+        
+        if self._cache is None:
+            return self._evaluate_parts(*key)
+        
+        with self._cache_lock:
+            cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+        
+        evaluation = self._evaluate_parts(*key)
+        with self._cache_lock:
+            self._cache[key] = evaluation
+        return evaluation
+    
+    def _evaluate_parts(self, parts: DomainParts, has_punycode: bool) -> TrustEvaluation:
+        """
+        Run the full trust evaluation for an extracted host.
+        
+        Args:
+            parts: Lowercased host components
+            has_punycode: Whether the URL contains "xn--" anywhere
+            
+        Returns:
+            TrustEvaluation with detailed trust analysis
+        """
+        subdomain, domain, suffix, registered_domain = parts
+        full_domain = registered_domain or f"{domain}.{suffix}"
+        
+        # Single reasons list shared by every check
         reasons = []
-        keyword_matches = []
-        suspicious_patterns = []
-        trust_score = 0.3  # Base score for unknown domains
-        confidence = 0.5
         
         # Check trust databases
-        db_result = self._check_trust_databases(full_domain, domain, suffix)
-        trust_score = db_result['score']
-        reasons.extend(db_result['reasons'])
-        confidence = db_result['confidence']
+        trust_score, confidence, db_reason = self._check_trust_databases(full_domain, domain, suffix)
+        reasons.append(db_reason)
         
         # Check government/educational status
-        is_government = self._is_government_domain(full_domain, suffix)
-        is_educational = self._is_educational_domain(suffix)
+        is_government_tld, is_educational, tld_adjustment, is_high_risk_tld = self._get_suffix_traits(suffix)
+        is_government = is_government_tld or full_domain in self._government
         
         if is_government:
             trust_score = max(trust_score, 0.9)
@@ -156,22 +285,20 @@ class DomainTrustEvaluator:
             reasons.append("Educational domain detected")
             confidence = max(confidence, 0.85)
         
-        # Keyword analysis
-        keyword_result = self._analyze_keywords(domain, subdomain)
-        keyword_matches = keyword_result['matches']
-        trust_score += keyword_result['score_adjustment']
-        reasons.extend(keyword_result['reasons'])
-        
-        # Suspicious pattern detection
-        suspicious_result = self._detect_suspicious_patterns(url, domain, subdomain, full_domain)
-        suspicious_patterns = suspicious_result['patterns']
-        trust_score += suspicious_result['score_adjustment']
-        reasons.extend(suspicious_result['reasons'])
+        # Keyword and suspicious-pattern analysis
+        (
+            keyword_matches,
+            suspicious_patterns,
+            keyword_adjustment,
+            pattern_adjustment,
+        ) = self._scan_once(domain, subdomain, has_punycode, reasons)
+        trust_score += keyword_adjustment
+        trust_score += pattern_adjustment
         
         # TLD analysis
-        tld_result = self._analyze_tld(suffix)
-        trust_score += tld_result['score_adjustment']
-        reasons.extend(tld_result['reasons'])
+        if is_high_risk_tld:
+            reasons.append(f"High-risk TLD: {suffix}")
+        trust_score += tld_adjustment
         
         # Clamp final score
         trust_score = max(0.0, min(1.0, trust_score))
@@ -188,144 +315,133 @@ class DomainTrustEvaluator:
             trust_level=trust_level,
             trust_score=round(trust_score, 4),
             confidence=round(confidence, 4),
-            reasons=reasons,
+            reasons=tuple(reasons),
             is_government=is_government,
             is_educational=is_educational,
-            keyword_matches=keyword_matches,
-            suspicious_patterns=suspicious_patterns,
+            keyword_matches=tuple(keyword_matches),
+            suspicious_patterns=tuple(suspicious_patterns),
             recommendation=recommendation,
         )
     
-    def _check_trust_databases(self, full_domain: str, domain: str, suffix: str) -> Dict:
-        """Check domain against trust databases"""
-        reasons = []
+    def _check_trust_databases(self, full_domain: str, domain: str, suffix: str) -> Tuple[float, float, str]:
+        """Check domain against trust databases, returning (score, confidence, reason)"""
+        score, confidence, reason = self._trust_index.get(full_domain, self._UNKNOWN_ENTRY)
+        
+        # A regional variant of a high-trust domain outranks the medium list
+        # e.g., google.com.br -> google.com
+        if score <= self._MEDIUM_ENTRY[0]:
+            variation = self._regional_variants.get(domain)
+            if variation is not None:
+                return 0.80, 0.90, f"Regional variant of trusted domain: {variation}"
+        
+        return score, confidence, f"{reason}: {full_domain}"
+    
+    def _build_trust_index(self) -> Dict[str, Tuple[float, float, str]]:
+        """Map each listed domain to its (score, confidence, reason) entry"""
+        index = dict.fromkeys(self._medium_trust, self._MEDIUM_ENTRY)
+        index.update(dict.fromkeys(self._high_trust, self._HIGH_ENTRY))
+        index.update(dict.fromkeys(self._top_sites, self._TOP_ENTRY))
+        return index
+    
+    def _build_regional_variants(self) -> Dict[str, str]:
+        """Map a domain label to the first high-trust "<label><tld>" over REGIONAL_BASE_TLDS"""
+        variants: Dict[str, str] = {}
+        for tld in self.REGIONAL_BASE_TLDS:
+            for trusted in self._high_trust:
+                if trusted.endswith(tld):
+                    variants.setdefault(trusted[:-len(tld)], trusted)
+        return variants
+    
+    def _get_suffix_traits(self, suffix: str) -> Tuple[bool, bool, float, bool]:
+        """
+        Everything the evaluation derives from the public suffix, memoized.
         
-        # Check top sites first (highest trust)
-        if full_domain in self._top_sites:
-            return {
-                'score': 0.95,
-                'confidence': 0.98,
-                'reasons': [f"Top global website: {full_domain}"]
-            }
+        Government TLD patterns only ever match within the suffix, so this
+        covers the pattern half of the government check. Suffixes come from
+        the PSL, which keeps the memo small.
         
-        # Check high trust database
-        if full_domain in self._high_trust:
-            return {
-                'score': 0.85,
-                'confidence': 0.95,
-                'reasons': [f"High-trust domain: {full_domain}"]
-            }
-        
-        # Check if base domain (without country suffix) is in high trust
-        # e.g., google.com.br -> check google.com
-        base_variations = self._get_domain_variations(domain, suffix)
-        for variation in base_variations:
-            if variation in self._high_trust:
-                return {
-                    'score': 0.80,
-                    'confidence': 0.90,
-                    'reasons': [f"Regional variant of trusted domain: {variation}"]
-                }
-        
-        # Check medium trust database
-        if full_domain in self._medium_trust:
-            return {
-                'score': 0.60,
-                'confidence': 0.75,
-                'reasons': [f"Medium-trust domain: {full_domain}"]
-            }
-        
-        # Unknown domain
-        return {
-            'score': 0.30,
-            'confidence': 0.50,
-            'reasons': [f"Unknown domain: {full_domain}"]
-        }
-    
-    def _get_domain_variations(self, domain: str, suffix: str) -> List[str]:
-        """Get variations of domain to check (for regional domains)"""
-        variations = []
+        Args:
+            suffix: Public suffix (may be empty)
+            
+        Returns:
+            (government TLD, educational TLD, TLD score adjustment, high-risk TLD)
+        """
+        traits = self._suffix_traits.get(suffix)
+        if traits is not None:
+            return traits
         
-        # Common TLD variations
-        common_tlds = ['.com', '.org', '.net', '.io']
-        for tld in common_tlds:
-            variations.append(f"{domain}{tld}")
+        suffix_with_dot = f".{suffix}"
+        is_government_tld = suffix.endswith(self._GOV_SUFFIX_TUPLE) or suffix_with_dot.endswith(self._GOV_FULL_TUPLE)
+        is_educational = suffix_with_dot in self.EDUCATIONAL_TLDS or suffix == 'edu'
         
-        return variations
-    
-    def _is_government_domain(self, full_domain: str, suffix: str) -> bool:
-        """Check if domain is government-related"""
-        # Check explicit government domains
-        if full_domain in self._government:
-            return True
+        tld_adjustment = 0.0
+        is_high_risk = suffix_with_dot in PHISHING_TLD_PATTERNS
+        if is_high_risk:
+            tld_adjustment -= self.TLD_PENALTIES.get(suffix_with_dot, 0.2)
         
-        # Check government TLD patterns
-        for pattern in GOVERNMENT_TLD_PATTERNS:
-            if suffix.endswith(pattern.lstrip('.')):
-                return True
-            if full_domain.endswith(pattern):
-                return True
+        # Trusted TLDs get small bonus
+        if suffix_with_dot in self.TRUSTED_TLDS:
+            tld_adjustment += 0.05
         
-        return False
+        traits = (is_government_tld, is_educational, tld_adjustment, is_high_risk)
+        self._suffix_traits[suffix] = traits
+        return traits
     
-    def _is_educational_domain(self, suffix: str) -> bool:
-        """Check if domain is educational"""
-        suffix_with_dot = f".{suffix}"
-        return suffix_with_dot in self.EDUCATIONAL_TLDS or suffix == 'edu'
-    
-    def _analyze_keywords(self, domain: str, subdomain: str) -> Dict:
-        """Analyze domain for trusted/suspicious keywords"""
+    def _scan_once(
+        self,
+        domain: str,
+        subdomain: str,
+        has_punycode: bool,
+        reasons: List[str],
+    ) -> Tuple[List[str], List[str], float, float]:
+        """
+        Run the keyword and suspicious-pattern analyses in one pass.
+        
+        The host is scanned for keywords once and every check reads those
+        hits. Each analysis keeps its own score adjustment so the caller
+        applies them in the original order (float addition is not associative).
+        
+        Args:
+            domain: Registered domain name without suffix
+            subdomain: Subdomain part (may be empty)
+            has_punycode: Whether the URL contains "xn--" anywhere
+            reasons: List the checks append their reasons to
+            
+        Returns:
+            (keyword matches, suspicious patterns, keyword adjustment,
+            pattern adjustment)
+        """
         matches = []
-        reasons = []
-        score_adjustment = 0.0
+        patterns = []
+        keyword_adjustment = 0.0
+        pattern_adjustment = 0.0
         
-        full_host = f"{subdomain}.{domain}" if subdomain else domain
+        keyword_hits = scan_host_keywords(subdomain, domain)
         
         # Check high-trust keywords
-        for keyword in HIGH_TRUST_KEYWORDS:
-            if keyword in domain:
-                matches.append(keyword)
-                score_adjustment += 0.1
-                reasons.append(f"Contains trusted keyword: {keyword}")
+        for keyword in ordered_hits(keyword_hits.domain, HIGH_TRUST_RANK):
+            matches.append(keyword)
+            keyword_adjustment += 0.1
+            reasons.append(f"Contains trusted keyword: {keyword}")
         
         # Check medium-trust keywords
-        for keyword in MEDIUM_TRUST_KEYWORDS:
-            if keyword in domain or keyword in subdomain:
-                if keyword not in matches:
-                    matches.append(keyword)
-                    score_adjustment += 0.05
-                    reasons.append(f"Contains trust-indicating keyword: {keyword}")
+        for keyword in ordered_hits(keyword_hits.domain | keyword_hits.subdomain, MEDIUM_TRUST_RANK):
+            if keyword not in matches:
+                matches.append(keyword)
+                keyword_adjustment += 0.05
+                reasons.append(f"Contains trust-indicating keyword: {keyword}")
         
         # Check suspicious keywords (potential phishing attempt)
-        suspicious_count = 0
-        for keyword in SUSPICIOUS_KEYWORDS:
-            if keyword in full_host:
-                if len(matches) > 0:  # Brand keyword + suspicious keyword
-                    suspicious_count += 1
-        
-        if suspicious_count > 0 and len(matches) > 0:
-            score_adjustment -= 0.3  # Significant penalty for brand + suspicious combo
-            reasons.append(f"Warning: Brand keyword with {suspicious_count} suspicious terms")
-        
-        return {
-            'matches': matches,
-            'score_adjustment': score_adjustment,
-            'reasons': reasons,
-        }
-    
-    def _detect_suspicious_patterns(self, url: str, domain: str, subdomain: str, full_domain: str) -> Dict:
-        """Detect suspicious patterns in URL"""
-        patterns = []
-        reasons = []
-        score_adjustment = 0.0
-        
-        url_lower = url.lower()
+        if matches:  # Brand keyword + suspicious keyword
+            suspicious_count = len(keyword_hits.full_host.intersection(SUSPICIOUS_RANK))
+            if suspicious_count > 0:
+                keyword_adjustment -= 0.3  # Significant penalty for brand + suspicious combo
+                reasons.append(f"Warning: Brand keyword with {suspicious_count} suspicious terms")
         
         # Check phishing substrings
-        for substring in PHISHING_SUBSTRINGS:
-            if substring in subdomain or substring in domain:
-                patterns.append(substring)
-                score_adjustment -= 0.15
+        for substring in ordered_hits(keyword_hits.subdomain | keyword_hits.domain, PHISHING_SUBSTRING_RANK):
+            patterns.append(substring)
+            pattern_adjustment -= 0.15
         
         if patterns:
             reasons.append(f"Suspicious substrings found: {', '.join(patterns[:3])}")
@@ -334,78 +450,41 @@ class DomainTrustEvaluator:
         hyphen_count = domain.count('-')
         if hyphen_count > 2:
             patterns.append(f"excessive-hyphens ({hyphen_count})")
-            score_adjustment -= 0.1 * min(hyphen_count - 2, 3)
+            pattern_adjustment -= 0.1 * min(hyphen_count - 2, 3)
             reasons.append(f"Excessive hyphens in domain: {hyphen_count}")
         
-        # Check for brand name in subdomain (potential impersonation)
-        for brand in HIGH_TRUST_KEYWORDS:
-            if brand in subdomain and brand not in domain:
-                patterns.append(f"brand-in-subdomain ({brand})")
-                score_adjustment -= 0.25
-                reasons.append(f"Brand name '{brand}' in subdomain (potential impersonation)")
-                break
+        # Check for brand name in subdomain (potential impersonation); set
+        # algebra over the automaton hits, first brand in list order wins
+        subdomain_brands = (keyword_hits.subdomain - keyword_hits.domain).intersection(HIGH_TRUST_RANK)
+        if subdomain_brands:
+            brand = min(subdomain_brands, key=HIGH_TRUST_RANK.__getitem__)
+            patterns.append(f"brand-in-subdomain ({brand})")
+            pattern_adjustment -= 0.25
+            reasons.append(f"Brand name '{brand}' in subdomain (potential impersonation)")
         
         # Check for long subdomain (often used in phishing)
         if len(subdomain) > 30:
             patterns.append("long-subdomain")
-            score_adjustment -= 0.15
+            pattern_adjustment -= 0.15
             reasons.append("Unusually long subdomain")
         
-        # Check for IP-like patterns in domain
-        if re.search(r'\d{1,3}-\d{1,3}-\d{1,3}', domain):
+        # Check for IP-like patterns in domain (the pattern needs two hyphens)
+        if hyphen_count >= 2 and IP_LIKE_DOMAIN_RE.search(domain):
             patterns.append("ip-like-domain")
-            score_adjustment -= 0.2
+            pattern_adjustment -= 0.2
             reasons.append("IP-address-like pattern in domain")
         
         # Check for homograph attack indicators
-        if 'xn--' in url_lower:  # Punycode
+        if has_punycode:  # Punycode
             patterns.append("punycode-domain")
-            score_adjustment -= 0.1
+            pattern_adjustment -= 0.1
             reasons.append("Internationalized domain name (potential homograph attack)")
         
-        return {
-            'patterns': patterns,
-            'score_adjustment': score_adjustment,
-            'reasons': reasons,
-        }
-    
-    def _analyze_tld(self, suffix: str) -> Dict:
-        """Analyze TLD for trust signals"""
-        reasons = []
-        score_adjustment = 0.0
-        
-        suffix_with_dot = f".{suffix}"
-        
-        # Check suspicious TLDs
-        if suffix_with_dot in PHISHING_TLD_PATTERNS:
-            penalty = self.TLD_PENALTIES.get(suffix_with_dot, 0.2)
-            score_adjustment -= penalty
-            reasons.append(f"High-risk TLD: {suffix}")
-        
-        # Trusted TLDs get small bonus
-        trusted_tlds = {'.com', '.org', '.net', '.edu', '.gov'}
-        if suffix_with_dot in trusted_tlds:
-            score_adjustment += 0.05
-        
-        return {
-            'score_adjustment': score_adjustment,
-            'reasons': reasons,
-        }
+        return matches, patterns, keyword_adjustment, pattern_adjustment
     
     def _score_to_level(self, score: float) -> TrustLevel:
         """Convert trust score to trust level"""
-        if score >= 0.85:
-            return TrustLevel.HIGHEST
-        elif score >= 0.70:
-            return TrustLevel.HIGH
-        elif score >= 0.50:
-            return TrustLevel.MEDIUM
-        elif score >= 0.30:
-            return TrustLevel.LOW
-        elif score >= 0.15:
-            return TrustLevel.SUSPICIOUS
-        else:
-            return TrustLevel.DANGEROUS
+        return _TRUST_LEVEL_BANDS[bisect.bisect_right(_TRUST_LEVEL_THRESHOLDS, score)]
     
     def _generate_recommendation(self, trust_level: TrustLevel, score: float, suspicious_patterns: List[str]) -> str:
         """Generate human-readable recommendation"""
@@ -435,14 +514,11 @@ class DomainTrustEvaluator:
         Quick check if URL is from a whitelisted domain.
         Returns (is_whitelisted, reason)
         """
-        extracted = self.tld_extractor(url)
-        full_domain = extracted.registered_domain
+        full_domain = extract_domain_parts(url).registered_domain
         
         if not full_domain:
             return False, None
         
-        full_domain = full_domain.lower()
-        
         if full_domain in self._top_sites:
             return True, f"Top global website: {full_domain}"
         
@@ -4,8 +4,15 @@ Combines multiple models with domain trust evaluation for phishing detection
 """
 
 import asyncio
+import atexit
+import bisect
+import math
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import lru_cache
 from enum import Enum
 from loguru import logger
 import numpy as np
@@ -15,7 +22,7 @@ from config.constants import PhishingStatus, RiskLevel
 from models.electra_model import get_electra_model, ElectraURLModel
 from models.biformer_model import get_biformer_model, BiformerURLModel
 from models.lgbm_model import get_lgbm_model, LGBMURLModel
-from services.domain_trust import domain_trust_evaluator, TrustEvaluation
+from services.domain_trust import domain_trust_evaluator, TrustEvaluation, TrustLevel
 from services.feature_extractor import url_feature_extractor, URLFeatures
 
 
@@ -28,7 +35,7 @@ class PredictionSource(Enum):
     RULES = "rules"
 
 
-@dataclass
+@dataclass(slots=True)
 class ModelPrediction:
     """Individual model prediction result"""
     source: str
@@ -37,7 +44,7 @@ class ModelPrediction:
     weighted_contribution: float
 
 
-@dataclass
+@dataclass(slots=True)
 class EnsemblePrediction:
     """Complete ensemble prediction result"""
     url: str
@@ -73,8 +80,103 @@ class EnsemblePrediction:
     # Threshold used
     threshold: float
     
+    # When the prediction was made
+    scan_timestamp: datetime = field(default_factory=datetime.utcnow)
+    
     def to_dict(self) -> Dict:
-        return asdict(self)
+        # Built by hand: asdict() deep-copies recursively. Nested containers
+        # are still copied (one level is all they have) so the result stays
+        # independent of the prediction.
+        return {
+            'url': self.url,
+            'is_phishing': self.is_phishing,
+            'phishing_probability': self.phishing_probability,
+            'confidence': self.confidence,
+            'risk_level': self.risk_level,
+            'status': self.status,
+            'electra_probability': self.electra_probability,
+            'biformer_probability': self.biformer_probability,
+            'lgbm_probability': self.lgbm_probability,
+            'model_predictions': [dict(prediction) for prediction in self.model_predictions],
+            'domain_trust_score': self.domain_trust_score,
+            'domain_trust_level': self.domain_trust_level,
+            'is_whitelisted': self.is_whitelisted,
+            'whitelist_reason': self.whitelist_reason,
+            'url_features': dict(self.url_features),
+            'rule_flags': list(self.rule_flags),
+            'rule_override': self.rule_override,
+            'threshold': self.threshold,
+            'scan_timestamp': self.scan_timestamp,
+        }
+    
+    @property
+    def recommendation(self) -> str:
+        """User-friendly recommendation based on prediction"""
+        return _recommendation_for(
+            self.is_whitelisted,
+            self.is_phishing,
+            self.status,
+            self.risk_level,
+        )
+    
+    @property
+    def trust_evaluation(self) -> Dict:
+        """Domain trust details shaped like TrustEvaluationResponse"""
+        return {
+            'trust_score': self.domain_trust_score,
+            'trust_level': self.domain_trust_level,
+            'is_whitelisted': self.is_whitelisted,
+            'whitelist_reason': self.whitelist_reason,
+            'is_government': self.url_features.get('is_government', False),
+            'is_educational': self.url_features.get('is_educational', False),
+            'reasons': [],
+            'suspicious_patterns': [],
+        }
+    
+
+
+# Risk bands: probability < threshold[i] maps to level[i] (whitelisting
+# doesn't change the band)
+_RISK_THRESHOLDS = (0.1, 0.3, 0.6, 0.85)
+_RISK_LEVELS = (
+    RiskLevel.VERY_LOW,
+    RiskLevel.LOW,
+    RiskLevel.MEDIUM,
+    RiskLevel.HIGH,
+    RiskLevel.CRITICAL,
+)
+
+# Trust levels eligible for the high-trust safe override (rule 1)
+_HIGH_TRUST_LEVELS = frozenset({TrustLevel.HIGHEST, TrustLevel.HIGH})
+
+# Model names as they appear in log messages
+_MODEL_LABELS = {'electra': 'ELECTRA', 'biformer': 'Biformer', 'lgbm': 'LightGBM'}
+
+
+@lru_cache(maxsize=64)
+def _recommendation_for(
+    is_whitelisted: bool,
+    is_phishing: bool,
+    status: str,
+    risk_level: str,
+) -> str:
+    """Recommendation text for a (whitelisted, phishing, status, risk) key"""
+    if is_whitelisted:
+        return "This is a trusted website. Safe to proceed."
+    
+    if is_phishing:
+        if risk_level == 'critical':
+            return "⚠️ HIGH RISK: This URL is very likely a phishing attempt. Do NOT enter any personal information."
+        else:
+            return "⚠️ WARNING: This URL shows signs of phishing. Proceed with extreme caution."
+    
+    if status == 'suspicious':
+        return "This URL has some suspicious characteristics. Verify the site before entering sensitive information."
+    
+    if risk_level == 'very_low':
+        return "This URL appears safe. Normal caution advised."
+    
+    return "This URL appears legitimate. Standard security practices recommended."
 
 
 class EnsemblePredictor:
@@ -118,6 +220,13 @@ class EnsemblePredictor:
         self.biformer_weight /= total_weight
         self.lgbm_weight /= total_weight
         
+        # (model name, normalized weight) in the order contributions are summed
+        self._model_weights: Tuple[Tuple[str, float], ...] = (
+            ('electra', self.electra_weight),
+            ('biformer', self.biformer_weight),
+            ('lgbm', self.lgbm_weight),
+        )
+        
         # Threshold
         self.threshold = threshold or settings.PHISHING_THRESHOLD
         
@@ -130,55 +239,102 @@ class EnsemblePredictor:
         self._biformer: Optional[BiformerURLModel] = None
         self._lgbm: Optional[LGBMURLModel] = None
         
+        # Shared by every request so model fan-out never spawns threads per call
+        self._pool = ThreadPoolExecutor(
+            max_workers=max(1, settings.ENSEMBLE_WORKERS),
+            thread_name_prefix="model-infer",
+        )
+        
         self._loaded = False
+        self._model_status: Dict[str, bool] = {'electra': False, 'biformer': False, 'lgbm': False}
         
         logger.info(
             f"EnsemblePredictor initialized "
             f"(weights: E={self.electra_weight:.2f}, B={self.biformer_weight:.2f}, L={self.lgbm_weight:.2f})"
         )
     
-    def load_models(self) -> Dict[str, bool]:
-        """
-        Load all models.
-        
-        Returns:
-            Dictionary with load status for each model
-        """
-        status = {}
-        
+    def load_electra(self) -> bool:
+        """Load the ELECTRA model"""
         try:
             logger.info("Loading ELECTRA model...")
             self._electra = get_electra_model()
-            status['electra'] = self._electra.is_loaded()
+            loaded = self._electra.is_loaded()
         except Exception as e:
             logger.error(f"Failed to load ELECTRA: {e}")
-            status['electra'] = False
+            loaded = False
         
+        self._model_status['electra'] = loaded
+        return loaded
+    
+    def load_biformer(self) -> bool:
+        """Load the Biformer model"""
         try:
             logger.info("Loading Biformer model...")
             self._biformer = get_biformer_model()
-            status['biformer'] = self._biformer.is_loaded()
+            loaded = self._biformer.is_loaded()
         except Exception as e:
             logger.error(f"Failed to load Biformer: {e}")
-            status['biformer'] = False
+            loaded = False
         
+        self._model_status['biformer'] = loaded
+        return loaded
+    
+    def load_lgbm(self) -> bool:
+        """Load the LightGBM model"""
         try:
             logger.info("Loading LightGBM model...")
             self._lgbm = get_lgbm_model()
-            status['lgbm'] = self._lgbm.is_loaded()
+            loaded = self._lgbm.is_loaded()
         except Exception as e:
             logger.error(f"Failed to load LightGBM: {e}")
-            status['lgbm'] = False
+            loaded = False
+        
+        self._model_status['lgbm'] = loaded
+        return loaded
+    
+    def load_models(self) -> Dict[str, bool]:
+        """
+        Load all models concurrently (each loader is independent and mostly I/O).
+        
+        Per-model status is visible through models_loaded_dict() as each load
+        finishes; is_loaded() only flips once all loaders have returned.
+        
+        Returns:
+            Dictionary with load status for each model
+        """
+        loaders = {
+            'electra': self.load_electra,
+            'biformer': self.load_biformer,
+            'lgbm': self.load_lgbm,
+        }
+        
+        with ThreadPoolExecutor(max_workers=len(loaders), thread_name_prefix="model-load") as pool:
+            futures = {name: pool.submit(loader) for name, loader in loaders.items()}
+            status = {name: future.result() for name, future in futures.items()}
         
         self._loaded = any(status.values())
         
         logger.info(f"Model loading status: {status}")
         return status
     
+    def shutdown(self):
+        """Stop the inference pool's worker threads"""
+        self._pool.shutdown(wait=True, cancel_futures=True)
+    
     def is_loaded(self) -> bool:
         """Check if at least one model is loaded"""
         return self._loaded
     
+    def cache_clear(self):
+        """Drop the per-model prediction caches of every loaded model"""
+        for model in (self._electra, self._biformer, self._lgbm):
+            if model is not None:
+                model.cache_clear()
+    
+    def models_loaded_dict(self) -> Dict[str, bool]:
+        """Load status for each model, updated as each loader finishes"""
+        return dict(self._model_status)
+    
     def predict(self, url: str) -> EnsemblePrediction:
         """
         Make ensemble prediction for a single URL.
@@ -189,6 +345,9 @@ class EnsemblePredictor:
         Returns:
             EnsemblePrediction with detailed results
         """
+        # Start the transformer models; features and trust are computed meanwhile
+        model_futures = self._start_model_probabilities(url)
+        
         # Extract features
         features = url_feature_extractor.extract_features(url)
         
@@ -196,20 +355,101 @@ class EnsemblePredictor:
         trust_eval = domain_trust_evaluator.evaluate(url)
         is_whitelisted, whitelist_reason = domain_trust_evaluator.is_whitelisted(url)
         
-        # Get model predictions
-        model_probs = self._get_model_probabilities(url)
-        
-        # Apply rule-based checks
-        rule_flags, rule_override = self._apply_rules(url, features, trust_eval)
+        # Get model predictions (LightGBM scores the features extracted above)
+        model_probs = self._collect_model_probabilities(model_futures)
+        if self._lgbm and self._lgbm.is_loaded():
+            try:
+                model_probs['lgbm'] = self._lgbm.get_phishing_probability_from_features(url, features)
+            except Exception as e:
+                logger.warning("LightGBM prediction failed: {}", e)
         
-        # Calculate ensemble probability
-        ensemble_prob = self._calculate_ensemble_probability(
-            model_probs,
+        return self._build_prediction(
+            url,
+            features,
             trust_eval,
             is_whitelisted,
-            rule_override,
+            whitelist_reason,
+            model_probs,
+        )
+    
+    def predict_batch(self, urls: List[str]) -> List[EnsemblePrediction]:
+        """
+        Make ensemble predictions for multiple URLs.
+        
+        Each model runs a single batched forward pass over all URLs
+        instead of one pass per URL.
+        
+        Args:
+            urls: List of URLs to analyze
+            
+        Returns:
+            List of EnsemblePrediction results
+        """
+        if not urls:
+            return []
+        
+        # Start the transformer models on the whole batch
+        model_futures = self._start_batch_model_probabilities(urls)
+        scan_timestamp = datetime.utcnow()
+        
+        # Features are extracted once and shared with LightGBM
+        features_list = [url_feature_extractor.extract_features(url) for url in urls]
+        batch_probs = self._get_batch_model_probabilities(urls, features_list, model_futures)
+        
+        # Trust is evaluated once per distinct host in the batch
+        trust_evals = domain_trust_evaluator.evaluate_batch(urls)
+        whitelist = [domain_trust_evaluator.is_whitelisted(url) for url in urls]
+        
+        # Ensemble probabilities for the whole batch as array operations
+        ensemble_probs = self._calculate_batch_ensemble_probabilities(
+            batch_probs,
+            trust_evals,
+            [is_whitelisted for is_whitelisted, _ in whitelist],
         )
         
+        predictions = []
+        for i, (url, features, trust_eval, (is_whitelisted, whitelist_reason)) in enumerate(
+            zip(urls, features_list, trust_evals, whitelist)
+        ):
+            model_probs = {name: probs[i] for name, probs in batch_probs.items()}
+            
+            predictions.append(self._build_prediction(
+                url,
+                features,
+                trust_eval,
+                is_whitelisted,
+                whitelist_reason,
+                model_probs,
+                scan_timestamp,
+                ensemble_probs[i],
+            ))
+        
+        return predictions
+    
+    def _build_prediction(
+        self,
+        url: str,
+        features: URLFeatures,
+        trust_eval: TrustEvaluation,
+        is_whitelisted: bool,
+        whitelist_reason: Optional[str],
+        model_probs: Dict[str, Optional[float]],
+        scan_timestamp: Optional[datetime] = None,
+        ensemble_prob: Optional[float] = None,
+    ) -> EnsemblePrediction:
+        """Combine model probabilities, trust and rules into a prediction"""
+        # Apply rule-based checks
+        rule_flags, rule_override = self._apply_rules(url, features, trust_eval)
+        
+        # Calculate ensemble probability (batch callers pass it precomputed)
+        if ensemble_prob is None:
+            ensemble_prob = self._calculate_ensemble_probability(
+                model_probs,
+                trust_eval,
+                is_whitelisted,
+                rule_override,
+            )
+        
         # Determine final prediction
         is_phishing = ensemble_prob >= self.threshold
         
@@ -235,28 +475,16 @@ class EnsemblePredictor:
             status = PhishingStatus.SUSPICIOUS
         
         # Build model predictions list
-        model_predictions = []
-        if model_probs['electra'] is not None:
-            model_predictions.append({
-                'source': 'electra',
-                'probability': model_probs['electra'],
-                'weight': self.electra_weight,
-                'weighted_contribution': model_probs['electra'] * self.electra_weight,
-            })
-        if model_probs['biformer'] is not None:
-            model_predictions.append({
-                'source': 'biformer',
-                'probability': model_probs['biformer'],
-                'weight': self.biformer_weight,
-                'weighted_contribution': model_probs['biformer'] * self.biformer_weight,
-            })
-        if model_probs['lgbm'] is not None:
-            model_predictions.append({
-                'source': 'lgbm',
-                'probability': model_probs['lgbm'],
-                'weight': self.lgbm_weight,
-                'weighted_contribution': model_probs['lgbm'] * self.lgbm_weight,
-            })
+        model_predictions = [
+            {
+                'source': name,
+                'probability': model_probs[name],
+                'weight': weight,
+                'weighted_contribution': model_probs[name] * weight,
+            }
+            for name, weight in self._model_weights
+            if model_probs[name] is not None
+        ]
         
         return EnsemblePrediction(
             url=url,
@@ -277,45 +505,94 @@ class EnsemblePredictor:
             rule_flags=rule_flags,
             rule_override=rule_override,
             threshold=self.threshold,
+            scan_timestamp=scan_timestamp or datetime.utcnow(),
         )
     
-    def predict_batch(self, urls: List[str]) -> List[EnsemblePrediction]:
+    def _loaded_url_models(self) -> List[Tuple[str, object]]:
         """
-        Make ensemble predictions for multiple URLs.
+        (name, model) for each loaded model that reads the raw URL.
         
-        Args:
-            urls: List of URLs to analyze
-            
-        Returns:
-            List of EnsemblePrediction results
+        LightGBM is left out: it scores features the caller has already
+        extracted, so it runs on the calling thread instead of re-featurizing
+        the URL on the pool.
+        """
+        return [
+            (name, model)
+            for name, model in (('electra', self._electra), ('biformer', self._biformer))
+            if model and model.is_loaded()
+        ]
+    
+    def _start_model_probabilities(self, url: str) -> Dict[str, Future]:
+        """
+        Submit the URL models' predictions to the inference pool.
+        
+        The models are independent and release the GIL during inference, so
+        they run concurrently with each other and with whatever the caller
+        does before collecting them.
         """
-        return [self.predict(url) for url in urls]
+        return {
+            name: self._pool.submit(model.get_phishing_probability, url)
+            for name, model in self._loaded_url_models()
+        }
     
-    def _get_model_probabilities(self, url: str) -> Dict[str, Optional[float]]:
-        """Get probabilities from all loaded models"""
+    def _collect_model_probabilities(self, futures: Dict[str, Future]) -> Dict[str, Optional[float]]:
+        """Wait for submitted model predictions (failed or missing models give None)"""
         probs = {
             'electra': None,
             'biformer': None,
             'lgbm': None,
         }
         
-        if self._electra and self._electra.is_loaded():
+        for name, future in futures.items():
             try:
-                probs['electra'] = self._electra.get_phishing_probability(url)
+                probs[name] = future.result()
             except Exception as e:
-                logger.warning(f"ELECTRA prediction failed: {e}")
+                logger.warning("{} prediction failed: {}", _MODEL_LABELS[name], e)
+        
+        return probs
+    
+    def _start_batch_model_probabilities(self, urls: List[str]) -> Dict[str, Future]:
+        """Submit the URL models' batched predictions to the inference pool"""
+        return {
+            name: self._pool.submit(model.get_batch_phishing_probabilities, urls)
+            for name, model in self._loaded_url_models()
+        }
+    
+    def _get_batch_model_probabilities(
+        self,
+        urls: List[str],
+        features_list: List[URLFeatures],
+        futures: Dict[str, Future],
+    ) -> Dict[str, List[Optional[float]]]:
+        """
+        Get probabilities from all loaded models for a batch of URLs.
+        
+        Args:
+            urls: Batch of URLs
+            features_list: Extracted features per URL (scored by LightGBM)
+            futures: Pending URL-model predictions from _start_batch_model_probabilities
+            
+        Returns:
+            Per-model probability lists (all None when a model is unavailable)
+        """
+        missing = [None] * len(urls)
+        probs = {
+            'electra': missing,
+            'biformer': missing,
+            'lgbm': missing,
+        }
         
-        if self._biformer and self._biformer.is_loaded():
+        if self._lgbm and self._lgbm.is_loaded():
             try:
-                probs['biformer'] = self._biformer.get_phishing_probability(url)
+                probs['lgbm'] = self._lgbm.get_batch_phishing_probabilities_from_features(urls, features_list)
             except Exception as e:
-                logger.warning(f"Biformer prediction failed: {e}")
+                logger.warning("LightGBM batch prediction failed: {}", e)
         
-        if self._lgbm and self._lgbm.is_loaded():
+        for name, future in futures.items():
             try:
-                probs['lgbm'] = self._lgbm.get_phishing_probability(url)
+                probs[name] = future.result()
             except Exception as e:
-                logger.warning(f"LightGBM prediction failed: {e}")
+                logger.warning("{} batch prediction failed: {}", _MODEL_LABELS[name], e)
         
         return probs
     
@@ -332,17 +609,11 @@ class EnsemblePredictor:
         total_weight = 0.0
         
         # Add model contributions
-        if model_probs['electra'] is not None:
-            weighted_sum += model_probs['electra'] * self.electra_weight
-            total_weight += self.electra_weight
-        
-        if model_probs['biformer'] is not None:
-            weighted_sum += model_probs['biformer'] * self.biformer_weight
-            total_weight += self.biformer_weight
-        
-        if model_probs['lgbm'] is not None:
-            weighted_sum += model_probs['lgbm'] * self.lgbm_weight
-            total_weight += self.lgbm_weight
+        for name, weight in self._model_weights:
+            prob = model_probs[name]
+            if prob is not None:
+                weighted_sum += prob * weight
+                total_weight += weight
         
         # Handle case where no models are available
         if total_weight == 0:
@@ -369,6 +640,67 @@ class EnsemblePredictor:
         
         return max(0.0, min(1.0, ensemble_prob))
     
+    def _calculate_batch_ensemble_probabilities(
+        self,
+        batch_probs: Dict[str, List[Optional[float]]],
+        trust_evals: List[TrustEvaluation],
+        whitelisted: List[bool],
+    ) -> List[float]:
+        """
+        Vectorized _calculate_ensemble_probability over a batch.
+        
+        A model's batch call either returns every probability or none, so
+        the set of contributing models is the same for every URL and the
+        per-URL arithmetic maps onto elementwise array operations (same
+        operation order, so results match the scalar path exactly).
+        
+        Args:
+            batch_probs: Per-model probability lists (all None when unavailable)
+            trust_evals: Trust evaluation per URL
+            whitelisted: Whitelist flag per URL
+            
+        Returns:
+            Ensemble probability per URL
+        """
+        trust_scores = np.array([trust_eval.trust_score for trust_eval in trust_evals], dtype=np.float64)
+        
+        weighted_sum = np.zeros(len(trust_evals), dtype=np.float64)
+        total_weight = 0.0
+        
+        # Add model contributions
+        for name, weight in self._model_weights:
+            probs = batch_probs[name]
+            if probs[0] is not None:
+                weighted_sum += np.asarray(probs, dtype=np.float64) * weight
+                total_weight += weight
+        
+        # Handle case where no models are available
+        if total_weight == 0:
+            # Fall back to inverse of trust score
+            return (1.0 - trust_scores).tolist()
+        
+        # Normalize
+        ensemble_probs = weighted_sum / total_weight
+        
+        # Apply trust adjustment
+        if self.enable_trust_adjustment:
+            # High trust reduces phishing probability
+            ensemble_probs *= 1.0 - (trust_scores * 0.3)
+            
+            # Whitelisted domains get extra reduction
+            ensemble_probs = np.where(whitelisted, ensemble_probs * 0.1, ensemble_probs)
+        
+        # Apply suspicious pattern boost
+        pattern_counts = np.array([len(trust_eval.suspicious_patterns) for trust_eval in trust_evals])
+        pattern_boost = np.minimum(pattern_counts * 0.1, 0.3)
+        ensemble_probs = np.where(
+            pattern_counts > 0,
+            ensemble_probs + (1 - ensemble_probs) * pattern_boost,
+            ensemble_probs,
+        )
+        
+        return np.clip(ensemble_probs, 0.0, 1.0).tolist()
+    
     def _apply_rules(
         self,
         url: str,
@@ -381,12 +713,13 @@ class EnsemblePredictor:
         
         flags = []
         override = None
+        trust_score = trust_eval.trust_score
+        suspicious_patterns = trust_eval.suspicious_patterns
         
         # Rule 1: Whitelisted high-trust domains are safe
-        if trust_eval.trust_level.value in ['highest', 'high']:
-            if trust_eval.trust_score >= 0.85:
-                flags.append('high_trust_domain')
-                override = 'safe'
+        if trust_score >= 0.85 and trust_eval.trust_level in _HIGH_TRUST_LEVELS:
+            flags.append('high_trust_domain')
+            override = 'safe'
         
         # Rule 2: IP address URLs are suspicious
         if features.has_ip:
@@ -403,7 +736,7 @@ class EnsemblePredictor:
             flags.append('excessive_subdomains')
         
         # Rule 5: Suspicious TLD + suspicious patterns
-        if trust_eval.trust_score < 0.2 and len(trust_eval.suspicious_patterns) > 2:
+        if trust_score < 0.2 and len(suspicious_patterns) > 2:
             flags.append('multiple_risk_indicators')
             if not override:
                 override = 'phishing'
@@ -414,7 +747,7 @@ class EnsemblePredictor:
             override = 'safe'
         
         # Rule 7: Brand in subdomain (potential impersonation)
-        if 'brand-in-subdomain' in str(trust_eval.suspicious_patterns):
+        if any(pattern.startswith('brand-in-subdomain') for pattern in suspicious_patterns):
             flags.append('potential_brand_impersonation')
             if override == 'safe':
                 override = None  # Remove safe override
@@ -438,7 +771,10 @@ class EnsemblePredictor:
         
         # Model agreement factor
         if len(valid_probs) > 1:
-            std_dev = np.std(valid_probs)
+            # Population std in plain Python (at most three values; same steps as np.std)
+            count = len(valid_probs)
+            mean = sum(valid_probs) / count
+            std_dev = math.sqrt(sum((p - mean) * (p - mean) for p in valid_probs) / count)
             agreement_factor = 1.0 - min(std_dev * 2, 0.5)
         else:
             agreement_factor = 0.8
@@ -453,19 +789,7 @@ class EnsemblePredictor:
     
     def _get_risk_level(self, probability: float, is_whitelisted: bool) -> str:
         """Determine risk level based on probability"""
-        if is_whitelisted and probability < 0.1:
-            return RiskLevel.VERY_LOW
-        
-        if probability < 0.1:
-            return RiskLevel.VERY_LOW
-        elif probability < 0.3:
-            return RiskLevel.LOW
-        elif probability < 0.6:
-            return RiskLevel.MEDIUM
-        elif probability < 0.85:
-            return RiskLevel.HIGH
-        else:
-            return RiskLevel.CRITICAL
+        return _RISK_LEVELS[bisect.bisect_right(_RISK_THRESHOLDS, probability)]
     
     def get_quick_prediction(self, url: str) -> Tuple[bool, float]:
         """
@@ -480,16 +804,28 @@ class EnsemblePredictor:
 
 # Singleton instance
 _ensemble_predictor: Optional[EnsemblePredictor] = None
+_ensemble_predictor_lock = threading.Lock()
+
+
+def peek_ensemble_predictor() -> Optional[EnsemblePredictor]:
+    """The ensemble predictor if it has been created, without creating or loading it"""
+    return _ensemble_predictor
 
 
 def get_ensemble_predictor() -> EnsemblePredictor:
     """Get or create the ensemble predictor instance"""
     global _ensemble_predictor
     
-    if _ensemble_predictor is None:
-        _ensemble_predictor = EnsemblePredictor()
+    if _ensemble_predictor is not None and _ensemble_predictor.is_loaded():
+        return _ensemble_predictor
     
-    if not _ensemble_predictor.is_loaded():
-        _ensemble_predictor.load_models()
+    # Serialize creation/loading across threads (startup warm-up vs first request)
+    with _ensemble_predictor_lock:
+        if _ensemble_predictor is None:
+            _ensemble_predictor = EnsemblePredictor()
+            atexit.register(_ensemble_predictor.shutdown)
+        
+        if not _ensemble_predictor.is_loaded():
+            _ensemble_predictor.load_models()
     
     return _ensemble_predictor
@@ -8,10 +8,16 @@ import hashlib
 import base64
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from pathlib import Path
 import socket
+import sqlite3
+import threading
+import time
 
 import httpx
+from cachetools import TLRUCache, TTLCache
 from loguru import logger
 
 try:
@@ -22,6 +28,13 @@ except ImportError:
     logger.warning("python-whois not installed. Domain age checks disabled.")
 
 try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+try:
+    import dns.asyncresolver
     import dns.resolver
     DNS_AVAILABLE = True
 except ImportError:
@@ -29,6 +42,46 @@ except ImportError:
     logger.warning("dnspython not installed. DNS checks disabled.")
 
 from config.settings import settings
+from utils.json_utils import json_dumps, json_dumps_str, json_loads
+from services.domain_trust import domain_trust_evaluator
+
+
+def _new_cache(cache_type, **kwargs):
+    """Per-service result cache sized by EXTERNAL_CACHE_SIZE (None when disabled)"""
+    if settings.EXTERNAL_CACHE_SIZE <= 0:
+        return None
+    return cache_type(maxsize=settings.EXTERNAL_CACHE_SIZE, **kwargs)
+
+
+class _LoopSemaphore:
+    """
+    Concurrency cap for a module-level service.
+    
+    An asyncio.Semaphore belongs to the loop that first uses it, so a fresh
+    one is made whenever the service is used from a different loop.
+    """
+    
+    def __init__(self, limit: int):
+        self.limit = max(1, limit)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    def get(self) -> asyncio.Semaphore:
+        """Semaphore for the running loop"""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.limit)
+        return self._semaphore
+
+
+# Connection pool shared by the requests of one service client
+_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=32, max_connections=64)
+
+
+def _new_http_client() -> httpx.AsyncClient:
+    """Long-lived client so repeated API calls reuse TCP/TLS connections"""
+    return httpx.AsyncClient(http2=HTTP2_AVAILABLE, timeout=10.0, limits=_HTTP_LIMITS)
 
 
 @dataclass
@@ -80,13 +133,40 @@ class GoogleSafeBrowsingService:
     PLATFORM_TYPES = ["ANY_PLATFORM"]
     THREAT_ENTRY_TYPES = ["URL"]
     
+    # threatEntries accepted per threatMatches:find request
+    MAX_ENTRIES_PER_REQUEST = 500
+    
     def __init__(self, api_key: Optional[str] = None):
         self.api_key = api_key or settings.GOOGLE_SAFE_BROWSING_API_KEY
         self.enabled = bool(self.api_key)
+        self._http: Optional[httpx.AsyncClient] = None
+        
+        # Verdicts by URL (only touched from the event loop)
+        self._cache: Optional[TTLCache] = _new_cache(TTLCache, ttl=settings.SAFE_BROWSING_CACHE_TTL)
+        
+        # Caps the HTTP requests in flight when many batches flush at once
+        self._request_limit = _LoopSemaphore(settings.SAFE_BROWSING_MAX_CONCURRENCY)
+        
+        # Single-URL checks from concurrent scans, coalesced into one request
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
         
         if not self.enabled:
             logger.warning("Google Safe Browsing API key not configured")
     
+    def _client(self) -> httpx.AsyncClient:
+        """HTTP client, created on first use (inside the running event loop)"""
+        if self._http is None:
+            self._http = _new_http_client()
+        return self._http
+    
+    async def aclose(self):
+        """Close the pooled HTTP connections"""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+    
     async def check_url(self, url: str) -> SafeBrowsingResult:
         """
         Check a single URL against Google Safe Browsing.
@@ -105,7 +185,83 @@ class GoogleSafeBrowsingService:
                 checked_at=datetime.utcnow(),
             )
         
-        return await self.check_urls([url])[0]
+        if self._is_known_safe(url):
+            return self._safe_result(url, datetime.utcnow())
+        
+        if self._cache is not None:
+            cached = self._cache.get(url)
+            if cached is not None:
+                return cached
+        
+        return await self._enqueue(url)
+    
+    @staticmethod
+    def _is_known_safe(url: str) -> bool:
+        """Whether the URL is on a whitelisted domain (forced safe by the ensemble anyway)"""
+        return settings.SAFE_BROWSING_SKIP_WHITELISTED and domain_trust_evaluator.is_whitelisted(url)[0]
+    
+    @staticmethod
+    def _safe_result(url: str, now: datetime) -> SafeBrowsingResult:
+        """Clean verdict for a URL that isn't sent to the API"""
+        return SafeBrowsingResult(
+            url=url,
+            is_malicious=False,
+            threats=[],
+            checked_at=now,
+        )
+    
+    async def _enqueue(self, url: str) -> SafeBrowsingResult:
+        """
+        Queue a URL for the next coalesced lookup and wait for its verdict.
+        
+        The queue is flushed when it reaches SAFE_BROWSING_BATCH_MAX_SIZE
+        URLs, or SAFE_BROWSING_BATCH_MAX_WAIT seconds after the first one.
+        """
+        loop = asyncio.get_running_loop()
+        
+        # Queued futures belong to the loop that created them
+        if loop is not self._loop:
+            self._loop = loop
+            self._pending = []
+            self._flush_handle = None
+        
+        future = loop.create_future()
+        self._pending.append((url, future))
+        
+        if len(self._pending) >= settings.SAFE_BROWSING_BATCH_MAX_SIZE:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(settings.SAFE_BROWSING_BATCH_MAX_WAIT, self._flush)
+        
+        return await future
+    
+    def _flush(self):
+        """Hand the queued URLs off to a lookup task"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        
+        if not self._pending:
+            return
+        
+        batch = self._pending
+        self._pending = []
+        self._loop.create_task(self._run_batch(batch))
+    
+    async def _run_batch(self, batch: List[Tuple[str, asyncio.Future]]):
+        """Look up a coalesced batch and resolve each caller's future"""
+        try:
+            results = await self.check_urls([url for url, _ in batch])
+        except Exception as e:
+            logger.error("Safe Browsing batch failed ({} URLs): {}", len(batch), e)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
     
     async def check_urls(self, urls: List[str]) -> List[SafeBrowsingResult]:
         """
@@ -118,16 +274,51 @@ class GoogleSafeBrowsingService:
             List of SafeBrowsingResult
         """
         if not self.enabled:
+            now = datetime.utcnow()
             return [
                 SafeBrowsingResult(
                     url=url,
                     is_malicious=False,
                     threats=[],
-                    checked_at=datetime.utcnow(),
+                    checked_at=now,
                 )
                 for url in urls
             ]
         
+        # Whitelisted URLs and verdicts cached from earlier calls are answered
+        # locally; only the rest are sent
+        now = datetime.utcnow()
+        results = {}
+        for url in urls:
+            if url in results:
+                continue
+            if self._is_known_safe(url):
+                results[url] = self._safe_result(url, now)
+            elif self._cache is not None:
+                cached = self._cache.get(url)
+                if cached is not None:
+                    results[url] = cached
+        
+        pending = [url for url in dict.fromkeys(urls) if url not in results]
+        if pending:
+            step = self.MAX_ENTRIES_PER_REQUEST
+            for chunk_results in await asyncio.gather(*(
+                self._lookup_urls(pending[i:i + step]) for i in range(0, len(pending), step)
+            )):
+                results.update(chunk_results)
+        
+        return [results[url] for url in urls]
+    
+    async def _lookup_urls(self, urls: List[str]) -> Dict[str, SafeBrowsingResult]:
+        """
+        Query the Safe Browsing API for URLs and cache the verdicts.
+        
+        Args:
+            urls: Distinct URLs to check
+            
+        Returns:
+            SafeBrowsingResult by URL (all safe if the API call fails)
+        """
         try:
             request_body = {
                 "client": {
@@ -142,14 +333,14 @@ class GoogleSafeBrowsingService:
                 },
             }
             
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
+            async with self._request_limit.get():
+                response = await self._client().post(
                     f"{self.API_URL}?key={self.api_key}",
-                    json=request_body,
-                    timeout=10.0,
+                    content=json_dumps(request_body),
+                    headers={"Content-Type": "application/json"},
                 )
-                response.raise_for_status()
-                data = response.json()
+            response.raise_for_status()
+            data = json_loads(response.content)
             
             # Process matches
             matches = data.get("matches", [])
@@ -161,31 +352,133 @@ class GoogleSafeBrowsingService:
                 if threat_url and threat_type:
                     url_threats[threat_url].append(threat_type)
             
-            # Build results
-            results = []
+            # Build results (one timestamp for the whole response)
+            now = datetime.utcnow()
+            results = {}
             for url in urls:
                 threats = url_threats.get(url, [])
-                results.append(SafeBrowsingResult(
+                results[url] = SafeBrowsingResult(
                     url=url,
                     is_malicious=len(threats) > 0,
                     threats=threats,
-                    checked_at=datetime.utcnow(),
-                ))
+                    checked_at=now,
+                )
+            
+            # Only real verdicts are cached, never fail-open fallbacks
+            if self._cache is not None:
+                self._cache.update(results)
             
             return results
             
         except Exception as e:
             logger.error(f"Google Safe Browsing API error: {e}")
             # Return safe results on error (fail open)
-            return [
-                SafeBrowsingResult(
+            now = datetime.utcnow()
+            return {
+                url: SafeBrowsingResult(
                     url=url,
                     is_malicious=False,
                     threats=[],
-                    checked_at=datetime.utcnow(),
+                    checked_at=now,
                 )
                 for url in urls
-            ]
+            }
+
+
+class WhoisResultStore:
+    """
+    On-disk WHOIS results (SQLite), shared by worker processes and restarts.
+    
+    Only the registration facts are stored; the domain age is recomputed by
+    the caller on every read, so long expiries never serve a stale age.
+    """
+    
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database on first use (called with the lock held)"""
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=5.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS whois_results ("
+                "domain TEXT PRIMARY KEY, record TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+    
+    def get(self, domain: str) -> Optional[Dict]:
+        """
+        Fetch an unexpired record.
+        
+        Args:
+            domain: Domain looked up
+            
+        Returns:
+            Dict with creation_date, registrar and found, or None on a miss
+        """
+        try:
+            with self._lock:
+                row = self._connect().execute(
+                    "SELECT record FROM whois_results WHERE domain = ? AND expires_at > ?",
+                    (domain, time.time()),
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning("WHOIS store read failed for {}: {}", domain, e)
+            return None
+        
+        if row is None:
+            return None
+        
+        record = json_loads(row[0])
+        if record['creation_date']:
+            record['creation_date'] = datetime.fromisoformat(record['creation_date'])
+        return record
+    
+    def set(
+        self,
+        domain: str,
+        creation_date: Optional[datetime],
+        registrar: Optional[str],
+        found: bool,
+        ttl: float,
+    ):
+        """
+        Store a lookup outcome for ttl seconds.
+        
+        Args:
+            domain: Domain looked up
+            creation_date: Registration date (only datetimes are stored)
+            registrar: Registrar name
+            found: False for failed lookups (negative entries)
+            ttl: Seconds until the entry expires
+        """
+        record = json_dumps_str({
+            'creation_date': creation_date.isoformat() if isinstance(creation_date, datetime) else None,
+            'registrar': registrar if isinstance(registrar, str) else None,
+            'found': found,
+        })
+        try:
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO whois_results (domain, record, expires_at) VALUES (?, ?, ?)",
+                        (domain, record, time.time() + ttl),
+                    )
+        except sqlite3.Error as e:
+            logger.warning("WHOIS store write failed for {}: {}", domain, e)
+    
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
 
 
 class DomainAgeService:
@@ -197,9 +490,49 @@ class DomainAgeService:
     def __init__(self):
         self.enabled = WHOIS_AVAILABLE
         
+        # WHOIS results by domain; lookups run in worker threads, hence the lock
+        self._cache: Optional[TTLCache] = _new_cache(TTLCache, ttl=settings.WHOIS_CACHE_TTL)
+        self._cache_lock = threading.Lock()
+        
+        # Persistent results behind the in-memory cache
+        self._store: Optional[WhoisResultStore] = (
+            WhoisResultStore(settings.WHOIS_STORE_PATH) if settings.WHOIS_STORE_PATH else None
+        )
+        
+        # Blocking WHOIS lookups run here, capping concurrent WHOIS connections
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        
         if not self.enabled:
             logger.warning("WHOIS not available. Install python-whois.")
     
+    @staticmethod
+    def _build_result(domain: str, creation_date, registrar: Optional[str]) -> DomainAgeResult:
+        """Derive the domain age from a registration date"""
+        now = datetime.utcnow()
+        age_days = None
+        is_new_domain = False
+        
+        if creation_date:
+            if isinstance(creation_date, datetime):
+                age_days = (now - creation_date).days
+                is_new_domain = age_days < settings.MIN_DOMAIN_AGE_DAYS
+        
+        return DomainAgeResult(
+            domain=domain,
+            creation_date=creation_date,
+            age_days=age_days,
+            is_new_domain=is_new_domain,
+            registrar=registrar,
+            checked_at=now,
+        )
+    
+    def _remember(self, domain: str, result: DomainAgeResult):
+        """Keep a successful lookup in the in-memory cache"""
+        if self._cache is not None:
+            with self._cache_lock:
+                self._cache[domain] = result
+    
     def check_domain_age(self, domain: str) -> DomainAgeResult:
         """
         Check domain age using WHOIS lookup.
@@ -220,6 +553,20 @@ class DomainAgeService:
                 checked_at=datetime.utcnow(),
             )
         
+        if self._cache is not None:
+            with self._cache_lock:
+                cached = self._cache.get(domain)
+            if cached is not None:
+                return cached
+        
+        if self._store is not None:
+            stored = self._store.get(domain)
+            if stored is not None:
+                result = self._build_result(domain, stored['creation_date'], stored['registrar'])
+                if stored['found']:
+                    self._remember(domain, result)
+                return result
+        
         try:
             w = whois.whois(domain)
             
@@ -228,31 +575,27 @@ class DomainAgeService:
             if isinstance(creation_date, list):
                 creation_date = creation_date[0]
             
-            # Calculate age
-            age_days = None
-            is_new_domain = False
-            
-            if creation_date:
-                if isinstance(creation_date, datetime):
-                    age_days = (datetime.utcnow() - creation_date).days
-                    is_new_domain = age_days < settings.MIN_DOMAIN_AGE_DAYS
-            
             # Get registrar
             registrar = w.registrar
             if isinstance(registrar, list):
                 registrar = registrar[0]
             
-            return DomainAgeResult(
-                domain=domain,
-                creation_date=creation_date,
-                age_days=age_days,
-                is_new_domain=is_new_domain,
-                registrar=registrar,
-                checked_at=datetime.utcnow(),
-            )
+            result = self._build_result(domain, creation_date, registrar)
+            
+            # Failed lookups fall through to the except below and aren't cached
+            self._remember(domain, result)
+            if self._store is not None:
+                self._store.set(domain, creation_date, registrar, True, settings.WHOIS_STORE_TTL)
+            
+            return result
             
         except Exception as e:
             logger.warning(f"WHOIS lookup failed for {domain}: {e}")
+            
+            # Failures are only stored briefly, to back off rate-limiting servers
+            if self._store is not None:
+                self._store.set(domain, None, None, False, settings.WHOIS_NEGATIVE_TTL)
+            
             return DomainAgeResult(
                 domain=domain,
                 creation_date=None,
@@ -261,6 +604,47 @@ class DomainAgeService:
                 registrar=None,
                 checked_at=datetime.utcnow(),
             )
+    
+    async def check_domain_age_async(self, domain: str) -> DomainAgeResult:
+        """
+        Check domain age without blocking the event loop.
+        
+        Cached results are returned inline; lookups run on the service's
+        bounded WHOIS thread pool (WHOIS_MAX_WORKERS).
+        
+        Args:
+            domain: Domain to check (without protocol)
+            
+        Returns:
+            DomainAgeResult with age information
+        """
+        if self.enabled and self._cache is not None:
+            with self._cache_lock:
+                cached = self._cache.get(domain)
+            if cached is not None:
+                return cached
+        
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), self.check_domain_age, domain)
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """WHOIS thread pool, created on first use"""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=max(1, settings.WHOIS_MAX_WORKERS),
+                    thread_name_prefix="whois",
+                )
+            return self._executor
+    
+    def close(self):
+        """Stop the WHOIS thread pool and close the persistent store"""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+        if self._store is not None:
+            self._store.close()
 
 
 class DNSCheckService:
@@ -271,10 +655,31 @@ class DNSCheckService:
     
     def __init__(self):
         self.enabled = DNS_AVAILABLE
+        self._resolver = None
+        
+        # Caps domains being resolved at once (each one issues three queries)
+        self._resolve_limit = _LoopSemaphore(settings.DNS_MAX_CONCURRENCY)
+        
+        # (ttl, DNSCheckResult) by domain, expiring with the records' own TTL
+        self._cache: Optional[TLRUCache] = _new_cache(TLRUCache, ttu=self._cache_expiry)
         
         if not self.enabled:
             logger.warning("DNS resolver not available. Install dnspython.")
     
+    @staticmethod
+    def _cache_expiry(domain: str, entry: Tuple[float, DNSCheckResult], now: float) -> float:
+        """TLRUCache time-to-use: the answers' TTL, clamped to the configured bounds"""
+        ttl, _ = entry
+        return now + min(max(ttl, settings.DNS_CACHE_MIN_TTL), settings.DNS_CACHE_MAX_TTL)
+    
+    def _get_resolver(self):
+        """Shared async resolver (system configuration), created on first use"""
+        if self._resolver is None:
+            resolver = dns.asyncresolver.Resolver()
+            resolver.lifetime = settings.DNS_TIMEOUT
+            self._resolver = resolver
+        return self._resolver
+    
     async def check_domain(self, domain: str) -> DNSCheckResult:
         """
         Check DNS records for a domain.
@@ -300,36 +705,54 @@ class DNSCheckService:
                 checked_at=datetime.utcnow(),
             )
         
+        if self._cache is not None:
+            cached = self._cache.get(domain)
+            if cached is not None:
+                return cached[1]
+        
+        cacheable = False
+        ttl = 0.0
+        
         try:
+            # A, MX and TXT (SPF) queries run concurrently without blocking the loop
+            resolver = self._get_resolver()
+            record_types = ('A', 'MX', 'TXT')
+            async with self._resolve_limit.get():
+                responses = await asyncio.gather(
+                    *(resolver.resolve(domain, record_type) for record_type in record_types),
+                    return_exceptions=True,
+                )
+            
+            answers = {}
+            cacheable = True
+            for record_type, response in zip(record_types, responses):
+                if isinstance(response, (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer)):
+                    continue
+                if isinstance(response, Exception):
+                    logger.warning(f"DNS {record_type} lookup failed for {domain}: {response}")
+                    cacheable = False
+                    continue
+                answers[record_type] = response
+            
+            # Missing records are cached for the minimum TTL
+            ttl = min((answer.rrset.ttl for answer in answers.values()), default=0)
+            
             # Check A records
-            try:
-                answers = dns.resolver.resolve(domain, 'A')
+            if 'A' in answers:
                 has_a = True
-                ip_addresses = [str(rdata) for rdata in answers]
-            except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
-                pass
+                ip_addresses = [str(rdata) for rdata in answers['A']]
             
             # Check MX records
-            try:
-                dns.resolver.resolve(domain, 'MX')
-                has_mx = True
-            except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
-                pass
+            has_mx = 'MX' in answers
             
             # Check SPF (TXT records)
-            try:
-                answers = dns.resolver.resolve(domain, 'TXT')
-                for rdata in answers:
-                    if 'v=spf1' in str(rdata):
-                        has_spf = True
-                        break
-            except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
-                pass
+            has_spf = any('v=spf1' in str(rdata) for rdata in answers.get('TXT', ()))
                 
         except Exception as e:
             logger.warning(f"DNS check failed for {domain}: {e}")
+            cacheable = False
         
-        return DNSCheckResult(
+        result = DNSCheckResult(
             domain=domain,
             has_a_record=has_a,
             has_mx_record=has_mx,
@@ -337,6 +760,12 @@ class DNSCheckService:
             ip_addresses=ip_addresses,
             checked_at=datetime.utcnow(),
         )
+        
+        # Only complete answers are cached, never results of failed queries
+        if cacheable and self._cache is not None:
+            self._cache[domain] = (ttl, result)
+        
+        return result
 
 
 class VirusTotalService:
@@ -349,10 +778,23 @@ class VirusTotalService:
     def __init__(self, api_key: Optional[str] = None):
         self.api_key = api_key or settings.VIRUSTOTAL_API_KEY
         self.enabled = bool(self.api_key)
+        self._http: Optional[httpx.AsyncClient] = None
         
         if not self.enabled:
             logger.info("VirusTotal API key not configured")
     
+    def _client(self) -> httpx.AsyncClient:
+        """HTTP client, created on first use (inside the running event loop)"""
+        if self._http is None:
+            self._http = _new_http_client()
+        return self._http
+    
+    async def aclose(self):
+        """Close the pooled HTTP connections"""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+    
     async def check_url(self, url: str) -> Dict:
         """
         Check URL against VirusTotal.
@@ -370,19 +812,17 @@ class VirusTotalService:
             # URL needs to be base64 encoded
             url_id = base64.urlsafe_b64encode(url.encode()).decode().strip("=")
             
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.API_URL}/urls/{url_id}",
-                    headers={"x-apikey": self.api_key},
-                    timeout=10.0,
-                )
-                
-                if response.status_code == 404:
-                    # URL not in database, submit for scanning
-                    return {"status": "not_found", "url": url}
-                
-                response.raise_for_status()
-                return response.json()
+            response = await self._client().get(
+                f"{self.API_URL}/urls/{url_id}",
+                headers={"x-apikey": self.api_key},
+            )
+            
+            if response.status_code == 404:
+                # URL not in database, submit for scanning
+                return {"status": "not_found", "url": url}
+            
+            response.raise_for_status()
+            return json_loads(response.content)
                 
         except Exception as e:
             logger.error(f"VirusTotal API error: {e}")
@@ -401,6 +841,12 @@ class ExternalServicesManager:
         self.dns_check = DNSCheckService()
         self.virustotal = VirusTotalService()
     
+    async def aclose(self):
+        """Close the HTTP clients of the API-backed services and the WHOIS store"""
+        await self.safe_browsing.aclose()
+        await self.virustotal.aclose()
+        self.domain_age.close()
+    
     async def comprehensive_check(self, url: str, domain: str) -> Dict:
         """
         Perform comprehensive external checks.
@@ -412,44 +858,57 @@ class ExternalServicesManager:
         Returns:
             Dictionary with all check results
         """
-        results = {
-            'safe_browsing': None,
-            'domain_age': None,
-            'dns': None,
+        # Run checks concurrently (each one reports None on failure)
+        safe_browsing, domain_age, dns_records = await asyncio.gather(
+            self._safe_browsing_check(url),
+            self._domain_age_check(domain),
+            self._dns_check(domain),
+        )
+        
+        return {
+            'safe_browsing': safe_browsing,
+            'domain_age': domain_age,
+            'dns': dns_records,
             'virustotal': None,
         }
-        
-        # Run checks concurrently
+    
+    async def _safe_browsing_check(self, url: str) -> Optional[Dict]:
+        """Safe Browsing slot of comprehensive_check"""
         try:
             safe_browsing_result = await self.safe_browsing.check_url(url)
-            results['safe_browsing'] = {
+            return {
                 'is_malicious': safe_browsing_result.is_malicious,
                 'threats': safe_browsing_result.threats,
             }
         except Exception as e:
             logger.error(f"Safe browsing check failed: {e}")
-        
+            return None
+    
+    async def _domain_age_check(self, domain: str) -> Optional[Dict]:
+        """Domain age slot of comprehensive_check"""
         try:
-            domain_age_result = self.domain_age.check_domain_age(domain)
-            results['domain_age'] = {
+            domain_age_result = await self.domain_age.check_domain_age_async(domain)
+            return {
                 'age_days': domain_age_result.age_days,
                 'is_new_domain': domain_age_result.is_new_domain,
                 'registrar': domain_age_result.registrar,
             }
         except Exception as e:
             logger.error(f"Domain age check failed: {e}")
-        
+            return None
+    
+    async def _dns_check(self, domain: str) -> Optional[Dict]:
+        """DNS slot of comprehensive_check"""
         try:
             dns_result = await self.dns_check.check_domain(domain)
-            results['dns'] = {
+            return {
                 'has_a_record': dns_result.has_a_record,
                 'has_mx_record': dns_result.has_mx_record,
                 'ip_addresses': dns_result.ip_addresses,
             }
         except Exception as e:
             logger.error(f"DNS check failed: {e}")
-        
-        return results
+            return None
     
     def calculate_risk_adjustment(self, check_results: Dict) -> float:
         """
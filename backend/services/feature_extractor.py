@@ -6,17 +6,24 @@ Extracts various features from URLs for phishing detection
 import re
 import math
 import socket
+import threading
 from typing import Dict, List, Optional, Tuple
-from urllib.parse import urlparse, parse_qs, unquote
+from urllib.parse import urlparse, unquote
 from collections import Counter
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, fields
+from functools import lru_cache
+from ipaddress import IPv6Address
 
+import numpy as np
 import tldextract
+from cachetools import LRUCache
 
+from config.settings import settings
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class URLFeatures:
-    """Data class containing all extracted URL features"""
+    """Data class containing all extracted URL features (shared via the cache, so immutable)"""
     
     # Basic features
     url: str
@@ -66,7 +73,11 @@ class URLFeatures:
     domain_in_path: int
     
     def to_dict(self) -> Dict:
-        return asdict(self)
+        # Every field is a scalar, so asdict()'s recursive copy is unnecessary
+        return {name: getattr(self, name) for name in _URL_FEATURE_FIELDS}
+
+
+_URL_FEATURE_FIELDS = tuple(f.name for f in fields(URLFeatures))
 
 
 class URLFeatureExtractor:
@@ -81,21 +92,51 @@ class URLFeatureExtractor:
     # Hex encoded pattern
     HEX_PATTERN = re.compile(r'%[0-9a-fA-F]{2}')
     
-    # Punycode pattern
-    PUNYCODE_PATTERN = re.compile(r'xn--')
+    # ASCII byte -> character class (D)igit, (U)pper, (L)ower or (S)pecial
+    CHAR_CLASS_TABLE = bytes(
+        ord('D') if chr(i).isdigit() else
+        ord('U') if chr(i).isupper() else
+        ord('L') if chr(i).islower() else
+        ord('S')
+        for i in range(256)
+    )
+    
+    # Vectorized batch featurization: ASCII code -> class index (digit, upper,
+    # lower, special) and ASCII code -> lowercased code
+    CHAR_CLASS_CODES = np.array(
+        [b'DULS'.index(code) for code in CHAR_CLASS_TABLE[:128]], dtype=np.intp
+    )
+    LOWER_CODES = np.array([ord(chr(i).lower()) for i in range(128)], dtype=np.intp)
+    
+    # URLs featurized per NumPy pass (bounds the per-URL histogram memory)
+    VECTOR_CHUNK_SIZE = 4096
     
     # Standard ports
-    STANDARD_PORTS = {80, 443, 8080}
+    STANDARD_PORTS = frozenset({80, 443, 8080})
     
     # Common TLDs for brands (for domain_in_path detection)
-    COMMON_BRAND_DOMAINS = {
+    COMMON_BRAND_DOMAINS = frozenset({
         'google', 'facebook', 'apple', 'microsoft', 'amazon',
         'paypal', 'ebay', 'netflix', 'instagram', 'twitter',
         'linkedin', 'yahoo', 'outlook', 'banking', 'bank'
-    }
+    })
+    
+    # One C-level pass deciding whether any brand occurs in a path at all
+    BRAND_PATTERN = re.compile('|'.join(
+        re.escape(brand) for brand in sorted(COMMON_BRAND_DOMAINS, key=len, reverse=True)
+    ))
     
     def __init__(self):
-        self.tld_extractor = tldextract.TLDExtract(cache_dir=None)
+        # Bundled PSL snapshot only: no network fetch on first use
+        self.tld_extractor = tldextract.TLDExtract(suffix_list_urls=(), cache_dir=None)
+        
+        # Hosts repeat far more often than whole URLs
+        self._extract_host = lru_cache(maxsize=settings.TLD_EXTRACT_CACHE_SIZE)(self.tld_extractor.extract_str)
+        
+        # Features are a pure function of the URL string
+        cache_size = settings.FEATURE_CACHE_SIZE
+        self._feature_cache: Optional[LRUCache] = LRUCache(maxsize=cache_size) if cache_size > 0 else None
+        self._feature_cache_lock = threading.Lock()
     
     def extract_features(self, url: str) -> URLFeatures:
         """
@@ -107,33 +148,57 @@ class URLFeatureExtractor:
         Returns:
             URLFeatures dataclass with all extracted features
         """
+        if self._feature_cache is None:
+            return self._extract_features_uncached(url)
+        
+        with self._feature_cache_lock:
+            cached = self._feature_cache.get(url)
+        if cached is not None:
+            return cached
+        
+        features = self._extract_features_uncached(url)
+        with self._feature_cache_lock:
+            self._feature_cache[url] = features
+        return features
+    
+    def cache_clear(self):
+        """Drop all cached feature extractions"""
+        if self._feature_cache is not None:
+            with self._feature_cache_lock:
+                self._feature_cache.clear()
+    
+    def _extract_features_uncached(self, url: str) -> URLFeatures:
+        """Extract features from a URL, bypassing the feature cache"""
         # Normalize URL
-        url = url.strip()
-        if not url.startswith(('http://', 'https://')):
-            url = 'http://' + url
+        url = self._normalize_url(url)
         
         # Parse URL components
         parsed = urlparse(url)
-        extracted = self.tld_extractor(url)
+        extracted = self._extract_host(parsed.netloc)
         
         # Basic features
         length = len(url)
         entropy = self._calculate_entropy(url)
         
         # Character analysis
-        chars = self._analyze_characters(url)
+        (digits, letters, uppercase, lowercase, special,
+         digit_ratio, letter_ratio, special_ratio) = self._analyze_characters(url)
         
         # URL structure analysis
-        structure = self._analyze_structure(parsed, extracted)
+        (has_ip, has_punycode, has_encoded, num_subdomains,
+         path_length, query_length, fragment_length) = self._analyze_structure(parsed, extracted)
         
         # Domain info
-        domain_info = self._extract_domain_info(extracted)
+        domain, subdomain, suffix, full_domain = self._extract_domain_info(extracted)
         
         # Additional features
-        additional = self._extract_additional_features(url, parsed)
+        (num_dots, num_hyphens, num_underscores, num_slashes, num_at,
+         num_params, has_https, has_www) = self._extract_additional_features(url, parsed)
         
         # Suspicious patterns
-        suspicious = self._detect_suspicious_patterns(url, parsed, extracted)
+        suspicious_port, double_slash_redirect, domain_in_path = (
+            self._detect_suspicious_patterns(url, parsed, extracted)
+        )
         
         return URLFeatures(
             url=url,
@@ -141,115 +206,161 @@ class URLFeatureExtractor:
             entropy=entropy,
             
             # Character counts
-            digits=chars['digits'],
-            letters=chars['letters'],
-            special_chars=chars['special'],
-            uppercase=chars['uppercase'],
-            lowercase=chars['lowercase'],
+            digits=digits,
+            letters=letters,
+            special_chars=special,
+            uppercase=uppercase,
+            lowercase=lowercase,
             
             # Ratios
-            digit_ratio=chars['digit_ratio'],
-            letter_ratio=chars['letter_ratio'],
-            special_char_ratio=chars['special_ratio'],
+            digit_ratio=digit_ratio,
+            letter_ratio=letter_ratio,
+            special_char_ratio=special_ratio,
             
             # URL structure
-            has_ip=structure['has_ip'],
-            has_punycode=structure['has_punycode'],
-            has_encoded=structure['has_encoded'],
-            num_subdomains=structure['num_subdomains'],
-            path_length=structure['path_length'],
-            query_length=structure['query_length'],
-            fragment_length=structure['fragment_length'],
+            has_ip=has_ip,
+            has_punycode=has_punycode,
+            has_encoded=has_encoded,
+            num_subdomains=num_subdomains,
+            path_length=path_length,
+            query_length=query_length,
+            fragment_length=fragment_length,
             
             # Domain info
-            domain=domain_info['domain'],
-            subdomain=domain_info['subdomain'],
-            suffix=domain_info['suffix'],
-            full_domain=domain_info['full_domain'],
+            domain=domain,
+            subdomain=subdomain,
+            suffix=suffix,
+            full_domain=full_domain,
             
             # Additional features
-            num_dots=additional['num_dots'],
-            num_hyphens=additional['num_hyphens'],
-            num_underscores=additional['num_underscores'],
-            num_slashes=additional['num_slashes'],
-            num_at_symbols=additional['num_at'],
-            num_params=additional['num_params'],
-            has_https=additional['has_https'],
-            has_www=additional['has_www'],
+            num_dots=num_dots,
+            num_hyphens=num_hyphens,
+            num_underscores=num_underscores,
+            num_slashes=num_slashes,
+            num_at_symbols=num_at,
+            num_params=num_params,
+            has_https=has_https,
+            has_www=has_www,
             
             # Suspicious patterns
-            has_suspicious_port=suspicious['suspicious_port'],
-            has_double_slash_redirect=suspicious['double_slash_redirect'],
-            domain_in_path=suspicious['domain_in_path'],
+            has_suspicious_port=suspicious_port,
+            has_double_slash_redirect=double_slash_redirect,
+            domain_in_path=domain_in_path,
         )
     
+    @staticmethod
+    def _normalize_url(url: str) -> str:
+        """Strip whitespace and default to http:// when no scheme is given"""
+        url = url.strip()
+        if not url.startswith(('http://', 'https://')):
+            url = 'http://' + url
+        return url
+    
     def _calculate_entropy(self, text: str) -> float:
         """Calculate Shannon entropy of a string"""
         if not text:
             return 0.0
         
+        # Counter's counting loop runs in C; every count it yields is positive
         counter = Counter(text.lower())
         length = len(text)
+        log2 = math.log2
         
         entropy = 0.0
         for count in counter.values():
-            if count > 0:
-                prob = count / length
-                entropy -= prob * math.log2(prob)
+            prob = count / length
+            entropy -= prob * log2(prob)
         
         return round(entropy, 6)
     
-    def _analyze_characters(self, url: str) -> Dict:
-        """Analyze character composition of URL"""
-        url_lower = url.lower()
+    def _analyze_characters(self, url: str) -> Tuple[int, int, int, int, int, float, float, float]:
+        """
+        Analyze character composition of URL
+        
+        Returns:
+            (digits, letters, uppercase, lowercase, special,
+             digit_ratio, letter_ratio, special_ratio)
+        """
         length = len(url) if url else 1
         
-        digits = sum(1 for c in url if c.isdigit())
-        letters = sum(1 for c in url if c.isalpha())
-        uppercase = sum(1 for c in url if c.isupper())
-        lowercase = sum(1 for c in url if c.islower())
-        special = sum(1 for c in url if not c.isalnum())
-        
-        return {
-            'digits': digits,
-            'letters': letters,
-            'uppercase': uppercase,
-            'lowercase': lowercase,
-            'special': special,
-            'digit_ratio': round(digits / length, 4),
-            'letter_ratio': round(letters / length, 4),
-            'special_ratio': round(special / length, 4),
-        }
-    
-    def _analyze_structure(self, parsed, extracted) -> Dict:
-        """Analyze URL structure"""
+        if url.isascii():
+            # One C-level translate pass, then four C-level counts
+            classes = url.encode('ascii').translate(self.CHAR_CLASS_TABLE)
+            digits = classes.count(b'D')
+            uppercase = classes.count(b'U')
+            lowercase = classes.count(b'L')
+            letters = uppercase + lowercase
+            special = classes.count(b'S')
+        else:
+            # Unicode classes (IDNs etc.) don't fit a byte table
+            digits = sum(1 for c in url if c.isdigit())
+            letters = sum(1 for c in url if c.isalpha())
+            uppercase = sum(1 for c in url if c.isupper())
+            lowercase = sum(1 for c in url if c.islower())
+            special = sum(1 for c in url if not c.isalnum())
+        
+        return (
+            digits, letters, uppercase, lowercase, special,
+            round(digits / length, 4),
+            round(letters / length, 4),
+            round(special / length, 4),
+        )
+    
+    @classmethod
+    def _is_ip_host(cls, hostname: str) -> int:
+        """1 if the hostname is an IPv4 or IPv6 literal, else 0"""
+        # Only IPv6 literals contain ':' (urlparse strips brackets and port)
+        if ':' in hostname:
+            try:
+                IPv6Address(hostname)
+                return 1
+            except ValueError:
+                return 0
+        
+        # IPv4 literals start with a digit; nearly every hostname is rejected here
+        if not hostname[:1].isdigit():
+            return 0
+        return 1 if cls.IP_PATTERN.match(hostname) else 0
+    
+    def _analyze_structure(self, parsed, extracted) -> Tuple[int, int, int, int, int, int, int]:
+        """
+        Analyze URL structure
+        
+        Returns:
+            (has_ip, has_punycode, has_encoded, num_subdomains,
+             path_length, query_length, fragment_length)
+        """
         hostname = parsed.hostname or ''
         
         # Check for IP address
-        has_ip = 1 if self.IP_PATTERN.match(hostname) else 0
+        has_ip = self._is_ip_host(hostname)
         
-        # Check for punycode (IDN)
-        has_punycode = 1 if self.PUNYCODE_PATTERN.search(hostname) else 0
+        # Check for punycode (IDN); a literal prefix needs no regex
+        has_punycode = 1 if 'xn--' in hostname else 0
         
-        # Check for URL encoding
-        has_encoded = 1 if self.HEX_PATTERN.search(parsed.path + parsed.query) else 0
+        # Check for URL encoding; most URLs have no '%' and skip the join and regex
+        # (a joined search still catches an escape split across path and query)
+        path, query = parsed.path, parsed.query
+        has_encoded = 0
+        if '%' in path or '%' in query:
+            has_encoded = 1 if self.HEX_PATTERN.search(path + query) else 0
         
         # Count subdomains
         subdomain = extracted.subdomain
         num_subdomains = len(subdomain.split('.')) if subdomain else 0
         
-        return {
-            'has_ip': has_ip,
-            'has_punycode': has_punycode,
-            'has_encoded': has_encoded,
-            'num_subdomains': num_subdomains,
-            'path_length': len(parsed.path),
-            'query_length': len(parsed.query),
-            'fragment_length': len(parsed.fragment),
-        }
-    
-    def _extract_domain_info(self, extracted) -> Dict:
-        """Extract domain information"""
+        return (
+            has_ip, has_punycode, has_encoded, num_subdomains,
+            len(path), len(query), len(parsed.fragment),
+        )
+    
+    def _extract_domain_info(self, extracted) -> Tuple[str, str, str, str]:
+        """
+        Extract domain information
+        
+        Returns:
+            (domain, subdomain, suffix, full_domain)
+        """
         domain = extracted.domain or ''
         subdomain = extracted.subdomain or ''
         suffix = extracted.suffix or ''
@@ -257,15 +368,36 @@ class URLFeatureExtractor:
         # Full registered domain
         full_domain = extracted.registered_domain or f"{domain}.{suffix}"
         
-        return {
-            'domain': domain,
-            'subdomain': subdomain,
-            'suffix': suffix,
-            'full_domain': full_domain,
-        }
+        return domain, subdomain, suffix, full_domain
+    
+    @staticmethod
+    def _count_query_params(query: str) -> int:
+        """
+        Count distinct query keys the way len(parse_qs(query)) does
+        
+        Keys without a value are ignored, and keys are only unquoted when
+        they contain an escape, so the common case builds no decoded strings.
+        """
+        if not query:
+            return 0
+        
+        keys = set()
+        for pair in query.split('&'):
+            key, _, value = pair.partition('=')
+            if value:
+                if '%' in key or '+' in key:
+                    key = unquote(key.replace('+', ' '))
+                keys.add(key)
+        return len(keys)
     
-    def _extract_additional_features(self, url: str, parsed) -> Dict:
-        """Extract additional URL features"""
+    def _extract_additional_features(self, url: str, parsed) -> Tuple[int, int, int, int, int, int, int, int]:
+        """
+        Extract additional URL features
+        
+        Returns:
+            (num_dots, num_hyphens, num_underscores, num_slashes, num_at,
+             num_params, has_https, has_www)
+        """
         # Count special characters
         num_dots = url.count('.')
         num_hyphens = url.count('-')
@@ -274,26 +406,24 @@ class URLFeatureExtractor:
         num_at = url.count('@')
         
         # Count query parameters
-        params = parse_qs(parsed.query)
-        num_params = len(params)
+        num_params = self._count_query_params(parsed.query)
         
         # Protocol and www
         has_https = 1 if parsed.scheme == 'https' else 0
         has_www = 1 if (parsed.hostname or '').startswith('www.') else 0
         
-        return {
-            'num_dots': num_dots,
-            'num_hyphens': num_hyphens,
-            'num_underscores': num_underscores,
-            'num_slashes': num_slashes,
-            'num_at': num_at,
-            'num_params': num_params,
-            'has_https': has_https,
-            'has_www': has_www,
-        }
-    
-    def _detect_suspicious_patterns(self, url: str, parsed, extracted) -> Dict:
-        """Detect suspicious patterns in URL"""
+        return (
+            num_dots, num_hyphens, num_underscores, num_slashes, num_at,
+            num_params, has_https, has_www,
+        )
+    
+    def _detect_suspicious_patterns(self, url: str, parsed, extracted) -> Tuple[int, int, int]:
+        """
+        Detect suspicious patterns in URL
+        
+        Returns:
+            (suspicious_port, double_slash_redirect, domain_in_path)
+        """
         # Check for suspicious port
         suspicious_port = 0
         if parsed.port and parsed.port not in self.STANDARD_PORTS:
@@ -305,16 +435,15 @@ class URLFeatureExtractor:
         # Check if common brand domain appears in path (potential phishing)
         domain_in_path = 0
         path_lower = parsed.path.lower()
-        for brand in self.COMMON_BRAND_DOMAINS:
-            if brand in path_lower and brand not in (extracted.domain or '').lower():
-                domain_in_path = 1
-                break
+        if self.BRAND_PATTERN.search(path_lower):
+            # Rare case: find a brand in the path that the domain doesn't carry
+            domain_lower = (extracted.domain or '').lower()
+            for brand in self.COMMON_BRAND_DOMAINS:
+                if brand in path_lower and brand not in domain_lower:
+                    domain_in_path = 1
+                    break
         
-        return {
-            'suspicious_port': suspicious_port,
-            'double_slash_redirect': double_slash_redirect,
-            'domain_in_path': domain_in_path,
-        }
+        return suspicious_port, double_slash_redirect, domain_in_path
     
     def extract_lgbm_features(self, url: str) -> List[float]:
         """
@@ -325,8 +454,19 @@ class URLFeatureExtractor:
                   url_len, url_entropy, letters, has_punycode, has_encoded, 
                   num_subdomains, and additional computed features
         """
-        features = self.extract_features(url)
+        return self.lgbm_row(self.extract_features(url))
+    
+    @staticmethod
+    def lgbm_row(features: URLFeatures) -> List[float]:
+        """
+        Pack already-extracted features into a LightGBM feature row
         
+        Args:
+            features: Features from extract_features
+            
+        Returns:
+            Feature values in the order expected by the LightGBM model
+        """
         # Return features in order expected by LGBM model
         # Based on analysis of the model's feature_names
         return [
@@ -347,6 +487,78 @@ class URLFeatureExtractor:
     def extract_batch_lgbm_features(self, urls: List[str]) -> List[List[float]]:
         """Extract LightGBM features for a batch of URLs"""
         return [self.extract_lgbm_features(url) for url in urls]
+    
+    def extract_batch_lgbm_features_vec(self, urls: List[str]) -> np.ndarray:
+        """
+        Extract LightGBM features for a batch of URLs, vectorized
+        
+        Length, entropy and character counts come from NumPy passes over the
+        concatenated URLs; only the structural columns are parsed per URL.
+        Rows equal extract_lgbm_features (non-ASCII URLs go through it).
+        
+        Args:
+            urls: URLs to featurize
+        
+        Returns:
+            (len(urls), 12) float64 feature matrix
+        """
+        out = np.empty((len(urls), 12), dtype=np.float64)
+        normalized = [self._normalize_url(url) for url in urls]
+        
+        ascii_rows = []
+        for i, url in enumerate(normalized):
+            if url.isascii():
+                ascii_rows.append(i)
+            else:
+                out[i] = self.extract_lgbm_features(urls[i])
+        
+        step = self.VECTOR_CHUNK_SIZE
+        for start in range(0, len(ascii_rows), step):
+            rows = ascii_rows[start:start + step]
+            self._fill_lgbm_rows(out, rows, [normalized[i] for i in rows])
+        return out
+    
+    def _fill_lgbm_rows(self, out: np.ndarray, rows: List[int], urls: List[str]):
+        """Fill LightGBM feature rows for normalized ASCII URLs"""
+        n = len(urls)
+        lengths = np.fromiter(map(len, urls), dtype=np.intp, count=n)
+        codes = np.frombuffer(''.join(urls).encode('ascii'), dtype=np.uint8)
+        
+        # Owning URL of every byte; normalized URLs are never empty
+        owner = np.repeat(np.arange(n), lengths)
+        
+        # Per-URL character class counts: digit, upper, lower, special
+        class_counts = np.bincount(
+            owner * 4 + self.CHAR_CLASS_CODES[codes], minlength=n * 4
+        ).reshape(n, 4)
+        
+        # Shannon entropy of the lowercased URL from per-URL histograms
+        histograms = np.bincount(
+            owner * 128 + self.LOWER_CODES[codes], minlength=n * 128
+        ).reshape(n, 128)
+        probs = histograms / lengths[:, None]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            terms = np.where(histograms > 0, probs * np.log2(probs), 0.0)
+        entropy = [round(value, 6) for value in (-terms.sum(axis=1)).tolist()]
+        
+        # Structural columns still need the parsed URL
+        structure = np.empty((n, 5), dtype=np.float64)
+        for j, url in enumerate(urls):
+            parsed = urlparse(url)
+            structure[j] = self._analyze_structure(parsed, self._extract_host(parsed.netloc))[:5]
+        
+        # Same column order as lgbm_row
+        block = out[rows]
+        block[:, 0] = lengths
+        block[:, 1] = entropy
+        block[:, 2] = class_counts[:, 0]
+        block[:, 3] = class_counts[:, 3]
+        block[:, 4] = structure[:, 0]
+        block[:, 5] = lengths
+        block[:, 6] = entropy
+        block[:, 7] = class_counts[:, 1] + class_counts[:, 2]
+        block[:, 8:12] = structure[:, 1:5]
+        out[rows] = block
 
 
 # Singleton instance
@@ -0,0 +1,169 @@
+"""
+Scan Micro-Batcher
+Coalesces concurrent single-URL scan requests into batched predictions
+"""
+
+import asyncio
+from abc import ABC, abstractmethod
+from concurrent.futures import Executor
+from typing import Any, List, Optional, Tuple
+
+from loguru import logger
+
+from config.settings import settings
+from services.ensemble_predictor import get_ensemble_predictor, EnsemblePrediction
+
+
+class AsyncBatcher(ABC):
+    """
+    Collects items submitted from concurrent coroutines and processes
+    them together.
+
+    A batch is flushed when it reaches max_batch_size items, or when the
+    oldest queued item has waited max_queue_time seconds. Each caller
+    awaits its own future, resolved when its batch completes.
+    """
+
+    def __init__(
+        self,
+        max_batch_size: int = 32,
+        max_queue_time: float = 0.01,
+        executor: Optional[Executor] = None,
+    ):
+        """
+        Initialize the batcher.
+
+        Args:
+            max_batch_size: Maximum number of items per batch
+            max_queue_time: Maximum time (seconds) an item waits before flushing
+            executor: Executor for running process_batch (default loop executor if None)
+        """
+        self.max_batch_size = max_batch_size
+        self.max_queue_time = max_queue_time
+        self.executor = executor
+
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @abstractmethod
+    def process_batch(self, items: List[Any]) -> List[Any]:
+        """
+        Process a batch of items. Runs in the executor.
+
+        Must return one result per item, in the same order.
+        """
+
+    def process_item(self, item: Any) -> Any:
+        """
+        Process a single item. Runs in the executor.
+
+        Used to retry items one by one when their batch raises, so one bad
+        item only fails its own caller.
+        """
+        return self.process_batch([item])[0]
+
+    def _process_each(self, items: List[Any]) -> List[Tuple[bool, Any]]:
+        """Run process_item per item, capturing each outcome"""
+        outcomes = []
+        for item in items:
+            try:
+                outcomes.append((True, self.process_item(item)))
+            except Exception as e:
+                outcomes.append((False, e))
+        return outcomes
+
+    async def process(self, item: Any) -> Any:
+        """
+        Submit an item and wait for its result.
+
+        Args:
+            item: Item to process
+
+        Returns:
+            Result for this item from process_batch
+        """
+        loop = asyncio.get_running_loop()
+
+        # Queued futures belong to the loop that created them
+        if loop is not self._loop:
+            self._loop = loop
+            self._pending = []
+            self._flush_handle = None
+
+        future = loop.create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_queue_time, self._flush)
+
+        return await future
+
+    def _flush(self):
+        """Hand the queued items off to a batch task"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        if not self._pending:
+            return
+
+        batch = self._pending
+        self._pending = []
+        self._loop.create_task(self._run_batch(batch))
+
+    async def _run_batch(self, batch: List[Tuple[Any, asyncio.Future]]):
+        """Run process_batch and resolve each caller's future"""
+        items = [item for item, _ in batch]
+
+        try:
+            results = await self._loop.run_in_executor(
+                self.executor, self.process_batch, items
+            )
+        except Exception as e:
+            if len(items) == 1:
+                logger.error("Batch processing failed (1 item): {}", e)
+                if not batch[0][1].done():
+                    batch[0][1].set_exception(e)
+                return
+
+            # Isolate the failing items instead of failing the whole window
+            logger.warning("Batch processing failed ({} items), retrying individually: {}", len(items), e)
+            outcomes = await self._loop.run_in_executor(
+                self.executor, self._process_each, items
+            )
+            for (_, future), (ok, value) in zip(batch, outcomes):
+                if future.done():
+                    continue
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+
+class ScanBatcher(AsyncBatcher):
+    """Micro-batcher for single-URL scan endpoints"""
+
+    def process_batch(self, urls: List[str]) -> List[EnsemblePrediction]:
+        """Run one batched ensemble prediction for the queued URLs"""
+        predictor = get_ensemble_predictor()
+        return predictor.predict_batch(urls)
+
+    def process_item(self, url: str) -> EnsemblePrediction:
+        """Predict one URL on its own (batch failure fallback)"""
+        predictor = get_ensemble_predictor()
+        return predictor.predict(url)
+
+
+# Singleton instance
+scan_batcher = ScanBatcher(
+    max_batch_size=settings.SCAN_BATCH_MAX_SIZE,
+    max_queue_time=settings.SCAN_BATCH_MAX_WAIT,
+)
@@ -0,0 +1,31 @@
+"""
+Shared pytest configuration
+"""
+
+import httpx
+import pytest
+import pytest_asyncio
+import sys
+from pathlib import Path
+from fastapi.testclient import TestClient
+
+# Import will work when running from any directory
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from main import app
+
+
+@pytest.fixture(scope="session")
+def client():
+    """Create test client (app startup and shutdown run once per session)"""
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def async_client():
+    """Create an in-process async client sharing one event loop with the app"""
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as test_client:
+            yield test_client
@@ -2,21 +2,35 @@
 Tests for the phishing detection API
 """
 
+import asyncio
+import dataclasses
+import json
 import pytest
-from fastapi.testclient import TestClient
 
-# Import will work when running from backend directory
-import sys
-from pathlib import Path
-sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from main import app
+SCAN_URLS = [
+    "https://www.google.com",
+    "https://www.wikipedia.org",
+    "https://www.apple.com",
+    "https://www.microsoft.com",
+    "http://192.168.1.1/login",
+    "http://example.tk",
+    "https://randomsite123456.xyz",
+]
 
 
-@pytest.fixture
-def client():
-    """Create test client"""
-    return TestClient(app)
+@pytest.fixture(scope="session")
+def scan_results(client):
+    """Scan every test URL in one batch request, keyed by URL"""
+    response = client.post(
+        "/api/v1/scan/batch",
+        json={"urls": SCAN_URLS, "include_details": True}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    
+    assert data["total_urls"] == len(SCAN_URLS)
+    return {result["url"]: result for result in data["results"]}
 
 
 class TestHealthEndpoints:
@@ -43,6 +57,41 @@ class TestHealthEndpoints:
         assert response.status_code in [200, 503]
 
 
+class TestStatusWhileLoading:
+    """Test status endpoints answer while models are still loading"""
+    
+    @pytest.fixture
+    def models_loading(self, client, monkeypatch):
+        """Simulate a background load in progress: no predictor yet, load lock held"""
+        from services import ensemble_predictor
+        
+        monkeypatch.setattr(ensemble_predictor, "_ensemble_predictor", None)
+        with ensemble_predictor._ensemble_predictor_lock:
+            yield
+    
+    def test_ready_reports_loading(self, client, models_loading):
+        """Test readiness returns 503 instead of waiting for the load"""
+        response = client.get("/ready")
+        assert response.status_code == 503
+        assert response.json()["reason"] == "models loading"
+    
+    def test_health_reports_loading(self, client, models_loading):
+        """Test health endpoints report unloaded models without waiting"""
+        response = client.get("/health")
+        assert response.status_code == 200
+        assert response.json()["models_loaded"] is False
+        
+        response = client.get("/api/v1/health")
+        assert response.status_code == 200
+        assert response.json()["status"] == "degraded"
+        
+        response = client.get("/api/v1/models/status")
+        assert response.status_code == 200
+        assert response.json()["ensemble_ready"] is False
+        
+        assert client.get("/live").status_code == 200
+
+
 class TestURLFeatures:
     """Test URL feature extraction"""
     
@@ -118,23 +167,84 @@ class TestURLScan:
         assert "probability" in data
         assert "risk_level" in data
     
-    def test_batch_scan(self, client):
+    def test_batch_scan(self, scan_results):
         """Test batch scan endpoint"""
+        assert set(scan_results) == set(SCAN_URLS)
+        
+        for result in scan_results.values():
+            assert "is_phishing" in result
+            assert "phishing_probability" in result
+            assert "risk_level" in result
+    
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_concurrent_scans(self, async_client, scan_results):
+        """Test concurrent single-URL scans agree with the batch scan"""
+        responses = await asyncio.gather(*[
+            async_client.post("/api/v1/scan", json={"url": url, "include_details": False})
+            for url in SCAN_URLS
+        ])
+        
+        for url, response in zip(SCAN_URLS, responses):
+            assert response.status_code == 200
+            data = response.json()
+            
+            assert data["url"] == url
+            assert data["is_phishing"] == scan_results[url]["is_phishing"]
+    
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_concurrent_scan_failure_is_isolated(self, async_client):
+        """Test a URL that fails to scan does not fail scans batched with it"""
+        bad, good, quick = await asyncio.gather(
+            async_client.post("/api/v1/scan", json={"url": "javascript:alert(1)"}),
+            async_client.post("/api/v1/scan", json={"url": "https://www.wikipedia.org"}),
+            async_client.get("/api/v1/scan/quick", params={"url": "https://www.github.com"}),
+        )
+        
+        assert bad.status_code == 500
+        assert good.status_code == 200
+        assert good.json()["url"] == "https://www.wikipedia.org"
+        assert quick.status_code == 200
+        assert quick.json()["url"] == "https://www.github.com"
+    
+    def test_batch_scan_stream(self, client):
+        """Test streaming batch scan endpoint"""
         urls = [
             "https://www.google.com",
             "https://www.microsoft.com",
             "https://www.apple.com"
         ]
-        
+    
         response = client.post(
-            "/api/v1/scan/batch",
+            "/api/v1/scan/batch/stream",
             json={"urls": urls, "include_details": False}
         )
         assert response.status_code == 200
-        data = response.json()
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+    
+        lines = [json.loads(line) for line in response.text.splitlines() if line]
+        assert len(lines) == 3
+        assert {line["url"] for line in lines} == set(urls)
+    
+    def test_batch_scan_stream_not_gzipped(self, client):
+        """Test the NDJSON stream bypasses gzip so lines are delivered as produced"""
+        urls = [f"https://www.example{i}.com/{'a' * 300}" for i in range(10)]
         
-        assert data["total_urls"] == 3
-        assert len(data["results"]) == 3
+        response = client.post(
+            "/api/v1/scan/batch/stream",
+            json={"urls": urls, "include_details": True},
+            headers={"Accept-Encoding": "gzip"},
+        )
+        assert response.status_code == 200
+        assert "content-encoding" not in response.headers
+        assert len(response.text.splitlines()) == len(urls)
+        
+        # Non-streamed responses of the same size are still compressed
+        response = client.post(
+            "/api/v1/scan/batch",
+            json={"urls": urls, "include_details": True},
+            headers={"Accept-Encoding": "gzip"},
+        )
+        assert response.headers["content-encoding"] == "gzip"
     
     def test_scan_invalid_url(self, client):
         """Test scanning with empty URL"""
@@ -145,17 +255,53 @@ class TestURLScan:
         assert response.status_code == 422  # Validation error
 
 
+class TestAdminEndpoints:
+    """Test admin-only endpoints"""
+    
+    @pytest.fixture
+    def admin_token(self, monkeypatch):
+        """Configure an admin token for the routes module"""
+        from api import routes
+        
+        monkeypatch.setattr(routes, "settings", dataclasses.replace(routes.settings, ADMIN_TOKEN="test-token"))
+        return "test-token"
+    
+    def test_cache_clear_disabled_without_token_setting(self, client):
+        """Test cache clearing is refused when no admin token is configured"""
+        response = client.post("/api/v1/cache/clear", headers={"X-Admin-Token": "anything"})
+        assert response.status_code == 403
+    
+    def test_cache_clear_requires_admin_token(self, client, admin_token):
+        """Test cache clearing checks the admin token"""
+        response = client.post("/api/v1/cache/clear")
+        assert response.status_code == 401
+        
+        response = client.post("/api/v1/cache/clear", headers={"X-Admin-Token": "wrong"})
+        assert response.status_code == 401
+        
+        response = client.post("/api/v1/cache/clear", headers={"X-Admin-Token": admin_token})
+        assert response.status_code == 200
+        assert response.json()["success"] is True
+    
+    def test_cache_clear_drops_model_predictions(self, client, admin_token, monkeypatch):
+        """Test cache clearing also reaches the per-model prediction caches"""
+        from services.ensemble_predictor import get_ensemble_predictor
+        
+        predictor = get_ensemble_predictor()
+        calls = []
+        monkeypatch.setattr(predictor, "cache_clear", lambda: calls.append(True))
+        
+        response = client.post("/api/v1/cache/clear", headers={"X-Admin-Token": admin_token})
+        assert response.status_code == 200
+        assert calls == [True]
+
+
 class TestSuspiciousURLs:
     """Test detection of suspicious URLs"""
     
-    def test_ip_address_url(self, client):
+    def test_ip_address_url(self, scan_results):
         """Test URL with IP address"""
-        response = client.post(
-            "/api/v1/scan",
-            json={"url": "http://192.168.1.1/login", "include_details": True}
-        )
-        assert response.status_code == 200
-        data = response.json()
+        data = scan_results["http://192.168.1.1/login"]
         
         # IP addresses should be flagged
         assert data["url_features"]["has_ip"] == 1
@@ -0,0 +1,70 @@
+"""
+Tests for the scan result cache
+"""
+
+import pytest
+from types import SimpleNamespace
+
+from database.models import (
+    Database,
+    URLScan,
+    _scan_memory_cache,
+    cache_scan_result,
+    get_cached_scan,
+)
+
+
+def _prediction():
+    """Minimal stand-in for an EnsemblePrediction"""
+    return SimpleNamespace(
+        is_phishing=False,
+        phishing_probability=0.01,
+        confidence=0.98,
+        risk_level="safe",
+        status="safe",
+        electra_probability=0.01,
+        biformer_probability=0.02,
+        lgbm_probability=0.03,
+        url_features={"domain": "example"},
+        domain_trust_score=0.9,
+        domain_trust_level="high",
+        is_whitelisted=True,
+        threshold=0.0863,
+        rule_flags=["trusted_domain"],
+    )
+
+
+def _read_columns(scan):
+    """Read every mapped column of a row"""
+    return {column.key: getattr(scan, column.key) for column in URLScan.__table__.columns}
+
+
+class TestScanCache:
+    """Test cached scan rows stay readable after their session closes"""
+    
+    @pytest.mark.asyncio
+    async def test_cached_row_columns_readable_twice(self):
+        """Test every column of a DB-loaded cached row can be read on repeat hits"""
+        db = Database("sqlite+aiosqlite:///:memory:")
+        await db.connect()
+        url = "https://cache-test.example.com/page"
+        
+        try:
+            async with db.async_session_factory() as session:
+                await cache_scan_result(session, _prediction(), url)
+            
+            # Force the next lookup through the DB query path
+            _scan_memory_cache.clear()
+            
+            reads = []
+            for _ in range(2):
+                async with db.async_session_factory() as session:
+                    scan = await get_cached_scan(session, url)
+                reads.append(_read_columns(scan))
+            
+            assert reads[0] == reads[1]
+            assert reads[0]["rule_flags"] == ["trusted_domain"]
+            assert reads[0]["created_at"] is not None
+        finally:
+            _scan_memory_cache.clear()
+            await db.disconnect()
@@ -3,10 +3,6 @@ Tests for feature extractor
 """
 
 import pytest
-import sys
-from pathlib import Path
-
-sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from services.feature_extractor import URLFeatureExtractor, url_feature_extractor
 
@@ -14,7 +10,7 @@ from services.feature_extractor import URLFeatureExtractor, url_feature_extracto
 class TestURLFeatureExtractor:
     """Test URL feature extraction"""
     
-    @pytest.fixture
+    @pytest.fixture(scope="session")
     def extractor(self):
         return URLFeatureExtractor()
     
@@ -71,6 +67,30 @@ class TestURLFeatureExtractor:
         assert isinstance(features, list)
         assert len(features) == 12  # Expected number of features
         assert all(isinstance(f, (int, float)) for f in features)
+    
+    def test_vectorized_lgbm_features_match_scalar(self, extractor, monkeypatch):
+        """Vectorized LightGBM rows equal extract_lgbm_features across chunk boundaries"""
+        urls = [
+            "https://www.google.com",
+            "http://Login.PayPal.Example.COM/Verify?ID=42",
+            "https://пример.рф/вход",
+            "http://ωmega.example.gr/path",
+            "http://[::1]:8080/x",
+            "http://[2001:db8::1]/admin",
+            "https://example.com/%2e%2e/%2E%2Fetc",
+            "http://192.168.1.1/login",
+            "xn--80ak6aa92e.com/page",
+            "HTTPS://MiXeD.CaSe.Example.org/A/b?C=d",
+            "https://bücher.de/%C3%BC",
+        ]
+        # Small chunks so ASCII rows span several chunks around non-ASCII ones
+        monkeypatch.setattr(extractor, "VECTOR_CHUNK_SIZE", 3)
+    
+        matrix = extractor.extract_batch_lgbm_features_vec(urls)
+    
+        assert matrix.shape == (len(urls), 12)
+        for url, row in zip(urls, matrix.tolist()):
+            assert row == [float(f) for f in extractor.extract_lgbm_features(url)], url
 
 
 class TestEntropy:
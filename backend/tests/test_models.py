@@ -0,0 +1,49 @@
+"""
+Tests for the model wrappers
+"""
+
+import numpy as np
+import pytest
+
+from config.settings import settings
+from models.lgbm_model import LGBMURLModel
+from services.feature_extractor import url_feature_extractor
+
+
+LGBM_URLS = [
+    "https://www.google.com",
+    "http://192-168-1-1.example.com",
+    "https://stackoverflow.com/questions/1",
+    "https://example.org",
+    "http://paypal-secure-login.verify-account.tk/signin?user=1",
+]
+
+
+class TestLGBMURLModel:
+    """Test LightGBM probabilities match the booster's own output"""
+    
+    @pytest.fixture(scope="session")
+    def lgbm(self):
+        if not settings.lgbm_model_full_path.exists():
+            pytest.skip("LightGBM model file not available")
+        model = LGBMURLModel()
+        assert model.load()
+        return model
+    
+    def test_predict_matches_booster(self, lgbm):
+        """Test phishing_probability equals Booster.predict (default, non-raw output)"""
+        for url in LGBM_URLS:
+            row = np.asarray([url_feature_extractor.extract_lgbm_features(url)], dtype=np.float64)
+            expected = lgbm.model.predict(row)[0]
+            
+            assert lgbm.predict(url)['phishing_probability'] == pytest.approx(expected, rel=1e-12)
+    
+    def test_predict_batch_matches_booster(self, lgbm):
+        """Test batched probabilities equal Booster.predict on the same rows"""
+        rows = np.asarray(
+            [url_feature_extractor.extract_lgbm_features(url) for url in LGBM_URLS], dtype=np.float64
+        )
+        expected = lgbm.model.predict(rows)
+        
+        probabilities = [result['phishing_probability'] for result in lgbm.predict_batch(LGBM_URLS)]
+        assert probabilities == pytest.approx(expected.tolist(), rel=1e-12)
@@ -3,18 +3,15 @@ Tests for domain trust evaluation
 """
 
 import pytest
-import sys
-from pathlib import Path
-
-sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from services.domain_trust import DomainTrustEvaluator, TrustLevel
+from utils.public_suffix import extract_domain_parts
 
 
 class TestDomainTrustEvaluator:
     """Test domain trust evaluation"""
     
-    @pytest.fixture
+    @pytest.fixture(scope="session")
     def evaluator(self):
         return DomainTrustEvaluator()
     
@@ -101,5 +98,25 @@ class TestTrustLevels:
         assert low_score_result in [TrustLevel.SUSPICIOUS, TrustLevel.DANGEROUS]
 
 
+class TestPublicSuffix:
+    """Test PSL trie domain extraction"""
+    
+    def test_multi_label_suffix(self):
+        """Test registered domain under a multi-label suffix"""
+        parts = extract_domain_parts("https://user@Mail.BBC.co.uk:8443/path?q=1")
+        
+        assert parts == ("mail", "bbc", "co.uk", "bbc.co.uk")
+    
+    def test_wildcard_and_exception_rules(self):
+        """Test wildcard suffixes and their exceptions"""
+        assert extract_domain_parts("foo.bar.kawasaki.jp").registered_domain == "foo.bar.kawasaki.jp"
+        assert extract_domain_parts("www.city.kawasaki.jp").registered_domain == "city.kawasaki.jp"
+    
+    def test_unregistrable_hosts(self):
+        """Test IPs and unknown TLDs have no registered domain"""
+        assert extract_domain_parts("http://192.168.1.1/login") == ("", "192.168.1.1", "", "")
+        assert extract_domain_parts("http://localhost:8000").registered_domain == ""
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,58 @@
+"""
+JSON Utilities
+Fast JSON encoding with orjson when available, stdlib json otherwise
+"""
+
+import json
+from datetime import date, datetime
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from loguru import logger
+
+# Try to import orjson (C implementation)
+try:
+    import orjson
+    from fastapi.responses import ORJSONResponse
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    logger.warning("orjson not installed. Using stdlib json for responses.")
+
+
+if ORJSON_AVAILABLE:
+    DefaultJSONResponse = ORJSONResponse
+
+    def json_dumps(obj: Any) -> bytes:
+        """Serialize an object to JSON bytes"""
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+
+    def json_dumps_str(obj: Any) -> str:
+        """Serialize an object to a JSON string"""
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode("utf-8")
+
+    def json_loads(data: Any) -> Any:
+        """Deserialize JSON from str or bytes"""
+        return orjson.loads(data)
+else:
+    DefaultJSONResponse = JSONResponse
+
+    def _json_default(obj: Any) -> Any:
+        """Encode values stdlib json does not handle natively"""
+        if isinstance(obj, (datetime, date)):
+            return obj.isoformat()
+        if hasattr(obj, "item"):  # numpy scalars
+            return obj.item()
+        return str(obj)
+
+    def json_dumps(obj: Any) -> bytes:
+        """Serialize an object to JSON bytes"""
+        return json.dumps(obj, default=_json_default).encode("utf-8")
+
+    def json_dumps_str(obj: Any) -> str:
+        """Serialize an object to a JSON string"""
+        return json.dumps(obj, default=_json_default)
+
+    def json_loads(data: Any) -> Any:
+        """Deserialize JSON from str or bytes"""
+        return json.loads(data)
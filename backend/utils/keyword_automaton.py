@@ -0,0 +1,129 @@
+"""
+Keyword Automaton
+Single-pass matching of trust/suspicious keyword lists against a hostname
+"""
+
+from typing import Dict, FrozenSet, List, NamedTuple, Sequence
+from loguru import logger
+
+from config.constants import (
+    HIGH_TRUST_KEYWORDS,
+    MEDIUM_TRUST_KEYWORDS,
+    SUSPICIOUS_KEYWORDS,
+    PHISHING_SUBSTRINGS,
+    PHISHING_SUBSTRING_RE,
+)
+
+# Try to import Aho-Corasick automaton (C extension)
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+    logger.warning("pyahocorasick not installed. Keyword matching will use substring scans.")
+
+
+# Every keyword the trust evaluator looks for, de-duplicated in list order
+ALL_KEYWORDS = tuple(dict.fromkeys(
+    HIGH_TRUST_KEYWORDS + MEDIUM_TRUST_KEYWORDS + SUSPICIOUS_KEYWORDS + PHISHING_SUBSTRINGS
+))
+
+# Keywords other than phishing substrings, for the substring-scan fallback
+_NON_PHISHING_KEYWORDS = tuple(k for k in ALL_KEYWORDS if k not in PHISHING_SUBSTRINGS)
+
+
+def _build_automaton():
+    """Compile all keyword lists into one automaton"""
+    automaton = ahocorasick.Automaton()
+    for keyword in ALL_KEYWORDS:
+        automaton.add_word(keyword, keyword)
+    automaton.make_automaton()
+    return automaton
+
+
+KEYWORD_AUTOMATON = _build_automaton() if AHOCORASICK_AVAILABLE else None
+
+
+def _rank(keywords: Sequence[str]) -> Dict[str, int]:
+    """Map each keyword to its position in its list"""
+    return {keyword: i for i, keyword in enumerate(keywords)}
+
+
+# Per-list ranks, so hits are reported in list order without walking the lists
+HIGH_TRUST_RANK = _rank(HIGH_TRUST_KEYWORDS)
+MEDIUM_TRUST_RANK = _rank(MEDIUM_TRUST_KEYWORDS)
+SUSPICIOUS_RANK = _rank(SUSPICIOUS_KEYWORDS)
+PHISHING_SUBSTRING_RANK = _rank(PHISHING_SUBSTRINGS)
+
+
+class HostKeywordHits(NamedTuple):
+    """Keywords found in each part of a hostname"""
+    subdomain: FrozenSet[str]
+    domain: FrozenSet[str]
+    full_host: FrozenSet[str]
+
+
+def scan_host_keywords(subdomain: str, domain: str) -> HostKeywordHits:
+    """
+    Find every known keyword in a hostname with one pass.
+
+    The scan runs over "subdomain.domain" and each match is attributed to
+    the subdomain, the domain, or only the joined host by its position.
+
+    Args:
+        subdomain: Subdomain part (may be empty)
+        domain: Registered domain name without suffix
+
+    Returns:
+        HostKeywordHits with the keywords contained in each part
+    """
+    full_host = f"{subdomain}.{domain}" if subdomain else domain
+
+    if KEYWORD_AUTOMATON is None:
+        # One regex pass decides whether any phishing substring needs probing
+        if PHISHING_SUBSTRING_RE.search(full_host):
+            keywords = ALL_KEYWORDS
+        else:
+            keywords = _NON_PHISHING_KEYWORDS
+        return HostKeywordHits(
+            subdomain=frozenset(k for k in keywords if k in subdomain),
+            domain=frozenset(k for k in keywords if k in domain),
+            full_host=frozenset(k for k in keywords if k in full_host),
+        )
+
+    subdomain_len = len(subdomain)
+    domain_start = subdomain_len + 1 if subdomain else 0
+
+    in_subdomain = set()
+    in_domain = set()
+    in_full_host = set()
+
+    for end, keyword in KEYWORD_AUTOMATON.iter(full_host):
+        start = end - len(keyword) + 1
+        in_full_host.add(keyword)
+        if start >= domain_start:
+            in_domain.add(keyword)
+        elif end < subdomain_len:
+            in_subdomain.add(keyword)
+
+    return HostKeywordHits(
+        subdomain=frozenset(in_subdomain),
+        domain=frozenset(in_domain),
+        full_host=frozenset(in_full_host),
+    )
+
+
+def ordered_hits(hits: FrozenSet[str], rank: Dict[str, int]) -> List[str]:
+    """
+    Keywords of one list found in a hit set, in that list's order.
+
+    Args:
+        hits: Keywords found by scan_host_keywords
+        rank: One of the *_RANK maps above
+
+    Returns:
+        Matching keywords sorted by list position
+    """
+    if not hits:
+        return []
+    return sorted(hits.intersection(rank), key=rank.__getitem__)
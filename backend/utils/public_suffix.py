@@ -0,0 +1,164 @@
+"""
+Public Suffix Trie
+In-process registered-domain extraction over the Public Suffix List
+"""
+
+import pkgutil
+import re
+from ipaddress import AddressValueError, IPv6Address
+from typing import Dict, Iterable, List, NamedTuple, Optional
+from urllib.parse import scheme_chars
+
+import idna
+
+
+# Same suffix-line pattern and ICANN/private separator tldextract parses
+_SUFFIX_RE = re.compile(r"^(?P<suffix>[.*!]*\w[\S]*)", re.UNICODE | re.MULTILINE)
+_PRIVATE_SEPARATOR = "// ===BEGIN PRIVATE DOMAINS==="
+
+_IPV4_RE = re.compile(
+    r"^(?:(?:[0-9]|[1-9][0-9]|1[0-9]{2}|2[0-4][0-9]|25[0-5])\.)"
+    r"{3}(?:[0-9]|[1-9][0-9]|1[0-9]{2}|2[0-4][0-9]|25[0-5])$",
+    re.ASCII,
+)
+
+_SCHEME_CHARS = frozenset(scheme_chars)
+_ROOT_LABEL_DOTS = ".。．｡"
+
+# Trie nodes map a label to its child; this key marks the end of a rule
+_END = None
+
+
+class DomainParts(NamedTuple):
+    """Lowercased hostname split around its public suffix"""
+    subdomain: str
+    domain: str
+    suffix: str
+    registered_domain: str
+
+
+def _build_trie(rules: Iterable[str]) -> Dict:
+    """
+    Build a reversed-label trie from suffix rules.
+
+    Wildcard ("*") and exception ("!label") rules are stored as ordinary
+    labels, so lookups check for them by key.
+    """
+    root: Dict = {}
+    for rule in rules:
+        node = root
+        for label in reversed(rule.split(".")):
+            node = node.setdefault(label, {})
+        node[_END] = True
+    return root
+
+
+def _load_trie() -> Dict:
+    """Parse the ICANN section of the PSL snapshot bundled with tldextract"""
+    snapshot = pkgutil.get_data("tldextract", ".tld_set_snapshot").decode("utf-8")
+    public_text = snapshot.partition(_PRIVATE_SEPARATOR)[0]
+    return _build_trie([m.group("suffix") for m in _SUFFIX_RE.finditer(public_text)])
+
+
+# Built once at import; private (non-ICANN) suffixes are excluded, as in
+# tldextract's default configuration
+PSL_TRIE = _load_trie()
+
+
+def _host_from_url(url: str) -> str:
+    """Extract the lowercased host from a URL-like string without regexes"""
+    start = url.find("//")
+    if start == 0:
+        url = url[2:]
+    elif start >= 2 and url[start - 1] == ":" and _SCHEME_CHARS.issuperset(url[:start - 1]):
+        url = url[start + 2:]
+
+    # Authority ends at the first path, query or fragment delimiter
+    end = len(url)
+    for delimiter in "/?#":
+        index = url.find(delimiter, 0, end)
+        if index != -1:
+            end = index
+    host = url[url.rfind("@", 0, end) + 1:end]
+
+    if host[:1] == "[":
+        close = host.find("]")
+        if close != -1:
+            return host[:close + 1].lower()
+
+    colon = host.find(":")
+    if colon != -1:
+        host = host[:colon]
+    return host.strip().rstrip(_ROOT_LABEL_DOTS).lower()
+
+
+def _decode_label(label: str) -> str:
+    """Decode punycode labels so they match the Unicode rules in the trie"""
+    if label.startswith("xn--"):
+        try:
+            return idna.decode(label)
+        except (UnicodeError, IndexError):
+            pass
+    return label
+
+
+def _suffix_index(labels: List[str]) -> Optional[int]:
+    """Index of the first public suffix label, or None when no rule matches"""
+    node = PSL_TRIE
+    suffix_index = label_index = len(labels)
+
+    for label in reversed(labels):
+        decoded = _decode_label(label)
+        child = node.get(decoded)
+        if child is not None:
+            label_index -= 1
+            node = child
+            if _END in node:
+                suffix_index = label_index
+            continue
+
+        if "*" in node:
+            # Wildcard swallows this label unless an exception rule names it
+            return label_index if "!" + decoded in node else label_index - 1
+        break
+
+    return None if suffix_index == len(labels) else suffix_index
+
+
+def extract_domain_parts(url: str) -> DomainParts:
+    """
+    Split a URL's host into subdomain, domain and public suffix.
+
+    Matches tldextract's default (ICANN-only, offline snapshot) results,
+    lowercased.
+
+    Args:
+        url: URL or bare hostname
+
+    Returns:
+        DomainParts for the host
+    """
+    host = _host_from_url(url)
+    if "。" in host or "．" in host or "｡" in host:
+        host = host.replace("。", ".").replace("．", ".").replace("｡", ".")
+
+    if len(host) >= 4 and host[0] == "[" and host[-1] == "]":
+        try:
+            IPv6Address(host[1:-1])
+            return DomainParts("", host, "", "")
+        except AddressValueError:
+            pass
+
+    labels = host.split(".")
+    suffix_index = _suffix_index(labels)
+
+    if suffix_index is None:
+        if len(labels) == 4 and host[:1].isdecimal() and _IPV4_RE.fullmatch(host):
+            return DomainParts("", host, "", "")
+        return DomainParts(".".join(labels[:-1]), labels[-1], "", "")
+
+    subdomain = ".".join(labels[:suffix_index - 1]) if suffix_index >= 2 else ""
+    domain = labels[suffix_index - 1] if suffix_index > 0 else ""
+    suffix = ".".join(labels[suffix_index:])
+    registered_domain = f"{domain}.{suffix}" if domain and suffix else ""
+    return DomainParts(subdomain, domain, suffix, registered_domain)
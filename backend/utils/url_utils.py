@@ -4,9 +4,33 @@ Utility functions for the phishing detection backend
 
 import hashlib
 import re
-from typing import Optional, List
-from urllib.parse import urlparse
+from functools import lru_cache
+from ipaddress import IPv6Address
+from typing import Iterable, Iterator, Optional, List, Tuple
+from urllib.parse import ParseResult, urlparse
 import tldextract
+from tldextract.tldextract import ExtractResult
+
+try:
+    from blake3 import blake3 as _hash
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    _hash = hashlib.sha256
+    BLAKE3_AVAILABLE = False
+
+# URL strings are immutable and every helper below is a pure function of its
+# input, so results are memoized: one URL flows through several of them per scan
+_URL_CACHE_SIZE = 4096
+
+# One extractor for every helper, on the bundled PSL snapshot: the suffix list
+# is parsed once and lookups never touch the network or the disk cache
+_TLD_EXTRACTOR = tldextract.TLDExtract(suffix_list_urls=(), cache_dir=None)
+
+# IPv4 pattern
+_IPV4_PATTERN = re.compile(
+    r'^(?:(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.){3}'
+    r'(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)$'
+)
 
 
 def normalize_url(url: str) -> str:
@@ -19,6 +43,12 @@ def normalize_url(url: str) -> str:
     Returns:
         Normalized URL
     """
+    return _normalize_and_parse(url)[0]
+
+
+@lru_cache(maxsize=_URL_CACHE_SIZE)
+def _normalize_and_parse(url: str) -> Tuple[str, ParseResult]:
+    """Normalized URL and its ParseResult, from a single urlparse when it has a host"""
     url = url.strip()
     
     # Add protocol if missing
@@ -28,17 +58,39 @@ def normalize_url(url: str) -> str:
     # Convert to lowercase (domain part only)
     parsed = urlparse(url)
     if parsed.netloc:
-        normalized = f"{parsed.scheme}://{parsed.netloc.lower()}{parsed.path}"
+        netloc = parsed.netloc.lower()
+        normalized = f"{parsed.scheme}://{netloc}{parsed.path}"
         if parsed.query:
             normalized += f"?{parsed.query}"
         if parsed.fragment:
             normalized += f"#{parsed.fragment}"
-        return normalized
+        # Exactly what re-parsing the normalized string yields (params are dropped)
+        return normalized, parsed._replace(netloc=netloc, params='')
     
-    return url.lower()
+    url = url.lower()
+    return url, urlparse(url)
 
 
+@lru_cache(maxsize=_URL_CACHE_SIZE)
 def get_url_hash(url: str) -> str:
+    """
+    Generate a consistent fingerprint for URL, for cache and dedup keys.
+    
+    Uses BLAKE3 when installed and SHA256 otherwise, so the value is not a
+    stable cryptographic digest; use get_url_hash_sha256 where one is needed.
+    
+    Args:
+        url: URL to hash
+        
+    Returns:
+        64-character hex string
+    """
+    normalized = normalize_url(url)
+    return _hash(normalized.encode()).hexdigest()
+
+
+@lru_cache(maxsize=_URL_CACHE_SIZE)
+def get_url_hash_sha256(url: str) -> str:
     """
     Generate consistent SHA256 hash for URL.
     
@@ -52,6 +104,29 @@ def get_url_hash(url: str) -> str:
     return hashlib.sha256(normalized.encode()).hexdigest()
 
 
+def batch_url_hashes(urls: List[str], normalized: bool = False) -> List[str]:
+    """
+    Generate get_url_hash values for many URLs.
+    
+    Args:
+        urls: URLs to hash
+        normalized: Skip normalize_url when the caller already normalized them
+        
+    Returns:
+        64-character hex strings, in input order
+    """
+    hash_ = _hash
+    keys: Iterable[str] = urls if normalized else map(normalize_url, urls)
+    return [hash_(url.encode()).hexdigest() for url in keys]
+
+
+@lru_cache(maxsize=_URL_CACHE_SIZE)
+def _tld_extract(url: str) -> ExtractResult:
+    """Memoized extraction with the shared TLDExtract"""
+    return _TLD_EXTRACTOR(url)
+
+
+@lru_cache(maxsize=_URL_CACHE_SIZE)
 def extract_domain(url: str) -> str:
     """
     Extract registered domain from URL.
@@ -62,12 +137,13 @@ def extract_domain(url: str) -> str:
     Returns:
         Registered domain (e.g., "google.com")
     """
-    extracted = tldextract.extract(url)
+    extracted = _tld_extract(url)
     if extracted.suffix:
         return f"{extracted.domain}.{extracted.suffix}"
     return extracted.domain
 
 
+@lru_cache(maxsize=_URL_CACHE_SIZE)
 def extract_full_hostname(url: str) -> str:
     """
     Extract full hostname including subdomains.
@@ -78,7 +154,7 @@ def extract_full_hostname(url: str) -> str:
     Returns:
         Full hostname
     """
-    parsed = urlparse(normalize_url(url))
+    parsed = _normalize_and_parse(url)[1]
     return parsed.netloc or ""
 
 
@@ -93,8 +169,7 @@ def is_valid_url(url: str) -> bool:
         True if valid URL
     """
     try:
-        url = normalize_url(url)
-        parsed = urlparse(url)
+        parsed = _normalize_and_parse(url)[1]
         return all([parsed.scheme, parsed.netloc])
     except Exception:
         return False
@@ -110,16 +185,29 @@ def is_ip_address(hostname: str) -> bool:
     Returns:
         True if IP address
     """
-    # IPv4 pattern
-    ipv4_pattern = re.compile(
-        r'^(?:(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.){3}'
-        r'(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)$'
-    )
+    # Only IPv6 literals contain ':'; ipaddress validates them exactly
+    if ':' in hostname:
+        try:
+            IPv6Address(hostname)
+            return True
+        except ValueError:
+            return False
+    return _is_ipv4(hostname)
+
+
+def _is_ipv4(hostname: str) -> bool:
+    """Dotted-quad check; cheap C-level scans reject nearly every hostname first"""
+    # Almost every hostname starts with a letter
+    if not hostname[:1].isdigit():
+        return False
     
-    # IPv6 pattern (simplified)
-    ipv6_pattern = re.compile(r'^([0-9a-fA-F]{0,4}:){2,7}[0-9a-fA-F]{0,4}$')
+    # Only ASCII digits and dots can follow (the regex '$' also allows one trailing newline)
+    core = hostname[:-1] if hostname[-1] == '\n' else hostname
+    if not (core.isascii() and core.replace('.', '').isdigit()) or core.count('.') != 3:
+        return False
     
-    return bool(ipv4_pattern.match(hostname) or ipv6_pattern.match(hostname))
+    # Octet ranges are left to the regex, for the rare hosts that get this far
+    return bool(_IPV4_PATTERN.match(hostname))
 
 
 def clean_url_for_display(url: str, max_length: int = 100) -> str:
@@ -151,9 +239,15 @@ def split_url_parts(url: str) -> dict:
     Returns:
         Dictionary with URL components
     """
-    url = normalize_url(url)
-    parsed = urlparse(url)
-    extracted = tldextract.extract(url)
+    # Copied so callers can't mutate the memoized result
+    return dict(_split_url_parts(url))
+
+
+@lru_cache(maxsize=_URL_CACHE_SIZE)
+def _split_url_parts(url: str) -> dict:
+    """Memoized body of split_url_parts (one parse, shared with tldextract)"""
+    parsed = _normalize_and_parse(url)[1]
+    extracted = _TLD_EXTRACTOR.extract_urllib(parsed)
     
     return {
         'scheme': parsed.scheme,
@@ -180,4 +274,19 @@ def batch_urls(urls: List[str], batch_size: int = 32) -> List[List[str]]:
     Returns:
         List of URL batches
     """
-    return [urls[i:i + batch_size] for i in range(0, len(urls), batch_size)]
+    return list(iter_batches(urls, batch_size))
+
+
+def iter_batches(urls: List[str], batch_size: int = 32) -> Iterator[List[str]]:
+    """
+    Lazily split URLs into batches (one batch held at a time).
+    
+    Args:
+        urls: List of URLs
+        batch_size: Size of each batch
+        
+    Yields:
+        URL batches, in input order
+    """
+    for i in range(0, len(urls), batch_size):
+        yield urls[i:i + batch_size]